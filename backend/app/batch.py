@@ -0,0 +1,287 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+import zlib
+from pathlib import Path, PurePosixPath
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+
+from fastapi import UploadFile
+
+from app.uploads import UPLOAD_CHUNK_BYTES, UploadTooLargeError, receive_upload
+
+
+BATCH_MAX_FILES = int(os.environ.get("BATCH_MAX_FILES", "1000"))
+BATCH_MAX_TOTAL_BYTES = int(os.environ.get("BATCH_MAX_TOTAL_BYTES", str(1024 * 1024 * 1024)))
+
+
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed"}
+
+
+class BatchLimitError(ValueError):
+    pass
+
+
+class BatchArchiveError(ValueError):
+    """The upload is a zip archive that cannot be used as a batch."""
+
+
+class BatchEntry:
+    __slots__ = ("index", "name", "path", "size", "digest", "error")
+
+    def __init__(
+        self,
+        *,
+        index: int,
+        name: str,
+        path: Path | None = None,
+        size: int = 0,
+        digest: bytes = b"",
+        error: str | None = None,
+    ):
+        self.index = index
+        self.name = name
+        self.path = path
+        self.size = size
+        self.digest = digest
+        self.error = error
+
+    def cleanup(self) -> None:
+        if self.path is None:
+            return
+        try:
+            self.path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+class BatchWorkspace:
+    """Temporary directory owning every spooled file of one batch request."""
+
+    def __init__(self):
+        self.path = Path(tempfile.mkdtemp(prefix="validate-batch-"))
+
+    def cleanup(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+async def collect_batch_entries(
+    files: list[UploadFile],
+    workspace: BatchWorkspace,
+    *,
+    max_file_bytes: int,
+) -> list[BatchEntry] | Iterator[BatchEntry]:
+    """Spool every upload before the streamed response starts; zip members are extracted lazily.
+
+    A zip archive is only accepted as the sole upload. Every other part is held to ``max_file_bytes``.
+    """
+    if any(_is_zip_upload(file) for file in files):
+        if len(files) != 1:
+            raise BatchArchiveError("A zip archive must be the only uploaded file.")
+        return await _collect_archive_entries(files[0], workspace, max_file_bytes=max_file_bytes)
+    if len(files) > BATCH_MAX_FILES:
+        raise BatchLimitError(f"Batch contains more than {BATCH_MAX_FILES} files.")
+
+    entries: list[BatchEntry] = []
+    total_bytes = 0
+    for index, file in enumerate(files):
+        name = file.filename or f"file-{index}"
+        try:
+            upload = await receive_upload(file, max_bytes=max_file_bytes, memory_limit=0)
+        except UploadTooLargeError:
+            entries.append(BatchEntry(index=index, name=name, error="Uploaded file is too large."))
+            continue
+
+        total_bytes += upload.size
+        if total_bytes > BATCH_MAX_TOTAL_BYTES:
+            upload.cleanup()
+            raise BatchLimitError("Batch upload is too large.")
+
+        path = upload.path
+        if path is not None:
+            path = path.replace(workspace.path / f"upload-{index}.bin")
+
+        entries.append(
+            BatchEntry(index=index, name=name, path=path, size=upload.size, digest=upload.digest)
+        )
+    return entries
+
+
+def _is_zip_upload(file: UploadFile) -> bool:
+    return (file.filename or "").lower().endswith(".zip") or file.content_type in ZIP_CONTENT_TYPES
+
+
+async def _collect_archive_entries(
+    file: UploadFile,
+    workspace: BatchWorkspace,
+    *,
+    max_file_bytes: int,
+) -> Iterator[BatchEntry]:
+    try:
+        upload = await receive_upload(file, max_bytes=BATCH_MAX_TOTAL_BYTES, memory_limit=0)
+    except UploadTooLargeError:
+        raise BatchLimitError("Batch upload is too large.") from None
+    if upload.path is None:
+        raise BatchArchiveError("Uploaded archive is not a valid zip file.")
+    path = upload.path.replace(workspace.path / "upload-0.zip")
+    return iter_zip_entries(path, workspace, max_file_bytes=max_file_bytes)
+
+
+def iter_zip_entries(
+    zip_path: Path,
+    workspace: BatchWorkspace,
+    *,
+    max_file_bytes: int,
+) -> Iterator[BatchEntry]:
+    """Open the archive up front, so a corrupt one is rejected before the streamed response starts."""
+    try:
+        archive = zipfile.ZipFile(zip_path)
+    except (zipfile.BadZipFile, OSError):
+        raise BatchArchiveError("Uploaded archive is not a valid zip file.") from None
+    return _iter_archive_members(archive, workspace, max_file_bytes=max_file_bytes)
+
+
+def _iter_archive_members(
+    archive: zipfile.ZipFile,
+    workspace: BatchWorkspace,
+    *,
+    max_file_bytes: int,
+) -> Iterator[BatchEntry]:
+    total_bytes = 0
+    index = 0
+    with archive:
+        for info in archive.infolist():
+            member_name = PurePosixPath(info.filename)
+            if info.is_dir() or member_name.suffix.lower() != ".xml" or member_name.name.startswith("."):
+                continue
+            if index >= BATCH_MAX_FILES:
+                yield BatchEntry(
+                    index=index,
+                    name=info.filename,
+                    error=f"Batch contains more than {BATCH_MAX_FILES} files.",
+                )
+                return
+
+            entry_index = index
+            index += 1
+            if info.file_size > max_file_bytes:
+                yield BatchEntry(index=entry_index, name=info.filename, error="Uploaded file is too large.")
+                continue
+
+            # Sizes in the zip header are not trusted; the extraction enforces the limits itself.
+            target = workspace.path / f"member-{entry_index}.xml"
+            digest = hashlib.sha256()
+            size = 0
+            error = None
+            try:
+                with archive.open(info) as source, target.open("wb") as sink:
+                    while chunk := source.read(UPLOAD_CHUNK_BYTES):
+                        size += len(chunk)
+                        if size > max_file_bytes:
+                            error = "Uploaded file is too large."
+                            break
+                        if total_bytes + size > BATCH_MAX_TOTAL_BYTES:
+                            error = "Batch upload is too large."
+                            break
+                        digest.update(chunk)
+                        sink.write(chunk)
+            except (zipfile.BadZipFile, zlib.error, NotImplementedError, RuntimeError):
+                # Damaged, encrypted or unsupported members fail on their own without aborting the batch.
+                error = "Archive member could not be read."
+
+            if error is not None:
+                target.unlink(missing_ok=True)
+                yield BatchEntry(index=entry_index, name=info.filename, error=error)
+                if error == "Batch upload is too large.":
+                    return
+                continue
+
+            total_bytes += size
+            yield BatchEntry(
+                index=entry_index,
+                name=info.filename,
+                path=target,
+                size=size,
+                digest=digest.digest(),
+            )
+
+
+def _encode_line(payload: dict) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+async def stream_batch_results(
+    entries: Iterable[BatchEntry],
+    validate_entry: Callable[[BatchEntry], Awaitable[tuple[bytes, bool]]],
+    *,
+    concurrency: int,
+    workspace: BatchWorkspace,
+) -> AsyncIterator[bytes]:
+    """Yield one NDJSON line per file as soon as it finishes, followed by a summary line.
+
+    ``validate_entry`` returns the encoded result together with its ``xsdValid`` value.
+    """
+    entries = iter(entries)
+    started = time.perf_counter()
+    summary = {"files": 0, "xsdValid": 0, "xsdInvalid": 0, "failed": 0}
+
+    async def process(entry: BatchEntry) -> bytes:
+        try:
+            if entry.error is not None:
+                summary["failed"] += 1
+                return _encode_line(
+                    {"type": "error", "index": entry.index, "file": entry.name, "detail": entry.error}
+                )
+            try:
+                body, xsd_valid = await validate_entry(entry)
+            except Exception as exc:
+                summary["failed"] += 1
+                detail = getattr(exc, "detail", None) or str(exc) or exc.__class__.__name__
+                return _encode_line(
+                    {"type": "error", "index": entry.index, "file": entry.name, "detail": detail}
+                )
+
+            if xsd_valid:
+                summary["xsdValid"] += 1
+            else:
+                summary["xsdInvalid"] += 1
+            prefix = _encode_line({"type": "result", "index": entry.index, "file": entry.name})[:-2]
+            return prefix + b',"result":' + body + b"}\n"
+        finally:
+            summary["files"] += 1
+            entry.cleanup()
+
+    pending: set[asyncio.Task] = set()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                entry = await asyncio.to_thread(next, entries, None)
+                if entry is None:
+                    exhausted = True
+                    break
+                pending.add(asyncio.create_task(process(entry)))
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+
+        summary["durationMs"] = round((time.perf_counter() - started) * 1000, 1)
+        yield _encode_line({"type": "summary", **summary})
+    finally:
+        for task in pending:
+            task.cancel()
+        close = getattr(entries, "close", None)
+        if callable(close):
+            try:
+                close()
+            except ValueError:
+                # The zip reader is still extracting in a worker thread after a client disconnect.
+                pass
+        workspace.cleanup()
\ No newline at end of file
@@ -1,57 +1,255 @@
-from xml.etree import ElementTree as ET
+import os
 
-from app.validation import validate_xml
-from app.xml_utils import collect_leaf_values, parse_xml_once
+from pathlib import Path
 
+from app.metrics import STAGE_SECONDS
+from app.validation import is_xsd_valid, is_xsd_valid_file
+from app.xml_utils import (
+    DocumentIndex,
+    build_document_index,
+    build_document_index_from_stream,
+    parse_xml_document,
+)
 
-def _diff_leaf_values(xml1_root: ET.Element, xml2_root: ET.Element) -> dict:
-    xml1_leaves = collect_leaf_values(xml1_root)
-    xml2_leaves = collect_leaf_values(xml2_root)
 
-    changed_values = 0
-    added_nodes = 0
-    removed_nodes = 0
+DEFAULT_IDENTITY_KEYS = (
+    "security=@positionId,depot=@depotNumber,client=@clientNumber,"
+    "bankAccount=@iban,liabilityAccount=@iban,personalDetail=vn,child=vn"
+)
 
-    all_paths = set(xml1_leaves.keys()) | set(xml2_leaves.keys())
-    for path in all_paths:
-        values1 = xml1_leaves.get(path, [])
-        values2 = xml2_leaves.get(path, [])
 
+def parse_identity_keys(spec: str) -> dict[str, str]:
+    """Parse ``element=@attribute`` or ``element=childElement`` pairs separated by commas."""
+    identity_keys: dict[str, str] = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        element_name, separator, key = (part.strip() for part in item.partition("="))
+        if not separator or not element_name or not key.lstrip("@"):
+            raise ValueError(f"Invalid identity key '{item}'. Expected element=@attribute or element=child.")
+        identity_keys[element_name] = key
+    return identity_keys
+
+
+COMPARE_IDENTITY_KEYS = parse_identity_keys(os.environ.get("COMPARE_IDENTITY_KEYS", DEFAULT_IDENTITY_KEYS))
+
+
+class PreparedComparisonDocument:
+    """Validation outcome and fingerprinted leaf index of one compare input, built from a single parse."""
+
+    __slots__ = ("xsd_valid", "index")
+
+    def __init__(self, xsd_valid: bool, index: DocumentIndex | None):
+        self.xsd_valid = xsd_valid
+        self.index = index
+
+    def to_bytes(self) -> bytes:
+        """Data-only encoding: one flag byte, then the index as ``DocumentIndex.to_bytes`` writes it."""
+        flags = (1 if self.xsd_valid else 0) | (0 if self.index is None else 2)
+        return bytes([flags]) + (b"" if self.index is None else self.index.to_bytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "PreparedComparisonDocument":
+        """Decode ``to_bytes`` output. Raises ``ValueError`` for malformed data."""
+        if not data or data[0] > 3:
+            raise ValueError("Malformed prepared comparison document.")
+        return cls(bool(data[0] & 1), DocumentIndex.from_bytes(data[1:]) if data[0] & 2 else None)
+
+
+def prepare_comparison_document(
+    xml_bytes: bytes,
+    identity_keys: dict[str, str] | None = None,
+) -> PreparedComparisonDocument:
+    with STAGE_SECONDS.time("parse"):
+        document = parse_xml_document(xml_bytes)
+    if document.parse_error or document.root is None:
+        return PreparedComparisonDocument(False, None)
+    xsd_valid = is_xsd_valid(document)
+    with STAGE_SECONDS.time("index"):
+        index = build_document_index(
+            document.root,
+            COMPARE_IDENTITY_KEYS if identity_keys is None else identity_keys,
+        )
+    return PreparedComparisonDocument(xsd_valid, index)
+
+
+def prepare_comparison_file(
+    xml_path: Path | str,
+    identity_keys: dict[str, str] | None = None,
+) -> PreparedComparisonDocument:
+    """Prepare a document on disk in memory-bounded mode: the tree is never held as a whole."""
+    with open(xml_path, "rb") as source, STAGE_SECONDS.time("index"):
+        index, parse_error = build_document_index_from_stream(
+            source,
+            COMPARE_IDENTITY_KEYS if identity_keys is None else identity_keys,
+        )
+    if parse_error:
+        return PreparedComparisonDocument(False, None)
+    return PreparedComparisonDocument(is_xsd_valid_file(xml_path), index)
+
+
+class _LeafDiff:
+    """Counts changed, added and removed leaf values and keeps one window of the change list."""
+
+    __slots__ = ("changed_values", "added_nodes", "removed_nodes", "changes", "_index", "_start", "_end")
+
+    def __init__(self, change_window: tuple[int, int] | None):
+        self.changed_values = 0
+        self.added_nodes = 0
+        self.removed_nodes = 0
+        self.changes: list[dict] = []
+        self._index = 0
+        self._start, self._end = 0, 0
+        if change_window is not None:
+            self._start, self._end = change_window[0], change_window[0] + change_window[1]
+
+    def _record(self, change_type: str, path: str, index: int, multiple: bool, old_value, new_value) -> None:
+        if self._start <= self._index < self._end:
+            self.changes.append(
+                {
+                    "type": change_type,
+                    "path": f"{path}[{index + 1}]" if multiple else path,
+                    "oldValue": old_value,
+                    "newValue": new_value,
+                }
+            )
+        self._index += 1
+
+    def diff_path(self, path: str, values1: list[str], values2: list[str]) -> None:
+        """Align the values of one leaf path by position."""
+        multiple = max(len(values1), len(values2)) > 1
         shared_count = min(len(values1), len(values2))
         for index in range(shared_count):
             if values1[index] != values2[index]:
-                changed_values += 1
+                self.changed_values += 1
+                self._record("changed", path, index, multiple, values1[index], values2[index])
 
-        if len(values2) > len(values1):
-            added_nodes += len(values2) - len(values1)
-        elif len(values1) > len(values2):
-            removed_nodes += len(values1) - len(values2)
+        for index in range(shared_count, len(values2)):
+            self.added_nodes += 1
+            self._record("added", path, index, multiple, None, values2[index])
+        for index in range(shared_count, len(values1)):
+            self.removed_nodes += 1
+            self._record("removed", path, index, multiple, values1[index], None)
 
-    return {
-        "changedValues": changed_values,
-        "addedNodes": added_nodes,
-        "removedNodes": removed_nodes,
-    }
+    def summary(self) -> dict:
+        return {
+            "changedValues": self.changed_values,
+            "addedNodes": self.added_nodes,
+            "removedNodes": self.removed_nodes,
+        }
+
+
+def _diff_document_indexes(
+    xml1: DocumentIndex,
+    xml2: DocumentIndex,
+    change_window: tuple[int, int] | None = None,
+) -> tuple[dict, list[dict]]:
+    """Diff two indexes depth-first, skipping every path whose fingerprint is the same in both."""
+    diff = _LeafDiff(change_window)
+    empty: list = []
+
+    # Each entry: path, its id in xml1 and its id in xml2 (None where the path is missing).
+    root1, root2 = xml1.segments[0], xml2.segments[0]
+    pending = [(root1, 0, 0)] if root1 == root2 else [(root2, None, 0), (root1, 0, None)]
+    while pending:
+        path, id1, id2 = pending.pop()
+        if id1 is not None and id2 is not None and xml1.digest(id1) == xml2.digest(id2):
+            continue
+
+        values1 = empty if id1 is None else xml1.values(id1)
+        values2 = empty if id2 is None else xml2.values(id2)
+        if values1 or values2:
+            diff.diff_path(path, values1, values2)
 
+        xml2_children = {} if id2 is None else {xml2.segments[child]: child for child in xml2.children(id2)}
+        child_entries = []
+        for child in empty if id1 is None else xml1.children(id1):
+            segment = xml1.segments[child]
+            child_entries.append((f"{path}/{segment}", child, xml2_children.pop(segment, None)))
+        child_entries.extend((f"{path}/{segment}", None, child) for segment, child in xml2_children.items())
+        # Reversed onto the stack so children are visited in document order.
+        pending.extend(reversed(child_entries))
 
-def compare_xml(xml1_bytes: bytes, xml2_bytes: bytes) -> dict:
-    xml1_validation = validate_xml(xml1_bytes)
-    xml2_validation = validate_xml(xml2_bytes)
+    return diff.summary(), diff.changes
 
-    xml1_root, _, xml1_parse_error = parse_xml_once(xml1_bytes)
-    xml2_root, _, xml2_parse_error = parse_xml_once(xml2_bytes)
 
-    if xml1_parse_error or xml2_parse_error or xml1_root is None or xml2_root is None:
+def compare_prepared(
+    xml1: PreparedComparisonDocument,
+    xml2: PreparedComparisonDocument,
+    change_window: tuple[int, int] | None = None,
+) -> dict:
+    changes: list[dict] = []
+    if xml1.index is None or xml2.index is None:
         diff_summary = {
             "changedValues": 0,
             "addedNodes": 0,
             "removedNodes": 0,
         }
     else:
-        diff_summary = _diff_leaf_values(xml1_root, xml2_root)
+        with STAGE_SECONDS.time("diff"):
+            diff_summary, changes = _diff_document_indexes(xml1.index, xml2.index, change_window)
 
-    return {
-        "xml1Valid": xml1_validation["xsdValid"],
-        "xml2Valid": xml2_validation["xsdValid"],
+    result = {
+        "xml1Valid": xml1.xsd_valid,
+        "xml2Valid": xml2.xsd_valid,
+        "xml1Fingerprint": None if xml1.index is None else xml1.index.fingerprint,
+        "xml2Fingerprint": None if xml2.index is None else xml2.index.fingerprint,
         "diffSummary": diff_summary,
-    }
\ No newline at end of file
+    }
+    if change_window is not None:
+        result["changes"] = {
+            "total": sum(diff_summary.values()),
+            "offset": change_window[0],
+            "limit": change_window[1],
+            "items": changes,
+        }
+    return result
+
+
+def prepare_comparison_source(source: bytes | str) -> PreparedComparisonDocument:
+    """Prepare an upload held in memory (``bytes``) or spooled to disk (a path)."""
+    if isinstance(source, bytes):
+        return prepare_comparison_document(source)
+    return prepare_comparison_file(source)
+
+
+def prepare_comparison_payload(source: bytes | str) -> bytes:
+    """``prepare_comparison_source`` in its compact encoding, which is cheap to send back from a worker."""
+    return prepare_comparison_source(source).to_bytes()
+
+
+def compare_payloads(xml1: bytes, xml2: bytes, change_window: tuple[int, int] | None = None) -> dict:
+    """Diff two documents prepared separately by ``prepare_comparison_payload``."""
+    return compare_prepared(
+        PreparedComparisonDocument.from_bytes(xml1),
+        PreparedComparisonDocument.from_bytes(xml2),
+        change_window,
+    )
+
+
+def compare_sources(
+    xml1: PreparedComparisonDocument | bytes | str,
+    xml2: bytes | str,
+    change_window: tuple[int, int] | None = None,
+) -> dict:
+    """Prepare both compare inputs and diff them in one call, so only the result leaves a worker.
+
+    ``xml1`` may already be prepared, as a stored snapshot is.
+    """
+    if not isinstance(xml1, PreparedComparisonDocument):
+        xml1 = prepare_comparison_source(xml1)
+    return compare_prepared(xml1, prepare_comparison_source(xml2), change_window)
+
+
+def compare_xml(
+    xml1_bytes: bytes,
+    xml2_bytes: bytes,
+    change_window: tuple[int, int] | None = None,
+    identity_keys: dict[str, str] | None = None,
+) -> dict:
+    return compare_prepared(
+        prepare_comparison_document(xml1_bytes, identity_keys),
+        prepare_comparison_document(xml2_bytes, identity_keys),
+        change_window,
+    )
\ No newline at end of file
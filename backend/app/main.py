@@ -1,25 +1,124 @@
-import time
+import asyncio
+import hmac
+import math
+import os
 import logging
-from collections import defaultdict, deque
+import time
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Request
-from starlette.responses import JSONResponse
-from app.comparison import compare_xml
-from app.schema_explorer import get_schema_summary, get_schema_tree
+from fastapi import FastAPI, UploadFile, File, Header, HTTPException, Query, Request
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from app.batch import (
+    BatchArchiveError,
+    BatchEntry,
+    BatchLimitError,
+    BatchWorkspace,
+    collect_batch_entries,
+    stream_batch_results,
+)
+from app.comparison import compare_payloads, compare_sources, prepare_comparison_payload
+from app.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    METRICS,
+    PROCEDURAL_RELOADS,
+    RATE_LIMIT_REJECTIONS,
+    REQUEST_SECONDS,
+    UPLOAD_BYTES,
+    WORKER_REJECTIONS,
+)
+from app.rate_limit import create_rate_limiter
+from app.result_cache import (
+    ValidationResultCache,
+    accepts_encoding,
+    build_cache_key,
+    etag_for_key,
+    if_none_match_matches,
+)
+from app.schema_explorer import (
+    SCHEMA_SUMMARY_RESPONSE,
+    SCHEMA_TREE_RESPONSE,
+    SEARCH_KINDS,
+    EncodedJson,
+    cached_schema_node_response,
+    cached_schema_search_response,
+    get_schema_node_response,
+    get_schema_search_response,
+)
+from app.snapshots import (
+    SnapshotRecord,
+    SnapshotStore,
+    SnapshotTooLargeError,
+    prepare_snapshot,
+    prepare_snapshot_file,
+    snapshot_version,
+)
+from app.uploads import ReceivedUpload, UploadTooLargeError, receive_upload
 from app.validation import (
+    ProceduralReloadError,
     validate_xml,
+    validate_xml_file,
+    validate_xml_path,
     initialize_procedural_validators,
     close_procedural_validators,
+    effective_max_findings,
+    encoded_result_xsd_valid,
+    install_procedural_registry,
+    is_cacheable_result,
+    load_procedural_registry,
+    pending_procedural_rules_version,
+    procedural_rules_fingerprint,
+    schema_fingerprint,
+    structural_error_limit,
 )
+from app.workers import ValidationWorkerPool, WorkerJobTimeoutError, WorkerPoolSaturatedError
 
 app = FastAPI()
 logger = logging.getLogger(__name__)
 
-MAX_UPLOAD_BYTES = 5 * 1024 * 1024
-RATE_LIMIT_WINDOW_SECONDS = 60
-RATE_LIMIT_MAX_REQUESTS = 20
-RATE_LIMITED_PATHS = {"/api/validate", "/api/compare"}
-request_buckets: dict[str, deque[float]] = defaultdict(deque)
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(5 * 1024 * 1024)))
+MAX_UPLOAD_BYTES_BY_ROUTE = {
+    "/api/validate": int(os.environ.get("VALIDATE_MAX_UPLOAD_BYTES", str(256 * 1024 * 1024))),
+    "/api/compare": int(os.environ.get("COMPARE_MAX_UPLOAD_BYTES", str(MAX_UPLOAD_BYTES))),
+}
+MAX_UPLOAD_BYTES_BY_ROUTE["/api/snapshots"] = MAX_UPLOAD_BYTES_BY_ROUTE["/api/compare"]
+STREAMING_THRESHOLD_BYTES = int(os.environ.get("STREAMING_THRESHOLD_BYTES", str(MAX_UPLOAD_BYTES)))
+RATE_LIMITED_PATHS = {"/api/validate", "/api/validate/batch", "/api/compare", "/api/snapshots"}
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "").strip()
+PROCEDURAL_RELOAD_INTERVAL_SECONDS = float(os.environ.get("PROCEDURAL_RELOAD_INTERVAL_SECONDS", "0"))
+rate_limiter = create_rate_limiter()
+validation_pool = ValidationWorkerPool()
+validation_cache = ValidationResultCache()
+snapshot_store = SnapshotStore()
+procedural_reload_lock = asyncio.Lock()
+procedural_watch_task: asyncio.Task | None = None
+
+METRICS.callback(
+    "ech0278_worker_queue_depth",
+    "Validation jobs queued or running.",
+    lambda: validation_pool.queue_depth,
+)
+METRICS.callback(
+    "ech0278_worker_queue_limit",
+    "Validation jobs accepted before 503 is returned.",
+    lambda: validation_pool.queue_limit,
+)
+METRICS.callback(
+    "ech0278_result_cache_hits_total",
+    "Validation results served from the cache or joined to an identical request in flight.",
+    lambda: validation_cache.hits,
+    kind="counter",
+)
+METRICS.callback(
+    "ech0278_result_cache_misses_total",
+    "Validation results computed because they were not cached.",
+    lambda: validation_cache.misses,
+    kind="counter",
+)
+METRICS.callback(
+    "ech0278_result_cache_size_bytes",
+    "Encoded validation results held in memory.",
+    lambda: validation_cache.size_bytes,
+)
 
 
 @app.on_event("startup")
@@ -30,6 +129,28 @@ async def warm_procedural_validator_cache() -> None:
         logger.exception("Failed to initialize procedural validators: %s", exc)
 
 
+@app.on_event("startup")
+async def start_validation_pool() -> None:
+    try:
+        await validation_pool.start()
+    except Exception as exc:
+        logger.exception("Failed to start validation worker pool: %s", exc)
+
+
+@app.on_event("startup")
+async def start_procedural_rules_watch() -> None:
+    global procedural_watch_task
+
+    if PROCEDURAL_RELOAD_INTERVAL_SECONDS > 0:
+        procedural_watch_task = asyncio.create_task(watch_procedural_rules(PROCEDURAL_RELOAD_INTERVAL_SECONDS))
+
+
+@app.on_event("shutdown")
+async def stop_procedural_rules_watch() -> None:
+    if procedural_watch_task is not None:
+        procedural_watch_task.cancel()
+
+
 @app.on_event("shutdown")
 async def close_procedural_validator_resources() -> None:
     try:
@@ -38,6 +159,30 @@ async def close_procedural_validator_resources() -> None:
         logger.exception("Failed to close procedural validators cleanly: %s", exc)
 
 
+@app.on_event("shutdown")
+async def stop_validation_pool() -> None:
+    try:
+        validation_pool.shutdown()
+    except Exception as exc:
+        logger.exception("Failed to stop validation worker pool cleanly: %s", exc)
+
+
+@app.on_event("shutdown")
+async def close_snapshot_store() -> None:
+    try:
+        snapshot_store.close()
+    except Exception as exc:
+        logger.exception("Failed to close snapshot store cleanly: %s", exc)
+
+
+@app.on_event("shutdown")
+async def close_rate_limiter() -> None:
+    try:
+        rate_limiter.close()
+    except Exception as exc:
+        logger.exception("Failed to close rate limiter cleanly: %s", exc)
+
+
 def get_client_key(request: Request) -> str:
     x_forwarded_for = request.headers.get("x-forwarded-for")
     if x_forwarded_for:
@@ -50,51 +195,446 @@ def get_client_key(request: Request) -> str:
 @app.middleware("http")
 async def apply_rate_limit(request: Request, call_next):
     if request.method == "POST" and request.url.path in RATE_LIMITED_PATHS:
-        now = time.time()
         client_key = get_client_key(request)
-        bucket = request_buckets[client_key]
+        if rate_limiter.remote:
+            retry_after = await run_in_threadpool(rate_limiter.check, client_key)
+        else:
+            retry_after = rate_limiter.check(client_key)
 
-        while bucket and now - bucket[0] > RATE_LIMIT_WINDOW_SECONDS:
-            bucket.popleft()
-
-        if len(bucket) >= RATE_LIMIT_MAX_REQUESTS:
+        if retry_after > 0:
+            RATE_LIMIT_REJECTIONS.inc(request.url.path)
             return JSONResponse(
                 status_code=429,
                 content={
                     "error": "rate_limit_exceeded",
                     "message": "Too many requests. Please retry shortly.",
                 },
-                headers={"Retry-After": str(RATE_LIMIT_WINDOW_SECONDS)},
+                headers={"Retry-After": str(math.ceil(retry_after))},
             )
 
-        bucket.append(now)
-
     return await call_next(request)
 
-@app.post("/api/validate")
-async def validate(file: UploadFile = File(...), procedural: bool = False):
-    content = await file.read()
-    if len(content) > MAX_UPLOAD_BYTES:
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route templates keep the label set bounded, unlike raw paths such as /api/snapshots/{id}.
+        route = getattr(request.scope.get("route"), "path", None)
+        if route is None:
+            route = request.url.path if request.url.path in RATE_LIMITED_PATHS else "unmatched"
+        REQUEST_SECONDS.observe(time.perf_counter() - started, request.method, route, str(status))
+
+
+async def run_validation_job(func, *args, **kwargs):
+    try:
+        return await validation_pool.run(func, *args, **kwargs)
+    except WorkerPoolSaturatedError:
+        WORKER_REJECTIONS.inc("saturated")
+        raise HTTPException(
+            status_code=503,
+            detail="Validation capacity exhausted. Please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+    except WorkerJobTimeoutError:
+        WORKER_REJECTIONS.inc("timeout")
+        raise HTTPException(status_code=504, detail="Validation timed out.")
+
+
+async def reload_procedural_rules() -> dict:
+    """Compile the rule sets on disk and switch validation to them without pausing it.
+
+    The new rule sets are compiled off the event loop while requests keep using the current ones.
+    In ``process`` mode fresh workers warm up on them before the swap. Raises
+    ``ProceduralReloadError`` and keeps the current rule sets if the new ones fail to load.
+    """
+    async with procedural_reload_lock:
+        previous_version = procedural_rules_fingerprint()
+        registry = await run_in_threadpool(load_procedural_registry)
+        if registry.unavailable_message is not None:
+            PROCEDURAL_RELOADS.inc("failed")
+            raise ProceduralReloadError(registry.unavailable_message)
+
+        changed = registry.version != previous_version
+        if changed:
+            if validation_pool.mode == "process":
+                await validation_pool.restart()
+            install_procedural_registry(registry)
+            logger.info("Installed procedural rule sets %s.", registry.version)
+        PROCEDURAL_RELOADS.inc("installed" if changed else "unchanged")
+        return {
+            "version": registry.version,
+            "previousVersion": previous_version,
+            "changed": changed,
+            "ruleSets": len(registry.executables),
+        }
+
+
+async def watch_procedural_rules(interval_seconds: float) -> None:
+    """Reload the rule sets whenever the compile manifest on disk describes a different version."""
+    failed_version: str | None = None
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            pending_version = await run_in_threadpool(pending_procedural_rules_version)
+            if pending_version in {procedural_rules_fingerprint(), failed_version}:
+                continue
+            try:
+                await reload_procedural_rules()
+            except ProceduralReloadError as exc:
+                # A broken rule set is reported once and retried only after it changes again.
+                failed_version = pending_version
+                logger.error("Keeping the current procedural rule sets: %s", exc)
+        except Exception as exc:
+            logger.exception("Failed to check procedural rule sets for changes: %s", exc)
+
+
+def require_admin_token(authorization: str | None) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(
+            status_code=401,
+            detail="Missing or invalid admin token.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def procedural_cache_part(procedural: bool, max_findings: int | None) -> str:
+    if not procedural:
+        return "procedural:off"
+    return f"procedural:{procedural_rules_fingerprint()}:max:{max_findings}"
+
+
+def error_mode_cache_part(mode: str) -> str:
+    try:
+        limit = structural_error_limit(mode)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return f"errors:{'all' if limit is None else limit}"
+
+
+async def read_upload(file: UploadFile, route: str, *, memory_limit: int | None = None) -> ReceivedUpload:
+    max_bytes = MAX_UPLOAD_BYTES_BY_ROUTE.get(route, MAX_UPLOAD_BYTES)
+    try:
+        upload = await receive_upload(
+            file,
+            max_bytes=max_bytes,
+            memory_limit=max_bytes if memory_limit is None else memory_limit,
+        )
+    except UploadTooLargeError:
         raise HTTPException(status_code=413, detail="Uploaded file is too large.")
-    result = validate_xml(content, procedural=procedural)
-    return result
+    UPLOAD_BYTES.observe(upload.size, route)
+    return upload
+
+
+@app.post("/api/validate")
+async def validate(
+    request: Request,
+    file: UploadFile = File(...),
+    procedural: bool = False,
+    stream: bool = False,
+    max_findings: int | None = Query(default=None, alias="maxFindings", ge=1),
+    mode: str = "all",
+):
+    max_findings = effective_max_findings(max_findings)
+    errors_part = error_mode_cache_part(mode)
+    upload = await read_upload(
+        file,
+        "/api/validate",
+        memory_limit=0 if stream else STREAMING_THRESHOLD_BYTES,
+    )
+    try:
+        cache_key = build_cache_key(
+            upload.digest,
+            schema_fingerprint(),
+            procedural_cache_part(procedural, max_findings),
+            "mode:stream" if upload.streamed else "mode:memory",
+            errors_part,
+        )
+        etag = etag_for_key(cache_key)
+        # Only a cached result is known to be cacheable; a transient failure must never be confirmed by a 304.
+        if if_none_match_matches(request.headers.get("if-none-match"), etag) and cache_key in validation_cache:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        if upload.streamed:
+            job = lambda: run_validation_job(
+                validate_xml_file,
+                str(upload.path),
+                procedural=procedural,
+                max_findings=max_findings,
+                mode=mode,
+            )
+        else:
+            job = lambda: run_validation_job(
+                validate_xml,
+                upload.content,
+                procedural=procedural,
+                max_findings=max_findings,
+                mode=mode,
+            )
+        body, cache_hit, cacheable = await validation_cache.get_or_compute(
+            cache_key,
+            job,
+            cacheable=is_cacheable_result,
+        )
+    finally:
+        upload.cleanup()
+    headers = {"X-Cache": "HIT" if cache_hit else "MISS"}
+    if cacheable:
+        headers["ETag"] = etag
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.post("/api/validate/batch")
+async def validate_batch(
+    files: list[UploadFile] = File(...),
+    procedural: bool = False,
+    max_findings: int | None = Query(default=None, alias="maxFindings", ge=1),
+    mode: str = "all",
+):
+    max_findings = effective_max_findings(max_findings)
+    errors_part = error_mode_cache_part(mode)
+    workspace = BatchWorkspace()
+    try:
+        entries = await collect_batch_entries(
+            files,
+            workspace,
+            max_file_bytes=MAX_UPLOAD_BYTES_BY_ROUTE["/api/validate"],
+        )
+    except BatchLimitError as exc:
+        workspace.cleanup()
+        raise HTTPException(status_code=413, detail=str(exc))
+    except BatchArchiveError as exc:
+        workspace.cleanup()
+        raise HTTPException(status_code=400, detail=str(exc))
+    except BaseException:
+        workspace.cleanup()
+        raise
+
+    procedural_part = procedural_cache_part(procedural, max_findings)
+
+    async def validate_entry(entry: BatchEntry) -> tuple[bytes, bool]:
+        # Observed per entry: zip members are only extracted while the response streams.
+        UPLOAD_BYTES.observe(entry.size, "/api/validate/batch")
+        streamed = entry.size > STREAMING_THRESHOLD_BYTES
+        cache_key = build_cache_key(
+            entry.digest,
+            schema_fingerprint(),
+            procedural_part,
+            "mode:stream" if streamed else "mode:memory",
+            errors_part,
+        )
+        computed: dict = {}
+
+        async def job() -> dict:
+            if entry.path is None:
+                result = await run_validation_job(
+                    validate_xml,
+                    b"",
+                    procedural=procedural,
+                    max_findings=max_findings,
+                    mode=mode,
+                )
+            else:
+                result = await run_validation_job(
+                    validate_xml_path,
+                    str(entry.path),
+                    procedural=procedural,
+                    max_findings=max_findings,
+                    mode=mode,
+                    stream_above_bytes=STREAMING_THRESHOLD_BYTES,
+                )
+            computed["xsdValid"] = result["xsdValid"]
+            return result
+
+        body, _, _ = await validation_cache.get_or_compute(cache_key, job, cacheable=is_cacheable_result)
+        if "xsdValid" in computed:
+            return body, computed["xsdValid"]
+        # Cached or computed by a concurrent request: only the encoded result is at hand.
+        return body, encoded_result_xsd_valid(body)
+
+    return StreamingResponse(
+        stream_batch_results(
+            entries,
+            validate_entry,
+            concurrency=validation_pool.workers,
+            workspace=workspace,
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
+def compare_source(upload: ReceivedUpload) -> bytes | str:
+    return str(upload.path) if upload.streamed else upload.content
+
+
+async def load_snapshot(snapshot_id: str) -> SnapshotRecord:
+    record = await asyncio.to_thread(snapshot_store.get, snapshot_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found.")
+    version = snapshot_version()
+    if record.version != version:
+        # The schema, identity keys or index format changed since the snapshot was stored; rebuild it.
+        snapshot = await run_validation_job(prepare_snapshot, record.xml_bytes)
+        record = await asyncio.to_thread(snapshot_store.put, snapshot_id, record.xml_bytes, snapshot, version)
+    return record
+
+
+@app.post("/api/snapshots")
+async def create_snapshot(file: UploadFile = File(...)):
+    upload = await read_upload(file, "/api/snapshots", memory_limit=STREAMING_THRESHOLD_BYTES)
+    try:
+        if upload.streamed:
+            snapshot = await run_validation_job(prepare_snapshot_file, str(upload.path))
+            xml_bytes = await asyncio.to_thread(upload.path.read_bytes)
+        else:
+            snapshot = await run_validation_job(prepare_snapshot, upload.content)
+            xml_bytes = upload.content
+    finally:
+        upload.cleanup()
+    try:
+        record = await asyncio.to_thread(
+            snapshot_store.put,
+            upload.digest.hex(),
+            xml_bytes,
+            snapshot,
+            snapshot_version(),
+        )
+    except SnapshotTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    return record.metadata()
+
+
+@app.get("/api/snapshots/{snapshot_id}")
+async def get_snapshot(snapshot_id: str):
+    record = await load_snapshot(snapshot_id)
+    return record.metadata()
 
 
 @app.post("/api/compare")
-async def compare(xml1: UploadFile = File(...), xml2: UploadFile = File(...)):
-    xml1_content = await xml1.read()
-    xml2_content = await xml2.read()
-    if len(xml1_content) > MAX_UPLOAD_BYTES or len(xml2_content) > MAX_UPLOAD_BYTES:
-        raise HTTPException(status_code=413, detail="Uploaded file is too large.")
-    result = compare_xml(xml1_content, xml2_content)
-    return result
+async def compare(
+    xml2: UploadFile = File(...),
+    xml1: UploadFile | None = File(default=None),
+    base: str | None = None,
+    details: bool = False,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+):
+    if (xml1 is None) == (base is None):
+        raise HTTPException(status_code=422, detail="Provide either the xml1 file or a base snapshot id.")
+
+    # Uploads above the streaming threshold are indexed from disk without building their tree.
+    uploads = [await read_upload(xml2, "/api/compare", memory_limit=STREAMING_THRESHOLD_BYTES)]
+    change_window = (offset, limit) if details else None
+    try:
+        if base is not None:
+            # Only the new document is parsed; the baseline comes pre-indexed from the snapshot store, so
+            # parsing and diffing share one job and only the result is sent back.
+            return await run_validation_job(
+                compare_sources,
+                (await load_snapshot(base)).comparison_document(),
+                compare_source(uploads[0]),
+                change_window,
+            )
+
+        uploads.append(await read_upload(xml1, "/api/compare", memory_limit=STREAMING_THRESHOLD_BYTES))
+        # Both documents are parsed, validated and indexed concurrently on two workers. Their indexes come
+        # back in the compact encoding and are diffed in a third job, bounded by the pool like the others.
+        prepared = await asyncio.gather(
+            run_validation_job(prepare_comparison_payload, compare_source(uploads[1])),
+            run_validation_job(prepare_comparison_payload, compare_source(uploads[0])),
+            return_exceptions=True,
+        )
+        for outcome in prepared:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        return await run_validation_job(compare_payloads, *prepared, change_window)
+    finally:
+        for upload in uploads:
+            upload.cleanup()
+
+
+def precomputed_json_response(request: Request, encoded: EncodedJson) -> Response:
+    use_gzip = accepts_encoding(request.headers.get("accept-encoding"), "gzip")
+    etag = encoded.gzip_etag if use_gzip else encoded.etag
+    # no-cache lets clients keep the body but revalidate it, which costs a 304 on every page view.
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if if_none_match_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+    return Response(
+        content=encoded.gzip_body if use_gzip else encoded.body,
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+@app.post("/admin/procedural-rules/reload", include_in_schema=False)
+async def reload_procedural_rules_endpoint(authorization: str | None = Header(default=None)):
+    require_admin_token(authorization)
+    try:
+        return await reload_procedural_rules()
+    except ProceduralReloadError as exc:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{exc} The current procedural rule sets stay active.",
+        )
 
 
 @app.get("/api/schema/summary")
-async def schema_summary():
-    return get_schema_summary()
+async def schema_summary(request: Request):
+    return precomputed_json_response(request, SCHEMA_SUMMARY_RESPONSE)
 
 
 @app.get("/api/schema/tree")
-async def schema_tree():
-    return get_schema_tree()
\ No newline at end of file
+async def schema_tree(request: Request):
+    return precomputed_json_response(request, SCHEMA_TREE_RESPONSE)
+
+
+@app.get("/api/schema/node")
+async def schema_node(
+    request: Request,
+    path: str = "",
+    depth: int = Query(default=1, ge=0, le=20),
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+):
+    encoded = cached_schema_node_response(path, depth, offset, limit)
+    if encoded is None:
+        encoded = await run_in_threadpool(get_schema_node_response, path, depth, offset, limit)
+    if encoded is None:
+        raise HTTPException(status_code=404, detail="Schema node not found.")
+    return precomputed_json_response(request, encoded)
+
+
+@app.get("/api/schema/search")
+async def schema_search(
+    request: Request,
+    q: str = Query(min_length=1, max_length=200),
+    kind: list[str] = Query(default=[]),
+    limit: int = Query(default=50, ge=1, le=500),
+):
+    unknown_kinds = set(kind) - SEARCH_KINDS
+    if unknown_kinds:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unsupported kind(s) {sorted(unknown_kinds)}. Expected any of {sorted(SEARCH_KINDS)}.",
+        )
+    kinds = frozenset(kind)
+    encoded = cached_schema_search_response(q, kinds, limit)
+    if encoded is None:
+        encoded = await run_in_threadpool(get_schema_search_response, q, kinds, limit)
+    return precomputed_json_response(request, encoded)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=METRICS.render(), media_type=METRICS_CONTENT_TYPE)
\ No newline at end of file
@@ -0,0 +1,214 @@
+import math
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = tuple(float(1024 * 4**power) for power in range(11))
+
+_pending_lock = Lock()
+_pending: list[tuple[str, tuple[str, ...], float]] | None = None
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination, in the Prometheus text format."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        # In worker processes observations are queued and shipped back to the API process with each job.
+        if _pending is not None:
+            with _pending_lock:
+                _pending.append((self.name, label_values, value))
+            return
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *label_values: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def samples(self) -> list[str]:
+        lines = []
+        with self._lock:
+            series = sorted((labels, [list(data[0]), data[1], data[2]]) for labels, data in self._series.items())
+        for label_values, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.label_names, label_values, le)} {cumulative}")
+            labels = _label_text(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_label_text(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in values
+        ]
+
+
+class CallbackMetric:
+    """Gauge or counter whose value is read from the owning object at scrape time."""
+
+    def __init__(self, name: str, help_text: str, kind: str, callback: Callable[[], float]):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.callback = callback
+
+    def samples(self) -> list[str]:
+        return [f"{self.name} {_format_value(self.callback())}"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Histogram | Counter | CallbackMetric] = {}
+        self._lock = Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def histogram(self, name: str, help_text: str, label_names: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help_text, label_names, buckets))
+
+    def counter(self, name: str, help_text: str, label_names: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, label_names))
+
+    def callback(self, name: str, help_text: str, callback: Callable[[], float], kind: str = "gauge"):
+        return self._register(CallbackMetric(name, help_text, kind, callback))
+
+    def record(self, observations: list[tuple[str, tuple[str, ...], float]]) -> None:
+        """Apply histogram observations made in a worker process."""
+        for name, label_values, value in observations:
+            metric = self._metrics.get(name)
+            if isinstance(metric, Histogram):
+                metric.observe(value, *label_values)
+
+    def render(self) -> bytes:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def buffer_observations() -> None:
+    """Queue histogram observations in this process until ``take_observations`` collects them."""
+    global _pending
+    with _pending_lock:
+        if _pending is None:
+            _pending = []
+
+
+def take_observations() -> list[tuple[str, tuple[str, ...], float]]:
+    global _pending
+    with _pending_lock:
+        if not _pending:
+            return []
+        observations, _pending = _pending, []
+        return observations
+
+
+METRICS = MetricsRegistry()
+STAGE_SECONDS = METRICS.histogram(
+    "ech0278_stage_duration_seconds",
+    "Time spent per processing stage of one document.",
+    ("stage",),
+)
+STYLESHEET_SECONDS = METRICS.histogram(
+    "ech0278_stylesheet_duration_seconds",
+    "Time spent running one compiled Schematron stylesheet on one document.",
+    ("stylesheet",),
+)
+REQUEST_SECONDS = METRICS.histogram(
+    "ech0278_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+UPLOAD_BYTES = METRICS.histogram(
+    "ech0278_upload_size_bytes",
+    "Size of each uploaded document.",
+    ("route",),
+    buckets=SIZE_BUCKETS,
+)
+RATE_LIMIT_REJECTIONS = METRICS.counter(
+    "ech0278_rate_limit_rejections_total",
+    "Requests rejected by the rate limiter.",
+    ("route",),
+)
+PROCEDURAL_RELOADS = METRICS.counter(
+    "ech0278_procedural_reloads_total",
+    "Procedural rule set reloads by result: installed, unchanged or failed.",
+    ("result",),
+)
+WORKER_REJECTIONS = METRICS.counter(
+    "ech0278_worker_rejections_total",
+    "Validation jobs rejected because the worker queue was full or the job timed out.",
+    ("reason",),
+)
\ No newline at end of file
@@ -0,0 +1,248 @@
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+
+
+RATE_LIMIT_BACKENDS = {"memory", "shared", "redis"}
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory").strip().lower()
+RATE_LIMIT_MAX_REQUESTS = max(1, int(os.environ.get("RATE_LIMIT_MAX_REQUESTS", "20")))
+RATE_LIMIT_WINDOW_SECONDS = max(1, int(os.environ.get("RATE_LIMIT_WINDOW_SECONDS", "60")))
+RATE_LIMIT_MAX_KEYS = max(1, int(os.environ.get("RATE_LIMIT_MAX_KEYS", "100000")))
+RATE_LIMIT_SHARED_PATH = os.environ.get("RATE_LIMIT_SHARED_PATH", "").strip() or str(
+    Path("/dev/shm" if Path("/dev/shm").is_dir() else tempfile.gettempdir()) / "ech-0278-rate-limit"
+)
+RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL", "").strip() or "redis://localhost:6379/0"
+REDIS_KEY_PREFIX = "ech-0278:rate:"
+SHARED_PROBE_LIMIT = 8
+_SHARED_SLOT = struct.Struct("<Qd")
+_SHARED_HEADER = struct.Struct("<8sQ")
+_SHARED_MAGIC = b"ECHRATE1"
+
+
+class RateLimitPolicy:
+    """GCRA parameters for ``max_requests`` per ``window_seconds``, all of which may arrive as one burst.
+
+    Each admitted request moves the key's theoretical arrival time (TAT) one emission interval into the
+    future. A request is rejected while the TAT is more than ``tolerance`` ahead of now.
+    """
+
+    __slots__ = ("emission_interval", "tolerance")
+
+    def __init__(self, max_requests: int, window_seconds: float):
+        self.emission_interval = window_seconds / max_requests
+        self.tolerance = window_seconds - self.emission_interval
+
+    def admit(self, tat: float | None, now: float) -> tuple[float | None, float]:
+        """New TAT and ``0`` for an admitted request, or ``None`` and the seconds until one would be."""
+        if tat is None or tat < now:
+            tat = now
+        allowed_at = tat - self.tolerance
+        if now < allowed_at:
+            return None, allowed_at - now
+        return tat + self.emission_interval, 0.0
+
+
+class MemoryRateLimitStore:
+    """TAT per key in one process, least recently admitted first.
+
+    Keys whose TAT has passed carry no state beyond a new key and are dropped from the front on every
+    call. Above ``max_keys`` the least recently admitted key is dropped even if it is still limited.
+    """
+
+    remote = False
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._tats: OrderedDict[str, float] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    def acquire(self, key: str, now: float, policy: RateLimitPolicy) -> float:
+        with self._lock:
+            while self._tats:
+                oldest_key, oldest_tat = next(iter(self._tats.items()))
+                if oldest_tat > now:
+                    break
+                del self._tats[oldest_key]
+
+            tat, retry_after = policy.admit(self._tats.get(key), now)
+            if tat is not None:
+                self._tats[key] = tat
+                self._tats.move_to_end(key)
+                if len(self._tats) > self.max_keys:
+                    self._tats.popitem(last=False)
+            return retry_after
+
+    def close(self) -> None:
+        self._tats.clear()
+
+
+class SharedMemoryRateLimitStore:
+    """Fixed-size hash table in a memory-mapped file, shared by all worker processes on a host.
+
+    A slot holds a 64-bit key hash and its TAT. A key lives in one of ``SHARED_PROBE_LIMIT`` consecutive
+    slots; an idle slot (TAT in the past) is free, and when every probed slot is busy the one closest to
+    idle is taken over. Access is serialized with ``flock`` across processes and a lock across threads.
+
+    The file header records the slot count. The process that creates the table sizes it from ``max_keys``;
+    every other process uses the recorded count, so a key maps to the same slot everywhere.
+    """
+
+    remote = False
+
+    def __init__(self, path: str = RATE_LIMIT_SHARED_PATH, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        import fcntl
+
+        self._fcntl = fcntl
+        self.path = path
+        self._lock = Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            self.slots = self._open_table(max_keys)
+        except BaseException:
+            # Closing the descriptor also releases the lock.
+            os.close(self._fd)
+            raise
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, _SHARED_HEADER.size + self.slots * _SHARED_SLOT.size)
+
+    def _open_table(self, max_keys: int) -> int:
+        header = os.pread(self._fd, _SHARED_HEADER.size, 0)
+        if len(header) < _SHARED_HEADER.size or header == bytes(_SHARED_HEADER.size):
+            # New table, or one whose creator stopped before writing the header.
+            os.ftruncate(self._fd, _SHARED_HEADER.size + max_keys * _SHARED_SLOT.size)
+            os.pwrite(self._fd, _SHARED_HEADER.pack(_SHARED_MAGIC, max_keys), 0)
+            return max_keys
+
+        magic, slots = _SHARED_HEADER.unpack(header)
+        if magic != _SHARED_MAGIC or slots < 1:
+            raise ValueError(f"'{self.path}' is not a rate limit table.")
+        if os.fstat(self._fd).st_size != _SHARED_HEADER.size + slots * _SHARED_SLOT.size:
+            raise ValueError(f"Rate limit table '{self.path}' does not match the {slots} slots in its header.")
+        return slots
+
+    def acquire(self, key: str, now: float, policy: RateLimitPolicy) -> float:
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") | 1
+        start = key_hash % self.slots
+        with self._lock:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+            try:
+                slot, current = None, None
+                oldest_slot, oldest_tat = start, math.inf
+                for probe in range(min(SHARED_PROBE_LIMIT, self.slots)):
+                    index = (start + probe) % self.slots
+                    stored_hash, tat = _SHARED_SLOT.unpack_from(self._map, self._offset(index))
+                    if stored_hash == key_hash:
+                        slot, current = index, tat
+                        break
+                    if tat < oldest_tat:
+                        oldest_slot, oldest_tat = index, tat
+                if slot is None:
+                    slot = oldest_slot
+
+                tat, retry_after = policy.admit(current, now)
+                if tat is not None:
+                    _SHARED_SLOT.pack_into(self._map, self._offset(slot), key_hash, tat)
+                return retry_after
+            finally:
+                self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+
+    @staticmethod
+    def _offset(slot: int) -> int:
+        return _SHARED_HEADER.size + slot * _SHARED_SLOT.size
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._map.closed:
+                self._map.close()
+                os.close(self._fd)
+
+
+_REDIS_GCRA_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+  tat = now
+end
+if now < tat - tolerance then
+  return tostring(tat - tolerance - now)
+end
+tat = tat + interval
+redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil((tat - now) * 1000))
+return '0'
+"""
+
+
+class RedisRateLimitStore:
+    """GCRA in a Redis script, shared by all replicas.
+
+    The server clock is used, so replica clock skew does not matter. Keys expire once idle; the number of
+    tracked keys is bounded by the server's ``maxmemory`` policy.
+    """
+
+    remote = True
+
+    def __init__(self, client, key_prefix: str = REDIS_KEY_PREFIX):
+        self.client = client
+        self.key_prefix = key_prefix
+        self._script = client.register_script(_REDIS_GCRA_SCRIPT)
+
+    def acquire(self, key: str, now: float, policy: RateLimitPolicy) -> float:
+        return float(self._script(keys=[self.key_prefix + key], args=[policy.emission_interval, policy.tolerance]))
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class RateLimiter:
+    __slots__ = ("store", "policy")
+
+    def __init__(
+        self,
+        store,
+        *,
+        max_requests: int = RATE_LIMIT_MAX_REQUESTS,
+        window_seconds: float = RATE_LIMIT_WINDOW_SECONDS,
+    ):
+        self.store = store
+        self.policy = RateLimitPolicy(max_requests, window_seconds)
+
+    @property
+    def remote(self) -> bool:
+        """Whether ``check`` does network I/O and should run off the event loop."""
+        return self.store.remote
+
+    def check(self, key: str, now: float | None = None) -> float:
+        """Count a request for ``key``; ``0`` if it is admitted, otherwise the seconds until one would be."""
+        return self.store.acquire(key, time.time() if now is None else now, self.policy)
+
+    def close(self) -> None:
+        self.store.close()
+
+
+def create_rate_limiter(backend: str = RATE_LIMIT_BACKEND) -> RateLimiter:
+    if backend == "memory":
+        return RateLimiter(MemoryRateLimitStore())
+    if backend == "shared":
+        return RateLimiter(SharedMemoryRateLimitStore())
+    if backend == "redis":
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package.") from exc
+        return RateLimiter(RedisRateLimitStore(redis.Redis.from_url(RATE_LIMIT_REDIS_URL)))
+    raise ValueError(f"Unsupported rate limit backend '{backend}'. Expected one of {sorted(RATE_LIMIT_BACKENDS)}.")
\ No newline at end of file
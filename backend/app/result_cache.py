@@ -0,0 +1,261 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Awaitable, Callable
+
+
+CACHE_MAX_BYTES = int(os.environ.get("VALIDATION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_DIR = os.environ.get("VALIDATION_CACHE_DIR", "").strip() or None
+CACHE_DISK_MAX_BYTES = int(os.environ.get("VALIDATION_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+
+logger = logging.getLogger(__name__)
+
+
+def encode_result(result: dict) -> bytes:
+    return json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def build_cache_key(payload_digest: bytes, *parts: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(payload_digest)
+    for part in parts:
+        digest.update(b"\0")
+        digest.update(part.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def etag_for_key(key: str) -> str:
+    return f'"{key}"'
+
+
+def if_none_match_matches(header_value: str | None, etag: str) -> bool:
+    if not header_value:
+        return False
+    for candidate in header_value.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def accepts_encoding(header_value: str | None, encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows ``encoding`` with a non-zero quality."""
+    if not header_value:
+        return False
+    wildcard = False
+    for item in header_value.split(","):
+        coding, _, parameters = item.partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        for parameter in parameters.split(";"):
+            name, _, value = parameter.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding == encoding:
+            return quality > 0
+        if coding == "*":
+            wildcard = quality > 0
+    return wildcard
+
+
+class ValidationResultCache:
+    """LRU cache of encoded validation results with a byte budget and single-flight computation."""
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = CACHE_MAX_BYTES,
+        persist_dir: Path | None = Path(CACHE_DIR) if CACHE_DIR else None,
+        disk_max_bytes: int = CACHE_DISK_MAX_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.persist_dir = persist_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+        self._pending: dict[str, asyncio.Future] = {}
+        self._disk_size: int | None = None
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        """Whether ``key`` is cached, in memory or on disk, without reading its value."""
+        with self._lock:
+            if key in self._entries:
+                return True
+        path = self._disk_path(key)
+        return path is not None and path.is_file()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+
+        value = self._read_from_disk(key)
+        if value is not None:
+            self._store_in_memory(key, value)
+        return value
+
+    def put(self, key: str, value: bytes) -> None:
+        if not self.enabled:
+            return
+        self._store_in_memory(key, value)
+        self._write_to_disk(key, value)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[dict]],
+        cacheable: Callable[[dict], bool] | None = None,
+    ) -> tuple[bytes, bool, bool]:
+        """Encoded result, whether it was shared (cached or computed concurrently) and whether it is cacheable.
+
+        Results ``cacheable`` rejects are returned but not stored. Requests waiting on a computation whose
+        own request was cancelled compute it again instead of failing with it.
+        """
+        if not self.enabled:
+            result = await compute()
+            return encode_result(result), False, cacheable is None or cacheable(result)
+
+        while True:
+            cached = self.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached, True, True
+
+            pending = self._pending.get(key)
+            if pending is None:
+                break
+            try:
+                value, value_cacheable = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if pending.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+            self.hits += 1
+            return value, True, value_cacheable
+
+        self.misses += 1
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            result = await compute()
+            value = encode_result(result)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Followers re-raise the same exception; mark it retrieved so an unobserved failure is not logged.
+            future.exception()
+            raise
+        else:
+            value_cacheable = cacheable is None or cacheable(result)
+            if value_cacheable:
+                self.put(key, value)
+            future.set_result((value, value_cacheable))
+            return value, False, value_cacheable
+        finally:
+            self._pending.pop(key, None)
+
+    def _store_in_memory(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _disk_path(self, key: str) -> Path | None:
+        if self.persist_dir is None:
+            return None
+        return self.persist_dir / key[:2] / f"{key}.json"
+
+    def _read_from_disk(self, key: str) -> bytes | None:
+        path = self._disk_path(key)
+        if path is None:
+            return None
+        try:
+            value = path.read_bytes()
+            os.utime(path)
+            return value
+        except OSError:
+            return None
+
+    def _write_to_disk(self, key: str, value: bytes) -> None:
+        path = self._disk_path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_suffix(".tmp")
+            temp_path.write_bytes(value)
+            temp_path.replace(path)
+            self._account_disk_write(len(value))
+        except OSError as exc:
+            logger.warning("Failed to persist validation result %s: %s", key, exc)
+
+    def _scan_disk(self) -> list[tuple[float, int, Path]]:
+        files = []
+        for path in self.persist_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _account_disk_write(self, written: int) -> None:
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = sum(size for _, size, _ in self._scan_disk())
+            else:
+                self._disk_size += written
+            if self._disk_size <= self.disk_max_bytes:
+                return
+
+            # Least recently used files go first; hits refresh the mtime in _read_from_disk.
+            files = self._scan_disk()
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.disk_max_bytes:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+            self._disk_size = total
\ No newline at end of file
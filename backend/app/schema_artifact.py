@@ -0,0 +1,89 @@
+import json
+import logging
+import pickle
+import sys
+from pathlib import Path
+
+import xmlschema
+
+
+ARTIFACT_FILE = "schema.pickle"
+CATALOG_FILE = "schema_catalog.json"
+
+logger = logging.getLogger(__name__)
+
+
+def _runtime_versions() -> dict:
+    return {
+        "xmlschemaVersion": xmlschema.__version__,
+        "pythonVersion": f"{sys.version_info.major}.{sys.version_info.minor}",
+    }
+
+
+def write_schema_artifact(
+    schema: xmlschema.XMLSchema,
+    *,
+    output_dir: Path,
+    schema_fingerprint: str,
+    namespace_locations: list[tuple[str, str]],
+    base_dir: Path,
+) -> Path:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    artifact_path = output_dir / ARTIFACT_FILE
+    artifact_path.write_bytes(pickle.dumps(schema, protocol=pickle.HIGHEST_PROTOCOL))
+
+    catalog = {
+        "schemaFingerprint": schema_fingerprint,
+        **_runtime_versions(),
+        "artifact": ARTIFACT_FILE,
+        "namespaces": {
+            namespace: Path(location).resolve().relative_to(base_dir.resolve()).as_posix()
+            for namespace, location in namespace_locations
+        },
+    }
+    catalog_path = output_dir / CATALOG_FILE
+    catalog_path.write_text(json.dumps(catalog, indent=2, sort_keys=True), encoding="utf-8")
+    return catalog_path
+
+
+def load_schema_catalog(artifact_dir: Path, *, schema_fingerprint: str) -> dict | None:
+    catalog_path = artifact_dir / CATALOG_FILE
+    if not catalog_path.exists():
+        return None
+
+    try:
+        catalog = json.loads(catalog_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring unreadable schema catalog %s: %s", catalog_path, exc)
+        return None
+
+    if catalog.get("schemaFingerprint") != schema_fingerprint:
+        logger.info("Schema artifact in %s is stale. Falling back to a live schema build.", artifact_dir)
+        return None
+    return catalog
+
+
+def namespace_locations_from_catalog(catalog: dict, *, base_dir: Path) -> list[tuple[str, str]]:
+    return [
+        (namespace, str(base_dir / relative_path))
+        for namespace, relative_path in catalog.get("namespaces", {}).items()
+    ]
+
+
+def load_schema_artifact(catalog: dict, artifact_dir: Path) -> xmlschema.XMLSchema | None:
+    versions = _runtime_versions()
+    if any(catalog.get(key) != value for key, value in versions.items()):
+        logger.info("Schema artifact was built with different library versions. Falling back to a live build.")
+        return None
+
+    artifact_path = artifact_dir / catalog.get("artifact", ARTIFACT_FILE)
+    try:
+        schema = pickle.loads(artifact_path.read_bytes())
+    except Exception as exc:
+        logger.warning("Failed to load schema artifact %s: %s", artifact_path, exc)
+        return None
+
+    if not isinstance(schema, xmlschema.XMLSchemaBase):
+        logger.warning("Schema artifact %s does not contain an XML schema.", artifact_path)
+        return None
+    return schema
\ No newline at end of file
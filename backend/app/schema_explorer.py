@@ -1,12 +1,21 @@
-from pathlib import Path
+import gzip
+import hashlib
+import json
+import os
+from bisect import bisect_left
+from collections import OrderedDict
+from threading import Lock
 from xml.etree import ElementTree as ET
 
+from app.schema_registry import REGISTRY, SCHEMA_FILE, XS_NS, SchemaDocument, SchemaRegistry
+
 
-SCHEMA_FILE = "eCH-0278-1-0.xsd"
-SCHEMA_PATH = Path(__file__).resolve().parents[1] / "schema" / SCHEMA_FILE
-XS_NS = "http://www.w3.org/2001/XMLSchema"
 NS = {"xs": XS_NS}
 HIGHLIGHT_GROUPS = {"taxProcedureGroup", "taxFactorGroup", "taxCompetenceGroup"}
+SEARCH_KINDS = {"element", "complexType", "simpleType", "attributeGroup", "attribute", "enumeration"}
+FUZZY_MIN_QUERY_LENGTH = 3
+SCHEMA_NODE_CACHE_MAX_BYTES = int(os.environ.get("SCHEMA_NODE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+SCHEMA_SEARCH_CACHE_MAX_BYTES = int(os.environ.get("SCHEMA_SEARCH_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
 
 
 def _local_name(value: str | None) -> str | None:
@@ -30,38 +39,141 @@ def _parse_occurs(element: ET.Element) -> dict:
     return {"min": min_occurs, "max": max_occurs}
 
 
+class EncodedJson:
+    """A JSON payload serialized and gzip-compressed once, with a strong ETag per encoding."""
+
+    __slots__ = ("body", "gzip_body", "etag", "gzip_etag")
+
+    def __init__(self, payload: dict):
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(self.body).hexdigest()
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.body) + len(self.gzip_body)
+
+
+class EncodedJsonCache:
+    """LRU cache of encoded responses, bounded by the size of their bodies rather than their count."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, EncodedJson] = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def get(self, key: tuple) -> EncodedJson | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: tuple, value: EncodedJson) -> None:
+        if value.size_bytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous.size_bytes
+            self._entries[key] = value
+            self._size += value.size_bytes
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size_bytes
+
+
+def _deletions(term: str) -> set[str]:
+    return {term[:index] + term[index + 1:] for index in range(len(term))}
+
+
+def _within_one_edit(left: str, right: str) -> bool:
+    """Damerau-Levenshtein distance of at most one: one insertion, deletion, substitution or swap."""
+    if len(left) > len(right):
+        left, right = right, left
+    if len(right) - len(left) > 1:
+        return False
+    index = 0
+    while index < len(left) and left[index] == right[index]:
+        index += 1
+    if len(left) != len(right):
+        return left[index:] == right[index + 1:]
+    return left[index + 1:] == right[index + 1:] or (
+        left[index:index + 2] == right[index:index + 2][::-1] and left[index + 2:] == right[index + 2:]
+    )
+
+
+class SchemaSearchIndex:
+    """Inverted index from lower-cased schema names and enumeration values to the places they occur.
+
+    Terms are kept sorted for prefix lookups with bisect. Each term is also filed under its
+    single-character deletions, so terms within one edit of a query are found without a scan.
+    """
+
+    def __init__(self, hits: list[dict]):
+        self._hits_by_term: dict[str, list[dict]] = {}
+        for hit in hits:
+            self._hits_by_term.setdefault(hit["name"].lower(), []).append(hit)
+        self._terms = sorted(self._hits_by_term)
+        self._terms_by_deletion: dict[str, list[str]] = {}
+        for term in self._terms:
+            for deletion in _deletions(term) | {term}:
+                self._terms_by_deletion.setdefault(deletion, []).append(term)
+
+    def search(self, query: str, *, kinds: set[str] | None = None, limit: int = 50) -> dict:
+        """Exact matches first, then prefix matches, then (for longer queries) matches within one edit."""
+        term = query.strip().lower()
+        matched: dict[str, str] = {}
+        if term in self._hits_by_term:
+            matched[term] = "exact"
+
+        position = bisect_left(self._terms, term)
+        while position < len(self._terms) and self._terms[position].startswith(term):
+            matched.setdefault(self._terms[position], "prefix")
+            position += 1
+
+        if len(term) >= FUZZY_MIN_QUERY_LENGTH:
+            candidates = set()
+            for deletion in _deletions(term) | {term}:
+                candidates.update(self._terms_by_deletion.get(deletion, ()))
+            for candidate in sorted(candidates):
+                if candidate not in matched and _within_one_edit(term, candidate):
+                    matched[candidate] = "fuzzy"
+
+        results: list[dict] = []
+        total = 0
+        for matched_term, match in matched.items():
+            for hit in self._hits_by_term[matched_term]:
+                if kinds and hit["kind"] not in kinds:
+                    continue
+                total += 1
+                if len(results) < limit:
+                    results.append({"match": match, **hit})
+        return {"query": query, "total": total, "results": results}
+
+
 class SchemaExplorer:
-    def __init__(self, schema_path: Path):
-        self.schema_path = schema_path
-        try:
-            self.tree = ET.parse(schema_path)
-            self.root = self.tree.getroot()
-        except Exception as exc:
-            raise RuntimeError(f"Failed to parse schema at {schema_path}: {exc}") from exc
-
-        self.target_namespace = self.root.attrib.get("targetNamespace", "")
+    """Tree views of the eCH-0278 schema; types from imported vendor namespaces are expanded in place."""
+
+    def __init__(self, registry: SchemaRegistry):
+        self.registry = registry
+        self.document = registry.main
+        self.root = self.document.root
+        self.target_namespace = self.document.target_namespace
         self.schema_version = self.root.attrib.get("version", "")
 
-        self.elements = {
-            element.attrib["name"]: element
-            for element in self.root.findall("xs:element", NS)
-            if "name" in element.attrib
-        }
-        self.complex_types = {
-            item.attrib["name"]: item
-            for item in self.root.findall("xs:complexType", NS)
-            if "name" in item.attrib
-        }
-        self.simple_types = {
-            item.attrib["name"]: item
-            for item in self.root.findall("xs:simpleType", NS)
-            if "name" in item.attrib
-        }
-        self.attribute_groups = {
-            item.attrib["name"]: item
-            for item in self.root.findall("xs:attributeGroup", NS)
-            if "name" in item.attrib
-        }
+        self.elements = self.document.components["element"]
+        self.complex_types = self.document.components["complexType"]
+        self.simple_types = self.document.components["simpleType"]
+        self.attribute_groups = self.document.components["attributeGroup"]
+        self._node_index: dict[str, tuple[ET.Element, SchemaDocument, set[str]]] | None = None
 
     def get_summary(self) -> dict:
         root_elements = list(self.elements.keys())
@@ -79,9 +191,58 @@ class SchemaExplorer:
         if root_name is None:
             raise RuntimeError("Schema has no top-level root element.")
         root_element = self.elements[root_name]
-        node = self._build_element_node(root_element, visited_types=set())
+        node = self._build_element_node(root_element, self.document, visited_types=set())
         return {"root": node}
 
+    def build_search_index(self, root: dict) -> SchemaSearchIndex:
+        """Index names, attribute-group members and enumeration values of a tree from ``get_tree``."""
+        hits: dict[tuple[str, str, str | None], dict] = {}
+        complex_type_names = set(self.complex_types)
+        simple_type_names = set(self.simple_types)
+        for document in self.registry.documents:
+            complex_type_names.update(document.components["complexType"])
+            simple_type_names.update(document.components["simpleType"])
+
+        def add(kind: str, name: str, path: str | None, group: str | None = None) -> None:
+            hit = hits.get((kind, name, group))
+            if hit is None:
+                hit = hits[(kind, name, group)] = {"kind": kind, "name": name, "paths": {}}
+                if kind == "attribute":
+                    hit["group"] = group
+            if path is not None:
+                hit["paths"][path] = None
+
+        for kind, names in (
+            ("complexType", self.complex_types),
+            ("simpleType", self.simple_types),
+            ("attributeGroup", self.attribute_groups),
+        ):
+            for name in names:
+                add(kind, name, None)
+
+        pending = [(root, root["name"])]
+        while pending:
+            node, path = pending.pop()
+            add("element", node["name"], path)
+            if node["type"] in complex_type_names:
+                add("complexType", node["type"], path)
+            elif node["type"] in simple_type_names:
+                add("simpleType", node["type"], path)
+            for value in node["enumeration"] or []:
+                add("enumeration", value, path)
+            for attribute in node["attributes"]:
+                attribute_path = f"{path}/@{attribute['name']}"
+                add("attribute", attribute["name"], attribute_path, attribute["source"])
+                if attribute["source"]:
+                    add("attributeGroup", attribute["source"], path)
+                for value in attribute["enum"]:
+                    add("enumeration", value, attribute_path)
+            pending.extend((child, f"{path}/{child['name']}") for child in reversed(node["children"]))
+
+        for hit in hits.values():
+            hit["paths"] = list(hit["paths"])
+        return SchemaSearchIndex(list(hits.values()))
+
     def _find_root_element_name(self) -> str | None:
         if "naturalPersonTaxData" in self.elements:
             return "naturalPersonTaxData"
@@ -89,7 +250,96 @@ class SchemaExplorer:
             return name
         return None
 
-    def _build_element_node(self, element: ET.Element, visited_types: set[str]) -> dict:
+    def get_node(
+        self,
+        path: str,
+        depth: int = 1,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> dict | None:
+        """Return the element at a slash-separated path of element names, expanded ``depth`` levels.
+
+        Nodes carry their ``path`` and ``childCount``, so unexpanded children can be fetched later.
+        ``offset`` and ``limit`` page through the children of the requested node only.
+        """
+        segments = [segment for segment in path.strip("/").split("/") if segment]
+        if not segments:
+            root_name = self._find_root_element_name()
+            if root_name is None:
+                return None
+            segments = [root_name]
+
+        entry = self.node_index().get("/".join(segments))
+        if entry is None:
+            return None
+        element, document, visited_types = entry
+        return self._build_element_node(
+            element,
+            document,
+            visited_types,
+            path="/".join(segments),
+            depth=depth,
+            children_window=(offset, limit),
+        )
+
+    def node_index(self) -> dict[str, tuple[ET.Element, SchemaDocument, set[str]]]:
+        """Element declaration, declaring document and visited types for every element path, by path.
+
+        Built on first use by expanding every top-level element the way ``get_tree`` does, so recursive
+        types stop at the same places. Where siblings share a name, the first one is indexed.
+        """
+        if self._node_index is not None:
+            return self._node_index
+
+        index: dict[str, tuple[ET.Element, SchemaDocument, set[str]]] = {}
+        pending = [(name, element, self.document, set()) for name, element in reversed(self.elements.items())]
+        while pending:
+            path, element, document, visited_types = pending.pop()
+            if path in index:
+                continue
+            index[path] = (element, document, visited_types)
+            content, content_document, child_visited_types = self._element_content(element, document, visited_types)
+            if content is not None:
+                pending.extend(
+                    (f"{path}/{child.attrib.get('name', '')}", child, content_document, child_visited_types)
+                    for child in reversed(list(self._iter_elements_in_order(content)))
+                )
+        # Concurrent first calls build the same index; the last assignment wins.
+        self._node_index = index
+        return index
+
+    def _element_content(
+        self,
+        element: ET.Element,
+        document: SchemaDocument,
+        visited_types: set[str],
+    ) -> tuple[ET.Element | None, SchemaDocument, set[str]]:
+        """Complex type an element's attributes and children come from, the document declaring it,
+        and the visited types for its children."""
+        inline_complex = element.find("xs:complexType", NS)
+        if inline_complex is not None:
+            return inline_complex, document, visited_types
+
+        type_name = document.qualified_name(element.attrib.get("type"))
+        resolved = self.registry.lookup("complexType", type_name)
+        if resolved is None or type_name in visited_types:
+            return None, document, visited_types
+        next_visited = set(visited_types)
+        next_visited.add(type_name)
+        type_document, complex_type = resolved
+        return complex_type, type_document, next_visited
+
+    def _build_element_node(
+        self,
+        element: ET.Element,
+        document: SchemaDocument,
+        visited_types: set[str],
+        *,
+        path: str | None = None,
+        depth: int | None = None,
+        children_window: tuple[int, int | None] = (0, None),
+    ) -> dict:
+        """Build an element node; with a ``path`` it is expanded ``depth`` levels and carries child counts."""
         element_name = element.attrib.get("name", "")
         type_name = _local_name(element.attrib.get("type"))
 
@@ -97,42 +347,59 @@ class SchemaExplorer:
             "name": element_name,
             "kind": "element",
             "type": type_name,
-            "namespace": self.target_namespace,
+            "namespace": document.element_namespace(element),
             "cardinality": _parse_occurs(element),
             "attributes": [],
             "enumeration": None,
             "children": [],
         }
+        if path is not None:
+            node["path"] = path
+            node["childCount"] = 0
 
         inline_simple = element.find("xs:simpleType", NS)
-        inline_complex = element.find("xs:complexType", NS)
-
         if inline_simple is not None:
             node["enumeration"] = self._extract_simple_type_enum(inline_simple)
+        elif element.find("xs:complexType", NS) is None:
+            simple_type = self.registry.lookup("simpleType", document.qualified_name(element.attrib.get("type")))
+            if simple_type is not None:
+                node["enumeration"] = self._extract_simple_type_enum(simple_type[1])
 
-        if inline_complex is not None:
-            node["attributes"] = self._collect_complex_attributes(inline_complex)
-            node["children"] = self._collect_child_elements(inline_complex, visited_types)
+        content, content_document, child_visited_types = self._element_content(element, document, visited_types)
+        if content is None:
             return node
 
-        if type_name in self.simple_types:
-            node["enumeration"] = self._extract_simple_type_enum(self.simple_types[type_name])
-
-        if type_name in self.complex_types:
-            if type_name in visited_types:
-                return node
-            next_visited = set(visited_types)
-            next_visited.add(type_name)
-            complex_type = self.complex_types[type_name]
-            node["attributes"] = self._collect_complex_attributes(complex_type)
-            node["children"] = self._collect_child_elements(complex_type, next_visited)
+        node["attributes"] = self._collect_complex_attributes(content, content_document)
+        if path is None:
+            node["children"] = self._collect_child_elements(content, content_document, child_visited_types)
+            return node
 
+        child_elements = list(self._iter_elements_in_order(content))
+        node["childCount"] = len(child_elements)
+        if depth > 0:
+            offset, limit = children_window
+            page = child_elements[offset:] if limit is None else child_elements[offset:offset + limit]
+            node["children"] = [
+                self._build_element_node(
+                    child,
+                    content_document,
+                    child_visited_types,
+                    path=f"{path}/{child.attrib.get('name', '')}",
+                    depth=depth - 1,
+                )
+                for child in page
+            ]
         return node
 
-    def _collect_child_elements(self, container: ET.Element, visited_types: set[str]) -> list[dict]:
+    def _collect_child_elements(
+        self,
+        container: ET.Element,
+        document: SchemaDocument,
+        visited_types: set[str],
+    ) -> list[dict]:
         children: list[dict] = []
         for child in self._iter_elements_in_order(container):
-            children.append(self._build_element_node(child, visited_types))
+            children.append(self._build_element_node(child, document, visited_types))
         return children
 
     def _iter_elements_in_order(self, container: ET.Element):
@@ -153,23 +420,23 @@ class SchemaExplorer:
                     for inner in self._iter_elements_in_order(restriction):
                         yield inner
 
-    def _collect_complex_attributes(self, complex_node: ET.Element) -> list[dict]:
+    def _collect_complex_attributes(self, complex_node: ET.Element, document: SchemaDocument) -> list[dict]:
         attributes: list[dict] = []
 
         for attr in complex_node.findall("xs:attribute", NS):
-            attributes.append(self._build_attribute(attr, source=None))
+            attributes.append(self._build_attribute(attr, document, source=None))
 
         for group_ref in complex_node.findall("xs:attributeGroup", NS):
-            ref_name = _local_name(group_ref.attrib.get("ref"))
+            ref_name = document.qualified_name(group_ref.attrib.get("ref"))
             if ref_name is None:
                 continue
             attributes.extend(self._resolve_attribute_group(ref_name, seen_groups=set()))
 
-        for extension in complex_node.findall(".//xs:extension", NS):
+        for extension in complex_node.findall("./*/xs:extension", NS):
             for attr in extension.findall("xs:attribute", NS):
-                attributes.append(self._build_attribute(attr, source=None))
+                attributes.append(self._build_attribute(attr, document, source=None))
             for group_ref in extension.findall("xs:attributeGroup", NS):
-                ref_name = _local_name(group_ref.attrib.get("ref"))
+                ref_name = document.qualified_name(group_ref.attrib.get("ref"))
                 if ref_name is None:
                     continue
                 attributes.extend(self._resolve_attribute_group(ref_name, seen_groups=set()))
@@ -180,9 +447,10 @@ class SchemaExplorer:
         if group_name in seen_groups:
             return []
 
-        group = self.attribute_groups.get(group_name)
-        if group is None:
+        resolved_group = self.registry.lookup("attributeGroup", group_name)
+        if resolved_group is None:
             return []
+        document, group = resolved_group
 
         next_seen = set(seen_groups)
         next_seen.add(group_name)
@@ -191,30 +459,33 @@ class SchemaExplorer:
         for child in list(group):
             tag = _local_name(child.tag)
             if tag == "attribute":
-                source = group_name if group_name in HIGHLIGHT_GROUPS else group_name
-                resolved.append(self._build_attribute(child, source=source))
+                resolved.append(self._build_attribute(child, document, source=_local_name(group_name)))
             elif tag == "attributeGroup":
-                nested_name = _local_name(child.attrib.get("ref"))
+                nested_name = document.qualified_name(child.attrib.get("ref"))
                 if nested_name:
                     resolved.extend(self._resolve_attribute_group(nested_name, next_seen))
 
         return resolved
 
-    def _build_attribute(self, attr: ET.Element, source: str | None) -> dict:
+    def _build_attribute(self, attr: ET.Element, document: SchemaDocument, source: str | None) -> dict:
         type_name = _local_name(attr.attrib.get("type"))
 
         enum_values: list[str] = []
         inline_simple = attr.find("xs:simpleType", NS)
         if inline_simple is not None:
             enum_values = self._extract_simple_type_enum(inline_simple)
-        elif type_name and type_name in self.simple_types:
-            enum_values = self._extract_simple_type_enum(self.simple_types[type_name])
+        else:
+            simple_type = self.registry.lookup("simpleType", document.qualified_name(attr.attrib.get("type")))
+            if simple_type is not None:
+                enum_values = self._extract_simple_type_enum(simple_type[1])
 
         return {
             "name": attr.attrib.get("name", ""),
             "kind": "attribute",
             "type": type_name,
             "enum": enum_values,
+            "required": attr.attrib.get("use") == "required",
+            "fixed": attr.attrib.get("fixed"),
             "source": source,
         }
 
@@ -227,7 +498,12 @@ class SchemaExplorer:
         return values
 
 
-EXPLORER = SchemaExplorer(SCHEMA_PATH)
+EXPLORER = SchemaExplorer(REGISTRY)
+# The schema does not change while the process runs, so responses and the search index are built once at import.
+_SCHEMA_TREE = EXPLORER.get_tree()
+SCHEMA_SUMMARY_RESPONSE = EncodedJson(EXPLORER.get_summary())
+SCHEMA_TREE_RESPONSE = EncodedJson(_SCHEMA_TREE)
+SCHEMA_SEARCH_INDEX = EXPLORER.build_search_index(_SCHEMA_TREE["root"])
 
 
 def get_schema_summary() -> dict:
@@ -235,4 +511,42 @@ def get_schema_summary() -> dict:
 
 
 def get_schema_tree() -> dict:
-    return EXPLORER.get_tree()
\ No newline at end of file
+    return EXPLORER.get_tree()
+
+
+SCHEMA_NODE_RESPONSES = EncodedJsonCache(SCHEMA_NODE_CACHE_MAX_BYTES)
+
+
+def cached_schema_node_response(path: str, depth: int, offset: int, limit: int) -> EncodedJson | None:
+    return SCHEMA_NODE_RESPONSES.get((path, depth, offset, limit))
+
+
+def get_schema_node_response(path: str, depth: int, offset: int, limit: int) -> EncodedJson | None:
+    """Build, encode and cache a node response; deep nodes take long enough to run off the event loop."""
+    key = (path, depth, offset, limit)
+    encoded = SCHEMA_NODE_RESPONSES.get(key)
+    if encoded is not None:
+        return encoded
+    node = EXPLORER.get_node(path, depth=depth, offset=offset, limit=limit)
+    if node is None:
+        return None
+    encoded = EncodedJson({"node": node, "offset": offset, "limit": limit})
+    SCHEMA_NODE_RESPONSES.put(key, encoded)
+    return encoded
+
+
+SCHEMA_SEARCH_RESPONSES = EncodedJsonCache(SCHEMA_SEARCH_CACHE_MAX_BYTES)
+
+
+def cached_schema_search_response(query: str, kinds: frozenset[str], limit: int) -> EncodedJson | None:
+    return SCHEMA_SEARCH_RESPONSES.get((query, kinds, limit))
+
+
+def get_schema_search_response(query: str, kinds: frozenset[str], limit: int) -> EncodedJson:
+    """Search, encode and cache a response; broad queries take long enough to run off the event loop."""
+    key = (query, kinds, limit)
+    encoded = SCHEMA_SEARCH_RESPONSES.get(key)
+    if encoded is None:
+        encoded = EncodedJson(SCHEMA_SEARCH_INDEX.search(query, kinds=set(kinds), limit=limit))
+        SCHEMA_SEARCH_RESPONSES.put(key, encoded)
+    return encoded
\ No newline at end of file
@@ -0,0 +1,191 @@
+import hashlib
+import urllib.request
+import urllib.response
+from email.message import Message
+from io import BytesIO
+from pathlib import Path
+from threading import Lock
+from urllib.request import url2pathname
+from xml.etree import ElementTree as ET
+
+
+SCHEMA_DIR = Path(__file__).resolve().parents[1] / "schema"
+SCHEMA_FILE = "eCH-0278-1-0.xsd"
+SCHEMA_PATH = SCHEMA_DIR / SCHEMA_FILE
+VENDORED_SCHEMA_DIR = SCHEMA_DIR / "vendor"
+XS_NS = "http://www.w3.org/2001/XMLSchema"
+COMPONENT_KINDS = ("element", "complexType", "simpleType", "attributeGroup")
+_COMPONENT_TAGS = {f"{{{XS_NS}}}{kind}": kind for kind in COMPONENT_KINDS}
+
+
+class SchemaDocument:
+    """One parsed XSD file with the namespace prefixes it declares and its global components by name."""
+
+    __slots__ = ("path", "root", "target_namespace", "prefixes", "elements_qualified", "components")
+
+    def __init__(self, path: Path, root: ET.Element, prefixes: dict[str, str]):
+        self.path = path
+        self.root = root
+        self.target_namespace = root.get("targetNamespace", "")
+        self.prefixes = prefixes
+        self.elements_qualified = root.get("elementFormDefault") == "qualified"
+        self.components: dict[str, dict[str, ET.Element]] = {kind: {} for kind in COMPONENT_KINDS}
+        for child in root:
+            kind = _COMPONENT_TAGS.get(child.tag)
+            name = child.get("name")
+            if kind is not None and name:
+                self.components[kind].setdefault(name, child)
+
+    def qualified_name(self, value: str | None) -> str | None:
+        """Expand a QName attribute value such as ``eCH-0010:addressType`` to ``{namespace}addressType``.
+
+        Prefixes are resolved against this document's declarations; the same prefix can stand for
+        different namespaces in different vendored files.
+        """
+        if value is None:
+            return None
+        prefix, _, local = value.rpartition(":")
+        namespace = self.prefixes.get(prefix, "")
+        return f"{{{namespace}}}{local}" if namespace else local
+
+    def element_namespace(self, element: ET.Element) -> str:
+        """Namespace of an element declared in this document, honouring ``elementFormDefault``."""
+        if self.elements_qualified or self.components["element"].get(element.get("name")) is element:
+            return self.target_namespace
+        return ""
+
+
+def _parse_schema_document(path: Path, data: bytes) -> SchemaDocument:
+    prefixes: dict[str, str] = {}
+    root = None
+    for event, item in ET.iterparse(BytesIO(data), events=("start-ns", "start")):
+        if event == "start-ns":
+            prefixes.setdefault(*item)
+        elif root is None:
+            root = item
+    return SchemaDocument(path, root, prefixes)
+
+
+class _LoadedFileHandler(urllib.request.FileHandler):
+    """Answers ``file:`` URLs of already read files from memory; any other file is read from disk."""
+
+    def __init__(self, sources: dict[Path, bytes]):
+        super().__init__()
+        self.sources = sources
+
+    def file_open(self, req):
+        data = self.sources.get(Path(url2pathname(req.selector)))
+        if data is None:
+            return super().file_open(req)
+        headers = Message()
+        headers["Content-Length"] = str(len(data))
+        return urllib.response.addinfourl(BytesIO(data), headers, req.full_url)
+
+
+class SchemaRegistry:
+    """The eCH-0278 XSD and its vendored imports, each read and parsed once on first use.
+
+    It serves the schema explorer (global components resolved across namespaces) and the XSD
+    validator (schema fingerprint, namespace locations and the file contents for the xmlschema
+    build). Reading the fingerprint alone hashes the files without parsing them.
+    """
+
+    def __init__(self, schema_path: Path = SCHEMA_PATH, vendor_dir: Path = VENDORED_SCHEMA_DIR):
+        self.schema_path = schema_path
+        self.vendor_dir = vendor_dir
+        self._lock = Lock()
+        self._fingerprint: str | None = None
+        self._documents: list[SchemaDocument] | None = None
+        self._by_namespace: dict[str, SchemaDocument] = {}
+        self._sources: dict[Path, bytes] = {}
+
+    def _schema_files(self) -> list[Path]:
+        files = [self.schema_path]
+        if self.vendor_dir.exists():
+            files.extend(sorted(self.vendor_dir.rglob("*.xsd")))
+        return files
+
+    def _update_digest(self, digest, path: Path, data: bytes) -> None:
+        if path != self.schema_path:
+            digest.update(path.relative_to(self.vendor_dir).as_posix().encode("utf-8"))
+        digest.update(data)
+
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            with self._lock:
+                if self._fingerprint is None:
+                    digest = hashlib.sha256()
+                    for path in self._schema_files():
+                        self._update_digest(digest, path, path.read_bytes())
+                    self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def _load(self) -> list[SchemaDocument]:
+        if self._documents is not None:
+            return self._documents
+
+        with self._lock:
+            if self._documents is not None:
+                return self._documents
+
+            digest = hashlib.sha256()
+            documents: list[SchemaDocument] = []
+            for path in self._schema_files():
+                data = path.read_bytes()
+                self._sources[path] = data
+                self._update_digest(digest, path, data)
+                try:
+                    documents.append(_parse_schema_document(path, data))
+                except ET.ParseError as exc:
+                    if path == self.schema_path:
+                        raise RuntimeError(f"Failed to parse schema at {path}: {exc}") from exc
+
+            for document in documents:
+                self._by_namespace.setdefault(document.target_namespace, document)
+            self._fingerprint = digest.hexdigest()
+            self._documents = documents
+            return documents
+
+    @property
+    def main(self) -> SchemaDocument:
+        return self._load()[0]
+
+    @property
+    def documents(self) -> list[SchemaDocument]:
+        return self._load()
+
+    def namespace_locations(self) -> list[tuple[str, str]]:
+        """Vendored schema file per imported namespace, the first file in path order winning."""
+        locations: dict[str, str] = {}
+        for document in self._load()[1:]:
+            if document.target_namespace:
+                locations.setdefault(document.target_namespace, str(document.path))
+        return list(locations.items())
+
+    def opener(self) -> urllib.request.OpenerDirector:
+        """URL opener handing xmlschema the bytes read here instead of reading every file again.
+
+        xmlschema parses the files itself, because it needs their prefix declarations to resolve
+        QNames; only the file I/O is shared.
+        """
+        self._load()
+        return urllib.request.build_opener(_LoadedFileHandler(self._sources))
+
+    def lookup(self, kind: str, qualified_name: str | None) -> tuple[SchemaDocument, ET.Element] | None:
+        """Global component of ``kind`` named ``{namespace}local``, with the document declaring it."""
+        if qualified_name is None:
+            return None
+        self._load()
+        namespace, local = "", qualified_name
+        if qualified_name.startswith("{"):
+            namespace, _, local = qualified_name[1:].partition("}")
+        document = self._by_namespace.get(namespace)
+        if document is None:
+            return None
+        component = document.components[kind].get(local)
+        if component is None:
+            return None
+        return document, component
+
+
+REGISTRY = SchemaRegistry()
\ No newline at end of file
@@ -0,0 +1,267 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Lock
+
+from app.comparison import COMPARE_IDENTITY_KEYS, PreparedComparisonDocument
+from app.metrics import STAGE_SECONDS
+from app.validation import schema_fingerprint, validate_document, validate_xml_file
+from app.xml_utils import (
+    DOCUMENT_INDEX_FORMAT,
+    DocumentIndex,
+    build_document_index,
+    build_document_index_from_stream,
+    parse_xml_document,
+)
+
+
+DEFAULT_SNAPSHOT_DB_PATH = Path(__file__).resolve().parents[1] / "data" / "snapshots.sqlite3"
+SNAPSHOT_DB_PATH = os.environ.get("SNAPSHOT_DB_PATH", "").strip() or str(DEFAULT_SNAPSHOT_DB_PATH)
+SNAPSHOT_STORE_MAX_BYTES = int(os.environ.get("SNAPSHOT_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+SNAPSHOT_COMPRESSION_LEVEL = 1
+
+_SCHEMA_STATEMENTS = (
+    """
+    CREATE TABLE IF NOT EXISTS snapshots (
+        id TEXT PRIMARY KEY,
+        version TEXT NOT NULL,
+        document BLOB NOT NULL,
+        document_bytes INTEGER NOT NULL,
+        validation BLOB NOT NULL,
+        document_index BLOB,
+        stored_bytes INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        last_used_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS snapshots_last_used ON snapshots (last_used_at)",
+)
+
+
+class SnapshotTooLargeError(ValueError):
+    pass
+
+
+class PreparedSnapshot:
+    """Validation result and fingerprinted leaf index of one snapshot document, built from a single parse."""
+
+    __slots__ = ("validation", "index")
+
+    def __init__(self, validation: dict, index: DocumentIndex | None):
+        self.validation = validation
+        self.index = index
+
+
+def prepare_snapshot(xml_bytes: bytes, identity_keys: dict[str, str] | None = None) -> PreparedSnapshot:
+    with STAGE_SECONDS.time("parse"):
+        document = parse_xml_document(xml_bytes)
+    index = None
+    if not document.parse_error and document.root is not None:
+        with STAGE_SECONDS.time("index"):
+            index = build_document_index(
+                document.root,
+                COMPARE_IDENTITY_KEYS if identity_keys is None else identity_keys,
+            )
+    return PreparedSnapshot(validate_document(document), index)
+
+
+def prepare_snapshot_file(xml_path: Path | str, identity_keys: dict[str, str] | None = None) -> PreparedSnapshot:
+    """Prepare a snapshot from a document on disk without building its tree."""
+    with open(xml_path, "rb") as source, STAGE_SECONDS.time("index"):
+        index, _ = build_document_index_from_stream(
+            source,
+            COMPARE_IDENTITY_KEYS if identity_keys is None else identity_keys,
+        )
+    return PreparedSnapshot(validate_xml_file(xml_path), index)
+
+
+def snapshot_version() -> str:
+    """Identify the schema, identity keys and index format that stored snapshots depend on."""
+    digest = hashlib.sha256(schema_fingerprint().encode("utf-8"))
+    digest.update(json.dumps(COMPARE_IDENTITY_KEYS, sort_keys=True).encode("utf-8"))
+    digest.update(f"index:{DOCUMENT_INDEX_FORMAT}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SnapshotRecord:
+    __slots__ = (
+        "snapshot_id",
+        "version",
+        "xml_bytes",
+        "validation",
+        "stored_bytes",
+        "created_at",
+        "_index",
+        "_index_data",
+    )
+
+    def __init__(
+        self,
+        *,
+        snapshot_id: str,
+        version: str,
+        xml_bytes: bytes,
+        validation: dict,
+        stored_bytes: int,
+        created_at: float,
+        index: DocumentIndex | None = None,
+        index_data: bytes | None = None,
+    ):
+        self.snapshot_id = snapshot_id
+        self.version = version
+        self.xml_bytes = xml_bytes
+        self.validation = validation
+        self.stored_bytes = stored_bytes
+        self.created_at = created_at
+        self._index = index
+        self._index_data = index_data
+
+    @property
+    def index(self) -> DocumentIndex | None:
+        # Decoded on first use, so records stored in an older index format are never decoded.
+        if self._index is None and self._index_data is not None:
+            self._index = DocumentIndex.from_bytes(zlib.decompress(self._index_data))
+            self._index_data = None
+        return self._index
+
+    def comparison_document(self) -> PreparedComparisonDocument:
+        return PreparedComparisonDocument(self.validation["xsdValid"], self.index)
+
+    def metadata(self) -> dict:
+        return {
+            "id": self.snapshot_id,
+            "createdAt": datetime.fromtimestamp(self.created_at, timezone.utc).isoformat(timespec="seconds"),
+            "sizeBytes": len(self.xml_bytes),
+            "fingerprint": None if self.index is None else self.index.fingerprint,
+            "validation": self.validation,
+        }
+
+
+class SnapshotStore:
+    """SQLite store of uploaded documents with their validation result and comparison index.
+
+    Rows are evicted least recently used first once the stored (compressed) size exceeds ``max_bytes``.
+    The file may be shared by the processes of one host (SQLite in WAL mode), but not over a network
+    filesystem, so all writers must run on the host that mounts it.
+    """
+
+    def __init__(self, *, path: str = SNAPSHOT_DB_PATH, max_bytes: int = SNAPSHOT_STORE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._connection: sqlite3.Connection | None = None
+        self._lock = Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            if self.path != ":memory:":
+                connection.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA_STATEMENTS:
+                connection.execute(statement)
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def put(self, snapshot_id: str, xml_bytes: bytes, snapshot: PreparedSnapshot, version: str) -> SnapshotRecord:
+        document = zlib.compress(xml_bytes, SNAPSHOT_COMPRESSION_LEVEL)
+        validation = zlib.compress(
+            json.dumps(snapshot.validation, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            SNAPSHOT_COMPRESSION_LEVEL,
+        )
+        document_index = None
+        if snapshot.index is not None:
+            document_index = zlib.compress(snapshot.index.to_bytes(), SNAPSHOT_COMPRESSION_LEVEL)
+        stored_bytes = len(document) + len(validation) + len(document_index or b"")
+        if stored_bytes > self.max_bytes:
+            raise SnapshotTooLargeError("Snapshot exceeds the snapshot store size limit.")
+
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO snapshots "
+                    "(id, version, document, document_bytes, validation, document_index, stored_bytes, "
+                    "created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        snapshot_id,
+                        version,
+                        document,
+                        len(xml_bytes),
+                        validation,
+                        document_index,
+                        stored_bytes,
+                        now,
+                        now,
+                    ),
+                )
+                self._evict(connection, keep=snapshot_id)
+
+        return SnapshotRecord(
+            snapshot_id=snapshot_id,
+            version=version,
+            xml_bytes=xml_bytes,
+            validation=snapshot.validation,
+            index=snapshot.index,
+            stored_bytes=stored_bytes,
+            created_at=now,
+        )
+
+    def get(self, snapshot_id: str) -> SnapshotRecord | None:
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                row = connection.execute(
+                    "SELECT version, document, validation, document_index, stored_bytes, created_at "
+                    "FROM snapshots WHERE id = ?",
+                    (snapshot_id,),
+                ).fetchone()
+                if row is None:
+                    return None
+                connection.execute(
+                    "UPDATE snapshots SET last_used_at = ? WHERE id = ?",
+                    (time.time(), snapshot_id),
+                )
+
+        version, document, validation, document_index, stored_bytes, created_at = row
+        return SnapshotRecord(
+            snapshot_id=snapshot_id,
+            version=version,
+            xml_bytes=zlib.decompress(document),
+            validation=json.loads(zlib.decompress(validation)),
+            index_data=document_index,
+            stored_bytes=stored_bytes,
+            created_at=created_at,
+        )
+
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COALESCE(SUM(stored_bytes), 0) FROM snapshots").fetchone()[0]
+
+    def _evict(self, connection: sqlite3.Connection, *, keep: str) -> None:
+        total = connection.execute("SELECT COALESCE(SUM(stored_bytes), 0) FROM snapshots").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        candidates = connection.execute(
+            "SELECT id, stored_bytes FROM snapshots WHERE id != ? ORDER BY last_used_at",
+            (keep,),
+        ).fetchall()
+        for snapshot_id, stored_bytes in candidates:
+            if total <= self.max_bytes:
+                break
+            connection.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+            total -= stored_bytes
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
\ No newline at end of file
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from fastapi import UploadFile
+
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+class ReceivedUpload:
+    """Upload payload kept in memory when small, or spooled to a temporary file when large."""
+
+    __slots__ = ("content", "path", "size", "digest")
+
+    def __init__(self, *, content: bytes | None, path: Path | None, size: int, digest: bytes):
+        self.content = content
+        self.path = path
+        self.size = size
+        self.digest = digest
+
+    @property
+    def streamed(self) -> bool:
+        return self.path is not None
+
+    def cleanup(self) -> None:
+        if self.path is None:
+            return
+        try:
+            self.path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+async def receive_upload(file: UploadFile, *, max_bytes: int, memory_limit: int) -> ReceivedUpload:
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError("Uploaded file is too large.")
+
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    spool_file = None
+    size = 0
+
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError("Uploaded file is too large.")
+            digest.update(chunk)
+
+            if spool_file is None and size > memory_limit:
+                spool_file = tempfile.NamedTemporaryFile(suffix=".xml", delete=False)
+                spool_file.write(buffer)
+                buffer = bytearray()
+            if spool_file is not None:
+                spool_file.write(chunk)
+            else:
+                buffer.extend(chunk)
+    except BaseException:
+        if spool_file is not None:
+            spool_file.close()
+            os.unlink(spool_file.name)
+        raise
+
+    if spool_file is None:
+        return ReceivedUpload(content=bytes(buffer), path=None, size=size, digest=digest.digest())
+
+    spool_file.close()
+    return ReceivedUpload(content=None, path=Path(spool_file.name), size=size, digest=digest.digest())
\ No newline at end of file
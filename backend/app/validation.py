@@ -1,46 +1,92 @@
-import tempfile
+import hashlib
+import json
+import logging
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 from threading import Lock
+from urllib.request import OpenerDirector
 from xml.etree import ElementTree as ET
 
 import xmlschema
 from saxonche import PySaxonProcessor, PyXsltExecutable
-from app.xml_utils import parse_xml_once
+from app.metrics import STAGE_SECONDS, STYLESHEET_SECONDS
+from app.schema_artifact import (
+    load_schema_artifact,
+    load_schema_catalog,
+    namespace_locations_from_catalog,
+)
+from app.schema_registry import REGISTRY, SCHEMA_DIR, SCHEMA_PATH
+from app.xml_utils import ParsedXmlDocument, decode_xml_text, parse_xml_document, scan_xml_stream
 
 
-SCHEMA_PATH = Path(__file__).resolve().parents[1] / "schema" / "eCH-0278-1-0.xsd"
-VENDORED_SCHEMA_DIR = Path(__file__).resolve().parents[1] / "schema" / "vendor"
 GENERATED_SCHEMATRON_DIR = Path(__file__).resolve().parent / "generated" / "schematron"
+GENERATED_SCHEMATRON_MERGED_DIR = Path(__file__).resolve().parent / "generated" / "schematron-merged"
+GENERATED_SCHEMA_DIR = Path(__file__).resolve().parent / "generated" / "schema"
 SVRL_NS = {"svrl": "http://purl.oclc.org/dsdl/svrl"}
+MERGED_MANIFEST_FILE = "manifest.json"
+COMPILED_MANIFEST_FILE = "manifest.json"
+PROCEDURAL_EXECUTION_MODES = {"sequential", "parallel", "merged"}
+PROCEDURAL_EXECUTION = os.environ.get("PROCEDURAL_EXECUTION", "sequential").strip().lower()
+PROCEDURAL_THREADS = max(1, int(os.environ.get("PROCEDURAL_THREADS", "4")))
+PROCEDURAL_MAX_FINDINGS = max(0, int(os.environ.get("PROCEDURAL_MAX_FINDINGS", "1000")))
+SVRL_FEED_CHARS = 64 * 1024
+_SVRL_FINDING_ELEMENTS = ("failed-assert", "successful-report", "error")
+_SVRL_FINDING_TAGS = {
+    f"{{{SVRL_NS['svrl']}}}{element_name}": kind for kind, element_name in enumerate(_SVRL_FINDING_ELEMENTS)
+}
+
+logger = logging.getLogger(__name__)
 
 _schema_lock = Lock()
 _schema: xmlschema.XMLSchema | None = None
 
 
-_procedural_lock = Lock()
-_procedural_initialized = False
-_procedural_init_error: str | None = None
-_procedural_processor: PySaxonProcessor | None = None
-_procedural_executables: list[dict] = []
+class ProceduralReloadError(RuntimeError):
+    pass
 
 
-def _schema_locations_from_vendor() -> list[tuple[str, str]]:
-    if not VENDORED_SCHEMA_DIR.exists():
-        return []
+class UnattributedSvrlFinding(ValueError):
+    """A merged SVRL report holds a finding that no ``patternId`` ties to its source stylesheet."""
 
-    locations: dict[str, str] = {}
-    for schema_file in sorted(VENDORED_SCHEMA_DIR.rglob("*.xsd")):
-        try:
-            schema_root = ET.parse(schema_file).getroot()
-        except ET.ParseError:
-            continue
 
-        target_namespace = schema_root.attrib.get("targetNamespace")
-        if target_namespace and target_namespace not in locations:
-            locations[target_namespace] = str(schema_file)
+class ProceduralRegistry:
+    """Compiled procedural rule sets of one load, never changed afterwards.
+
+    Each document takes the current registry once and keeps it until it is done, so a reload can
+    swap in a new registry while documents that started earlier finish on the previous one.
+    """
 
-    return list(locations.items())
+    __slots__ = ("version", "processor", "executables", "merged", "error")
+
+    def __init__(
+        self,
+        version: str,
+        processor: PySaxonProcessor | None,
+        executables: list[dict],
+        merged: dict | None = None,
+        error: str | None = None,
+    ):
+        self.version = version
+        self.processor = processor
+        self.executables = executables
+        self.merged = merged
+        self.error = error
+
+    @property
+    def unavailable_message(self) -> str | None:
+        if self.error:
+            return self.error
+        if not self.executables:
+            return "No compiled procedural validator stylesheets found."
+        return None
+
+
+_procedural_lock = Lock()
+_procedural_registry: ProceduralRegistry | None = None
+_procedural_thread_pool: ThreadPoolExecutor | None = None
 
 
 def _get_schema() -> xmlschema.XMLSchema:
@@ -53,21 +99,71 @@ def _get_schema() -> xmlschema.XMLSchema:
         if _schema is not None:
             return _schema
 
-        last_error: Exception | None = None
-        schema_locations = _schema_locations_from_vendor()
-        for attempt in range(1, 4):
-            try:
-                if schema_locations:
-                    _schema = xmlschema.XMLSchema(str(SCHEMA_PATH), locations=schema_locations)
-                else:
-                    _schema = xmlschema.XMLSchema(str(SCHEMA_PATH))
+        catalog = load_schema_catalog(GENERATED_SCHEMA_DIR, schema_fingerprint=schema_fingerprint())
+        if catalog is not None:
+            prebuilt_schema = load_schema_artifact(catalog, GENERATED_SCHEMA_DIR)
+            if prebuilt_schema is not None:
+                _schema = prebuilt_schema
                 return _schema
-            except Exception as exc:
-                last_error = exc
-                if attempt < 3:
-                    time.sleep(1)
+            schema_locations = namespace_locations_from_catalog(catalog, base_dir=SCHEMA_DIR)
+        else:
+            schema_locations = REGISTRY.namespace_locations()
+
+        _schema = build_schema(schema_locations, opener=REGISTRY.opener())
+        return _schema
+
+
+def build_schema(
+    schema_locations: list[tuple[str, str]],
+    opener: OpenerDirector | None = None,
+) -> xmlschema.XMLSchema:
+    """Build the validator; ``opener`` can serve the XSD files without xmlschema reading them from disk."""
+    last_error: Exception | None = None
+    for attempt in range(1, 4):
+        try:
+            if schema_locations:
+                return xmlschema.XMLSchema(str(SCHEMA_PATH), locations=schema_locations, opener=opener)
+            return xmlschema.XMLSchema(str(SCHEMA_PATH), opener=opener)
+        except Exception as exc:
+            last_error = exc
+            if attempt < 3:
+                time.sleep(1)
+
+    raise RuntimeError(f"Failed to load XSD schema at {SCHEMA_PATH}: {last_error}") from last_error
+
+
+def vendored_schema_locations() -> list[tuple[str, str]]:
+    return REGISTRY.namespace_locations()
+
+
+def schema_fingerprint() -> str:
+    return REGISTRY.fingerprint()
+
+
+def procedural_rules_fingerprint() -> str:
+    registry = current_procedural_registry()
+    unavailable_message = registry.unavailable_message
+    if unavailable_message is not None:
+        return f"unavailable:{unavailable_message}"
+    return registry.version
+
+
+def _rules_version(entries: list[dict]) -> str:
+    digest = hashlib.sha256()
+    for entry in entries:
+        digest.update(Path(entry["stylesheet"]).name.encode("utf-8"))
+        digest.update((entry["ruleVersion"] or "").encode("utf-8"))
+        digest.update(entry["digest"].encode("utf-8"))
+    return digest.hexdigest()
 
-        raise RuntimeError(f"Failed to load XSD schema at {SCHEMA_PATH}: {last_error}") from last_error
+
+def is_cacheable_result(result: dict) -> bool:
+    if any(error.startswith("Validation processing error:") for error in result["structuralErrors"]):
+        return False
+    return not any(
+        finding["code"] in {"procedural_validator_unavailable", "procedural_validation_runtime_error"}
+        for finding in result["proceduralFindings"]
+    )
 
 
 def _format_validation_error(error: object) -> str:
@@ -85,9 +181,11 @@ def _build_response(
     xsd_valid: bool,
     structural_errors: list[str],
     namespaces: list[dict],
-    analysis: dict,
+    analysis: dict | None,
     procedural_findings: list[dict],
     procedural_available: bool | None = None,
+    procedural_findings_truncated: int = 0,
+    structural_errors_limit_reached: bool | None = None,
 ) -> dict:
     response = {
         "xsdValid": xsd_valid,
@@ -95,21 +193,26 @@ def _build_response(
         "proceduralFindings": procedural_findings,
         "errors": structural_errors,
         "namespaces": namespaces,
-        "analysis": analysis,
     }
+    if analysis is not None:
+        response["analysis"] = analysis
     if procedural_available is not None:
         response["proceduralAvailable"] = procedural_available
+        response["proceduralFindingsTruncated"] = procedural_findings_truncated
+    if structural_errors_limit_reached is not None:
+        response["structuralErrorsLimitReached"] = structural_errors_limit_reached
     return response
 
 
-def _procedural_availability_status() -> tuple[bool, str | None]:
-    initialize_procedural_validators()
+def encoded_result_xsd_valid(body: bytes) -> bool:
+    """Read ``xsdValid`` from an encoded response without decoding it; ``_build_response`` puts it first."""
+    return body.startswith(b'{"xsdValid":true')
+
 
-    if _procedural_init_error:
-        return False, _procedural_init_error
-    if not _procedural_executables:
-        return False, "No compiled procedural validator stylesheets found."
-    return True, None
+def _procedural_availability_status() -> tuple[ProceduralRegistry, bool, str | None]:
+    registry = current_procedural_registry()
+    unavailable_message = registry.unavailable_message
+    return registry, unavailable_message is None, unavailable_message
 
 
 def _axis_from_code(code: str) -> str:
@@ -139,162 +242,461 @@ def _extract_text(node: ET.Element | None) -> str:
     return text or "Procedural validation finding detected."
 
 
-def _rule_version_for(stylesheet_path: Path) -> str | None:
-    for candidate in [stylesheet_path.parent / "VERSION", stylesheet_path.parent.parent / "VERSION"]:
-        if candidate.exists():
-            try:
-                value = candidate.read_text(encoding="utf-8").strip()
-                if value:
-                    return value
-            except OSError:
-                return None
-    return None
+def _compiled_stylesheets() -> list[dict]:
+    """Stylesheet path, digest and rule version per compiled rule set, from the compile manifest.
+
+    Directories compiled without a manifest are scanned instead, without rule versions.
+    """
+    manifest_path = GENERATED_SCHEMATRON_DIR / COMPILED_MANIFEST_FILE
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        return manifest["stylesheets"]
+    if not GENERATED_SCHEMATRON_DIR.exists():
+        return []
+    return [
+        {
+            "stylesheet": stylesheet_path.relative_to(GENERATED_SCHEMATRON_DIR).as_posix(),
+            "digest": hashlib.sha256(stylesheet_path.read_bytes()).hexdigest(),
+            "ruleVersion": None,
+        }
+        for stylesheet_path in sorted(GENERATED_SCHEMATRON_DIR.rglob("*.xsl"))
+    ]
 
 
-def _to_findings_from_svrl(
+def _svrl_parse_error(stylesheet_path: Path, rule_version: str | None, exc: Exception) -> dict:
+    return {
+        "code": "procedural_svrl_parse_error",
+        "ruleVersion": rule_version,
+        "severity": "error",
+        "layer": "procedural",
+        "axis": "none",
+        "message": f"SVRL parse error for stylesheet '{stylesheet_path.name}': {exc}",
+        "paths": [],
+    }
+
+
+def _finding_from_svrl_node(node: ET.Element, element_name: str, source: dict) -> dict:
+    role_value = node.attrib.get("role")
+    severity_value = node.attrib.get("severity") or node.attrib.get("flag") or role_value
+    code = (
+        node.attrib.get("id")
+        or node.attrib.get("flag")
+        or role_value
+        or f"{source['stylesheet'].stem}_{element_name}"
+    )
+    location = node.attrib.get("location")
+    return {
+        "code": code,
+        "ruleVersion": source["ruleVersion"],
+        "severity": _normalize_severity(severity_value),
+        "layer": "procedural",
+        "axis": _axis_from_code(code),
+        "message": _extract_text(node.find("svrl:text", SVRL_NS)),
+        "paths": [location] if location else [],
+    }
+
+
+def _collect_svrl_findings(
     svrl_text: str,
+    sources: list[dict],
     *,
-    stylesheet_path: Path,
-    rule_version: str | None,
-) -> list[dict]:
-    findings: list[dict] = []
-
+    pattern_sources: dict[str, int] | None = None,
+    max_findings: int | None = None,
+) -> tuple[list[dict], int]:
+    """Convert an SVRL report in a single streaming pass.
+
+    Findings are ordered by source stylesheet, then failed asserts, successful reports and errors,
+    each in document order. At most ``max_findings`` are built; the rest are only counted and the
+    number left out is returned alongside the findings. With ``pattern_sources`` the report of a
+    merged stylesheet is split back into its sources by ``patternId``; a finding without a known one
+    (``svrl:error`` output included) raises ``UnattributedSvrlFinding``. Raises ``ET.ParseError`` for
+    a malformed report.
+    """
+    buckets = [[[] for _ in _SVRL_FINDING_ELEMENTS] for _ in sources]
+    total = 0
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root: ET.Element | None = None
+    depth = 0
+
+    for offset in range(0, len(svrl_text), SVRL_FEED_CHARS):
+        parser.feed(svrl_text[offset : offset + SVRL_FEED_CHARS])
+        for event, element in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = element
+                depth += 1
+                continue
+
+            depth -= 1
+            kind = _SVRL_FINDING_TAGS.get(element.tag)
+            if kind is not None:
+                source_index = 0
+                if pattern_sources is not None:
+                    source_index = pattern_sources.get(element.attrib.get("patternId"))
+                    if source_index is None:
+                        raise UnattributedSvrlFinding(
+                            f"svrl:{_SVRL_FINDING_ELEMENTS[kind]} without a known patternId in the merged report."
+                        )
+                total += 1
+                bucket = buckets[source_index][kind]
+                if max_findings is None or len(bucket) < max_findings:
+                    bucket.append(
+                        _finding_from_svrl_node(element, _SVRL_FINDING_ELEMENTS[kind], sources[source_index])
+                    )
+            if depth == 1:
+                # Completed top-level entries are no longer needed; keep only the open path in memory.
+                del root[:]
+    parser.close()
+
+    findings = [finding for source_buckets in buckets for bucket in source_buckets for finding in bucket]
+    if max_findings is not None and len(findings) > max_findings:
+        del findings[max_findings:]
+    return findings, total - len(findings)
+
+
+def load_procedural_registry() -> ProceduralRegistry:
+    """Compile the stylesheets listed in the compile manifest into a new registry without installing it.
+
+    Failures are recorded on the registry instead of raised.
+    """
+    processor: PySaxonProcessor | None = None
+    executables: list[dict] = []
+    merged: dict | None = None
+    version = ""
     try:
-        svrl_root = ET.fromstring(svrl_text)
-    except ET.ParseError as exc:
-        return [
-            {
-                "code": "procedural_svrl_parse_error",
-                "ruleVersion": rule_version,
-                "severity": "error",
-                "layer": "procedural",
-                "axis": "none",
-                "message": f"SVRL parse error for stylesheet '{stylesheet_path.name}': {exc}",
-                "paths": [],
-            }
-        ]
-
-    for element_name in ("failed-assert", "successful-report", "error"):
-        for node in svrl_root.findall(f".//svrl:{element_name}", SVRL_NS):
-            role_value = node.attrib.get("role")
-            severity_value = node.attrib.get("severity") or node.attrib.get("flag") or role_value
-            code = (
-                node.attrib.get("id")
-                or node.attrib.get("flag")
-                or role_value
-                or f"{stylesheet_path.stem}_{element_name}"
-            )
-            location = node.attrib.get("location")
-            message = _extract_text(node.find("svrl:text", SVRL_NS))
-            findings.append(
+        entries = _compiled_stylesheets()
+        version = _rules_version(entries)
+        processor = PySaxonProcessor(license=False)
+        xslt30 = processor.new_xslt30_processor()
+
+        for entry in entries:
+            stylesheet_path = GENERATED_SCHEMATRON_DIR / entry["stylesheet"]
+            executable: PyXsltExecutable = xslt30.compile_stylesheet(stylesheet_file=str(stylesheet_path))
+            executables.append(
                 {
-                    "code": code,
-                    "ruleVersion": rule_version,
-                    "severity": _normalize_severity(severity_value),
-                    "layer": "procedural",
-                    "axis": _axis_from_code(code),
-                    "message": message,
-                    "paths": [location] if location else [],
+                    "stylesheet": stylesheet_path,
+                    "ruleVersion": entry["ruleVersion"],
+                    "digest": entry["digest"],
+                    "executable": executable,
                 }
             )
 
-    return findings
+        if PROCEDURAL_EXECUTION not in PROCEDURAL_EXECUTION_MODES:
+            logger.warning(
+                "Unknown PROCEDURAL_EXECUTION '%s'. Running rule sets sequentially.",
+                PROCEDURAL_EXECUTION,
+            )
+        elif PROCEDURAL_EXECUTION == "merged" and executables:
+            merged = _load_merged_executable(xslt30, executables)
+    except Exception as exc:
+        return ProceduralRegistry(
+            version,
+            processor,
+            executables,
+            error=f"Procedural validator initialization failed: {exc}",
+        )
+    return ProceduralRegistry(version, processor, executables, merged)
+
+
+def current_procedural_registry() -> ProceduralRegistry:
+    """The installed registry, loading one on first use."""
+    global _procedural_registry
+
+    registry = _procedural_registry
+    if registry is not None:
+        return registry
+
+    with _procedural_lock:
+        if _procedural_registry is None:
+            _procedural_registry = load_procedural_registry()
+        return _procedural_registry
 
 
 def initialize_procedural_validators() -> None:
-    global _procedural_initialized
-    global _procedural_init_error
-    global _procedural_processor
-    global _procedural_executables
+    current_procedural_registry()
+
+
+def pending_procedural_rules_version() -> str:
+    """Version of the compiled rule sets on disk, computed from the manifest without compiling them."""
+    return _rules_version(_compiled_stylesheets())
+
+
+def install_procedural_registry(registry: ProceduralRegistry) -> ProceduralRegistry | None:
+    """Make ``registry`` the one new documents use and return the previous one.
+
+    Raises ``ProceduralReloadError`` and keeps the installed registry if ``registry`` failed to load
+    or has no rule sets. The previous registry is not released: documents still running on it hold
+    a reference and it is freed once they finish.
+    """
+    global _procedural_registry
+
+    unavailable_message = registry.unavailable_message
+    if unavailable_message is not None:
+        raise ProceduralReloadError(unavailable_message)
 
     with _procedural_lock:
-        if _procedural_initialized:
-            return
+        previous = _procedural_registry
+        _procedural_registry = registry
+    return previous
 
-        _procedural_executables = []
-        _procedural_init_error = None
 
-        try:
-            _procedural_processor = PySaxonProcessor(license=False)
-            xslt30 = _procedural_processor.new_xslt30_processor()
-
-            if GENERATED_SCHEMATRON_DIR.exists():
-                stylesheet_paths = sorted(GENERATED_SCHEMATRON_DIR.rglob("*.xsl"))
-                for stylesheet_path in stylesheet_paths:
-                    executable: PyXsltExecutable = xslt30.compile_stylesheet(
-                        stylesheet_file=str(stylesheet_path)
-                    )
-                    _procedural_executables.append(
-                        {
-                            "stylesheet": stylesheet_path,
-                            "ruleVersion": _rule_version_for(stylesheet_path),
-                            "executable": executable,
-                        }
-                    )
-        except Exception as exc:
-            _procedural_init_error = f"Procedural validator initialization failed: {exc}"
-        finally:
-            _procedural_initialized = True
+def reload_procedural_validators() -> ProceduralRegistry:
+    """Compile the rule sets on disk and swap them in; validation keeps running meanwhile.
 
+    Returns the installed registry. Raises ``ProceduralReloadError`` if the new rule sets failed to load.
+    """
+    registry = load_procedural_registry()
+    install_procedural_registry(registry)
+    logger.info("Installed procedural rule sets %s (%d stylesheets).", registry.version, len(registry.executables))
+    return registry
 
-def _run_procedural_validation(xml_bytes: bytes) -> list[dict]:
-    procedural_available, unavailable_message = _procedural_availability_status()
-    if not procedural_available:
-        return [
-            {
-                "code": "procedural_validator_unavailable",
-                "ruleVersion": None,
-                "severity": "error",
-                "layer": "procedural",
-                "axis": "none",
-                "message": unavailable_message,
-                "paths": [],
-            }
+
+def _load_merged_executable(xslt30, executables: list[dict]) -> dict | None:
+    manifest_path = GENERATED_SCHEMATRON_MERGED_DIR / MERGED_MANIFEST_FILE
+    if not manifest_path.exists():
+        logger.warning(
+            "No merged procedural stylesheet found in %s. Running rule sets one by one.",
+            GENERATED_SCHEMATRON_MERGED_DIR,
+        )
+        return None
+
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        sources = manifest["sources"]
+        compiled = [
+            (item["stylesheet"].relative_to(GENERATED_SCHEMATRON_DIR).as_posix(), item["digest"])
+            for item in executables
         ]
+        if [(source["stylesheet"], source["digest"]) for source in sources] != compiled:
+            logger.warning(
+                "Merged procedural stylesheet does not match the compiled rule sets. "
+                "Running rule sets one by one."
+            )
+            return None
+
+        executable: PyXsltExecutable = xslt30.compile_stylesheet(
+            stylesheet_file=str(GENERATED_SCHEMATRON_MERGED_DIR / manifest["stylesheet"])
+        )
+    except Exception as exc:
+        logger.warning("Failed to load merged procedural stylesheet: %s", exc)
+        return None
+
+    return {
+        "executable": executable,
+        "patterns": {
+            pattern_id: index for index, source in enumerate(sources) for pattern_id in source["patterns"]
+        },
+    }
+
+
+def _procedural_pool() -> ThreadPoolExecutor:
+    global _procedural_thread_pool
+
+    with _procedural_lock:
+        if _procedural_thread_pool is None:
+            _procedural_thread_pool = ThreadPoolExecutor(
+                max_workers=PROCEDURAL_THREADS,
+                thread_name_prefix="procedural",
+            )
+        return _procedural_thread_pool
+
+
+def _procedural_unavailable_findings(registry: ProceduralRegistry) -> list[dict] | None:
+    unavailable_message = registry.unavailable_message
+    if unavailable_message is None:
+        return None
+    return [
+        {
+            "code": "procedural_validator_unavailable",
+            "ruleVersion": None,
+            "severity": "error",
+            "layer": "procedural",
+            "axis": "none",
+            "message": unavailable_message,
+            "paths": [],
+        }
+    ]
+
+
+def _procedural_runtime_error(stylesheet_path: Path, rule_version: str | None, exc: Exception) -> dict:
+    return {
+        "code": "procedural_validation_runtime_error",
+        "ruleVersion": rule_version,
+        "severity": "error",
+        "layer": "procedural",
+        "axis": "none",
+        "message": f"Procedural validation failed for stylesheet '{stylesheet_path.name}': {exc}",
+        "paths": [],
+    }
+
+
+def effective_max_findings(requested: int | None = None) -> int | None:
+    """Combine a per-request finding limit with the PROCEDURAL_MAX_FINDINGS ceiling (``None`` = no limit)."""
+    ceiling = PROCEDURAL_MAX_FINDINGS or None
+    if requested is None:
+        return ceiling
+    if ceiling is None:
+        return requested
+    return min(requested, ceiling)
+
+
+def _run_procedural_validation(
+    registry: ProceduralRegistry,
+    document: ParsedXmlDocument,
+    max_findings: int | None = None,
+) -> tuple[list[dict], int]:
+    unavailable_findings = _procedural_unavailable_findings(registry)
+    if unavailable_findings is not None:
+        return unavailable_findings, 0
+
+    # Parse once into an XDM tree shared by every compiled rule set instead of one parse per stylesheet.
+    try:
+        xdm_node = registry.processor.parse_xml(
+            xml_text=decode_xml_text(document.xml_bytes),
+            encoding="utf-8",
+        )
+    except Exception as exc:
+        return [
+            _procedural_runtime_error(item["stylesheet"], item["ruleVersion"], exc)
+            for item in registry.executables
+        ], 0
+    return _run_procedural_executables(registry, {"xdm_node": xdm_node}, max_findings=max_findings)
+
+
+def _run_procedural_validation_on_file(
+    registry: ProceduralRegistry,
+    xml_path: Path,
+    max_findings: int | None = None,
+) -> tuple[list[dict], int]:
+    unavailable_findings = _procedural_unavailable_findings(registry)
+    if unavailable_findings is not None:
+        return unavailable_findings, 0
+    return _run_procedural_executables(registry, {"source_file": str(xml_path)}, max_findings=max_findings)
+
+
+def _run_procedural_executable(item: dict, source: dict, max_findings: int | None) -> tuple[list[dict], int]:
+    stylesheet_path = item["stylesheet"]
+    executable: PyXsltExecutable = item["executable"]
+    rule_version: str | None = item["ruleVersion"]
+
+    try:
+        with STYLESHEET_SECONDS.time(stylesheet_path.name):
+            svrl_text = executable.transform_to_string(**source)
+    except Exception as exc:
+        return [_procedural_runtime_error(stylesheet_path, rule_version, exc)], 0
+
+    try:
+        with STAGE_SECONDS.time("svrl"):
+            return _collect_svrl_findings(svrl_text, [item], max_findings=max_findings)
+    except ET.ParseError as exc:
+        return [_svrl_parse_error(stylesheet_path, rule_version, exc)], 0
+
+
+def _run_merged_executable(
+    merged: dict,
+    executables: list[dict],
+    source: dict,
+    max_findings: int | None,
+) -> tuple[list[dict], int] | None:
+    try:
+        with STYLESHEET_SECONDS.time("merged"):
+            svrl_text = merged["executable"].transform_to_string(**source)
+        with STAGE_SECONDS.time("svrl"):
+            return _collect_svrl_findings(
+                svrl_text,
+                executables,
+                pattern_sources=merged["patterns"],
+                max_findings=max_findings,
+            )
+    except Exception:
+        # Let the rule sets run one by one so the failure, or a finding the merged report cannot
+        # attribute, is reported against its own stylesheet.
+        return None
+
+
+def _run_procedural_executables(
+    registry: ProceduralRegistry,
+    source: dict,
+    *,
+    max_findings: int | None = None,
+) -> tuple[list[dict], int]:
+    executables = registry.executables
+    merged = registry.merged
+
+    if merged is not None:
+        result = _run_merged_executable(merged, executables, source, max_findings)
+        if result is not None:
+            return result
+
+    if PROCEDURAL_EXECUTION == "parallel" and len(executables) > 1:
+        # Compiled executables are safe to share between threads; the results keep stylesheet order.
+        batches = _procedural_pool().map(
+            lambda item: _run_procedural_executable(item, source, max_findings),
+            executables,
+        )
+    else:
+        batches = (_run_procedural_executable(item, source, max_findings) for item in executables)
 
     findings: list[dict] = []
-    with tempfile.NamedTemporaryFile(suffix=".xml", delete=False) as temp_file:
-        temp_file.write(xml_bytes)
-        temp_path = Path(temp_file.name)
+    truncated = 0
+    for batch_findings, batch_truncated in batches:
+        findings.extend(batch_findings)
+        truncated += batch_truncated
+    if max_findings is not None and len(findings) > max_findings:
+        truncated += len(findings) - max_findings
+        del findings[max_findings:]
+    return findings, truncated
+
+
+def structural_error_limit(mode: str) -> int | None:
+    """Translate an XSD error mode (``all``, ``first`` or ``max:N``) into an error limit."""
+    if mode == "all":
+        return None
+    if mode == "first":
+        return 1
+    if mode.startswith("max:") and mode[4:].isdigit() and int(mode[4:]) >= 1:
+        return int(mode[4:])
+    raise ValueError(f"Unsupported error mode '{mode}'. Use 'first', 'max:N' or 'all'.")
+
+
+def _collect_validation_errors(errors, error_limit: int | None) -> tuple[list[str], bool | None]:
+    """Format XSD errors, stopping the validation walk once more than ``error_limit`` errors were seen.
+
+    The second value is ``True`` only if the walk stopped early, so a document with exactly
+    ``error_limit`` errors was still validated completely.
+    """
+    if error_limit is None:
+        return [_format_validation_error(error) for error in errors], None
     try:
-        for item in _procedural_executables:
-            stylesheet_path = item["stylesheet"]
-            executable: PyXsltExecutable = item["executable"]
-            rule_version: str | None = item["ruleVersion"]
-
-            try:
-                svrl_text = executable.transform_to_string(source_file=str(temp_path))
-                findings.extend(
-                    _to_findings_from_svrl(
-                        svrl_text,
-                        stylesheet_path=stylesheet_path,
-                        rule_version=rule_version,
-                    )
-                )
-            except Exception as exc:
-                findings.append(
-                    {
-                        "code": "procedural_validation_runtime_error",
-                        "ruleVersion": rule_version,
-                        "severity": "error",
-                        "layer": "procedural",
-                        "axis": "none",
-                        "message": (
-                            f"Procedural validation failed for stylesheet '{stylesheet_path.name}': {exc}"
-                        ),
-                        "paths": [],
-                    }
-                )
+        validation_errors = [_format_validation_error(error) for error in islice(errors, error_limit + 1)]
     finally:
-        try:
-            temp_path.unlink(missing_ok=True)
-        except OSError:
-            pass
+        errors.close()
+    limit_reached = len(validation_errors) > error_limit
+    return validation_errors[:error_limit], limit_reached
+
 
-    return findings
+def validate_xml(
+    xml_bytes: bytes,
+    procedural: bool = False,
+    max_findings: int | None = None,
+    mode: str = "all",
+) -> dict:
+    with STAGE_SECONDS.time("parse"):
+        document = parse_xml_document(xml_bytes)
+    return validate_document(
+        document,
+        procedural=procedural,
+        max_findings=max_findings,
+        mode=mode,
+    )
 
 
-def validate_xml(xml_bytes: bytes, procedural: bool = False) -> dict:
+def validate_document(
+    document: ParsedXmlDocument,
+    procedural: bool = False,
+    max_findings: int | None = None,
+    mode: str = "all",
+) -> dict:
     namespaces: list[dict] = []
     analysis = {
         "taxProceduresFound": [],
@@ -302,11 +704,14 @@ def validate_xml(xml_bytes: bytes, procedural: bool = False) -> dict:
         "snapshotWarning": False,
     }
     procedural_available: bool | None = None
+    error_limit = structural_error_limit(mode)
+    limit_reached: bool | None = None if error_limit is None else False
 
     if procedural:
-        procedural_available, _ = _procedural_availability_status()
+        # The registry is taken once so a concurrent reload cannot change the rules mid-document.
+        registry, procedural_available, _ = _procedural_availability_status()
 
-    if not xml_bytes:
+    if not document.xml_bytes:
         return _build_response(
             xsd_valid=False,
             structural_errors=["XML parse error: empty payload."],
@@ -314,13 +719,129 @@ def validate_xml(xml_bytes: bytes, procedural: bool = False) -> dict:
             analysis=analysis,
             procedural_findings=[],
             procedural_available=procedural_available,
+            structural_errors_limit_reached=limit_reached,
+        )
+
+    if document.namespaces:
+        namespaces = document.namespaces
+
+    if document.parse_error:
+        return _build_response(
+            xsd_valid=False,
+            structural_errors=[document.parse_error],
+            namespaces=namespaces,
+            analysis=_detect_tax_procedures(document.root),
+            procedural_findings=[],
+            procedural_available=procedural_available,
+            structural_errors_limit_reached=limit_reached,
+        )
+
+    try:
+        schema = _get_schema()
+        with STAGE_SECONDS.time("xsd"):
+            validation_errors, limit_reached = _collect_validation_errors(
+                schema.iter_errors(document.root, namespaces=document.namespace_map),
+                error_limit,
+            )
+    except Exception as exc:
+        if isinstance(exc, ET.ParseError):
+            message = f"XML parse error: {exc}"
+        else:
+            message = f"Validation processing error: {exc}"
+        return _build_response(
+            xsd_valid=False,
+            structural_errors=[message],
+            namespaces=namespaces,
+            analysis=_detect_tax_procedures(document.root),
+            procedural_findings=[],
+            procedural_available=procedural_available,
+            structural_errors_limit_reached=limit_reached,
         )
 
-    root, parsed_namespaces, parse_error = parse_xml_once(xml_bytes)
-    if parsed_namespaces:
-        namespaces = parsed_namespaces
+    # A limited mode that stopped at its limit has not walked the whole tree; the analysis would.
+    analysis = None if limit_reached else _detect_tax_procedures(document.root)
+    xsd_valid = len(validation_errors) == 0
+    procedural_findings: list[dict] = []
+    procedural_findings_truncated = 0
+    if procedural and xsd_valid:
+        with STAGE_SECONDS.time("schematron"):
+            procedural_findings, procedural_findings_truncated = _run_procedural_validation(
+                registry,
+                document,
+                effective_max_findings(max_findings),
+            )
+
+    return _build_response(
+        xsd_valid=xsd_valid,
+        structural_errors=validation_errors,
+        namespaces=namespaces,
+        analysis=analysis,
+        procedural_findings=procedural_findings,
+        procedural_available=procedural_available,
+        procedural_findings_truncated=procedural_findings_truncated,
+        structural_errors_limit_reached=limit_reached,
+    )
 
-    analysis = _detect_tax_procedures(root)
+
+def is_xsd_valid(document: ParsedXmlDocument) -> bool:
+    """Return only ``xsdValid``: stops at the first XSD error and skips analysis and procedural checks."""
+    if not document.xml_bytes or document.parse_error or document.root is None:
+        return False
+    try:
+        errors = _get_schema().iter_errors(document.root, namespaces=document.namespace_map)
+        try:
+            with STAGE_SECONDS.time("xsd"):
+                return next(errors, None) is None
+        finally:
+            errors.close()
+    except Exception:
+        return False
+
+
+def is_xsd_valid_file(xml_path: Path | str) -> bool:
+    """Like ``is_xsd_valid`` for a document on disk, validated lazily without building its tree."""
+    try:
+        resource = xmlschema.XMLResource(str(xml_path), lazy=True)
+        errors = _get_schema().iter_errors(resource)
+        try:
+            with STAGE_SECONDS.time("xsd"):
+                return next(errors, None) is None
+        finally:
+            errors.close()
+    except Exception:
+        return False
+
+
+def validate_xml_file(
+    xml_path: Path | str,
+    procedural: bool = False,
+    max_findings: int | None = None,
+    mode: str = "all",
+) -> dict:
+    """Validate a document on disk with memory bounded by tree depth instead of document size."""
+    xml_path = Path(xml_path)
+    procedural_available: bool | None = None
+    error_limit = structural_error_limit(mode)
+    limit_reached: bool | None = None if error_limit is None else False
+
+    if procedural:
+        # The registry is taken once so a concurrent reload cannot change the rules mid-document.
+        registry, procedural_available, _ = _procedural_availability_status()
+
+    if xml_path.stat().st_size == 0:
+        return _build_response(
+            xsd_valid=False,
+            structural_errors=["XML parse error: empty payload."],
+            namespaces=[],
+            analysis=_analysis_from_procedures(set()),
+            procedural_findings=[],
+            procedural_available=procedural_available,
+            structural_errors_limit_reached=limit_reached,
+        )
+
+    with xml_path.open("rb") as source, STAGE_SECONDS.time("scan"):
+        namespaces, procedures, parse_error = scan_xml_stream(source)
+    analysis = _analysis_from_procedures(procedures if parse_error is None else set())
 
     if parse_error:
         return _build_response(
@@ -330,13 +851,14 @@ def validate_xml(xml_bytes: bytes, procedural: bool = False) -> dict:
             analysis=analysis,
             procedural_findings=[],
             procedural_available=procedural_available,
+            structural_errors_limit_reached=limit_reached,
         )
 
     try:
         schema = _get_schema()
-        validation_errors = [
-            _format_validation_error(error) for error in schema.iter_errors(xml_bytes)
-        ]
+        resource = xmlschema.XMLResource(str(xml_path), lazy=True)
+        with STAGE_SECONDS.time("xsd"):
+            validation_errors, limit_reached = _collect_validation_errors(schema.iter_errors(resource), error_limit)
     except Exception as exc:
         if isinstance(exc, ET.ParseError):
             message = f"XML parse error: {exc}"
@@ -349,12 +871,19 @@ def validate_xml(xml_bytes: bytes, procedural: bool = False) -> dict:
             analysis=analysis,
             procedural_findings=[],
             procedural_available=procedural_available,
+            structural_errors_limit_reached=limit_reached,
         )
 
     xsd_valid = len(validation_errors) == 0
     procedural_findings: list[dict] = []
+    procedural_findings_truncated = 0
     if procedural and xsd_valid:
-        procedural_findings = _run_procedural_validation(xml_bytes)
+        with STAGE_SECONDS.time("schematron"):
+            procedural_findings, procedural_findings_truncated = _run_procedural_validation_on_file(
+                registry,
+                xml_path,
+                effective_max_findings(max_findings),
+            )
 
     return _build_response(
         xsd_valid=xsd_valid,
@@ -363,21 +892,42 @@ def validate_xml(xml_bytes: bytes, procedural: bool = False) -> dict:
         analysis=analysis,
         procedural_findings=procedural_findings,
         procedural_available=procedural_available,
+        procedural_findings_truncated=procedural_findings_truncated,
+        structural_errors_limit_reached=limit_reached,
     )
 
 
+def validate_xml_path(
+    xml_path: Path | str,
+    procedural: bool = False,
+    max_findings: int | None = None,
+    mode: str = "all",
+    *,
+    stream_above_bytes: int,
+) -> dict:
+    xml_path = Path(xml_path)
+    if xml_path.stat().st_size > stream_above_bytes:
+        return validate_xml_file(xml_path, procedural=procedural, max_findings=max_findings, mode=mode)
+    return validate_xml(xml_path.read_bytes(), procedural=procedural, max_findings=max_findings, mode=mode)
+
+
+def warm_validation_resources() -> None:
+    _get_schema()
+    initialize_procedural_validators()
+
+
 def close_procedural_validators() -> None:
-    global _procedural_initialized
-    global _procedural_init_error
-    global _procedural_processor
-    global _procedural_executables
+    global _procedural_registry
+    global _procedural_thread_pool
 
     with _procedural_lock:
-        processor = _procedural_processor
-        _procedural_processor = None
-        _procedural_executables = []
-        _procedural_init_error = None
-        _procedural_initialized = False
+        processor = _procedural_registry.processor if _procedural_registry is not None else None
+        thread_pool = _procedural_thread_pool
+        _procedural_registry = None
+        _procedural_thread_pool = None
+
+        if thread_pool is not None:
+            thread_pool.shutdown(wait=False)
 
         if processor is not None:
             release_method = getattr(processor, "release", None)
@@ -390,11 +940,7 @@ def close_procedural_validators() -> None:
 
 def _detect_tax_procedures(root: ET.Element | None) -> dict:
     if root is None:
-        return {
-            "taxProceduresFound": [],
-            "phaseDetected": "unknown",
-            "snapshotWarning": False,
-        }
+        return _analysis_from_procedures(set())
 
     procedures = set()
 
@@ -403,6 +949,10 @@ def _detect_tax_procedures(root: ET.Element | None) -> dict:
         if value:
             procedures.add(value)
 
+    return _analysis_from_procedures(procedures)
+
+
+def _analysis_from_procedures(procedures: set[str]) -> dict:
     if not procedures:
         phase = "unknown"
     elif procedures == {"declaration"}:
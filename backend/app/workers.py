@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from threading import Lock
+from typing import Callable
+
+from app.metrics import METRICS, buffer_observations, take_observations
+
+
+WORKER_MODES = {"process", "thread"}
+WORKER_MODE = os.environ.get("VALIDATION_WORKER_MODE", "process").strip().lower()
+WORKER_COUNT = int(os.environ.get("VALIDATION_WORKERS", str(min(4, os.cpu_count() or 1))))
+WORKER_QUEUE_LIMIT = int(os.environ.get("VALIDATION_QUEUE_LIMIT", "16"))
+WORKER_JOB_TIMEOUT_SECONDS = float(os.environ.get("VALIDATION_JOB_TIMEOUT_SECONDS", "60"))
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPoolSaturatedError(RuntimeError):
+    pass
+
+
+class WorkerJobTimeoutError(RuntimeError):
+    pass
+
+
+def _warm_worker() -> None:
+    from app.validation import warm_validation_resources
+
+    try:
+        warm_validation_resources()
+    except Exception as exc:
+        logger.exception("Failed to warm validation worker: %s", exc)
+
+
+def _warm_process_worker() -> None:
+    buffer_observations()
+    _warm_worker()
+
+
+def _worker_ready() -> bool:
+    return True
+
+
+def _worker_processes(executor: Executor) -> list:
+    # ProcessPoolExecutor has no public way to stop a busy worker before Python 3.14, and it forgets its
+    # processes on shutdown, so they are taken before that.
+    return list((getattr(executor, "_processes", None) or {}).values())
+
+
+def _observed_call(func: Callable, args: tuple, kwargs: dict):
+    """Run a job and return its result with the metric observations the worker made since the last job."""
+    return func(*args, **kwargs), take_observations()
+
+
+class ValidationWorkerPool:
+    def __init__(
+        self,
+        *,
+        mode: str = WORKER_MODE,
+        workers: int = WORKER_COUNT,
+        queue_limit: int = WORKER_QUEUE_LIMIT,
+        job_timeout_seconds: float = WORKER_JOB_TIMEOUT_SECONDS,
+    ):
+        if mode not in WORKER_MODES:
+            raise ValueError(f"Unsupported worker mode '{mode}'. Expected one of {sorted(WORKER_MODES)}.")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.queue_limit = max(self.workers, queue_limit)
+        self.job_timeout_seconds = job_timeout_seconds
+
+        self._executor: Executor | None = None
+        self._lock = Lock()
+        self._in_flight = 0
+        self._jobs: dict[Executor, set[Future]] = {}
+        self._timed_out: set[Future] = set()
+        self._retired: dict[Executor, list] = {}
+
+    @property
+    def queue_depth(self) -> int:
+        return self._in_flight
+
+    def _create_executor(self) -> Executor:
+        if self.mode == "thread":
+            return ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="validation-worker",
+                initializer=_warm_worker,
+            )
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_process_worker,
+        )
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    async def start(self) -> None:
+        executor = self._get_executor()
+        # Submitting one job per worker forces every worker to spawn and run its warm-up initializer.
+        warmups = [asyncio.wrap_future(executor.submit(_worker_ready)) for _ in range(self.workers)]
+        await asyncio.gather(*warmups)
+
+    async def restart(self) -> None:
+        """Replace the workers with fresh ones that warm up on the current rule sets.
+
+        Jobs keep going to the current workers until the new ones are ready. Jobs already submitted
+        finish on the previous workers, which shut down afterwards.
+        """
+        executor = self._create_executor()
+        try:
+            await asyncio.gather(*[asyncio.wrap_future(executor.submit(_worker_ready)) for _ in range(self.workers)])
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+        with self._lock:
+            previous = self._executor
+            self._executor = executor
+        if previous is not None:
+            self._retire_executor(previous)
+
+    def _stuck_processes(self, executor: Executor) -> list:
+        """Processes of a retired executor whose remaining jobs all timed out, or an empty list."""
+        jobs = self._jobs.get(executor)
+        if executor in self._retired and jobs and jobs <= self._timed_out:
+            return self._retired.pop(executor)
+        return []
+
+    def _retire_executor(self, executor: Executor) -> None:
+        """Stop sending jobs to ``executor`` and shut it down once its jobs finish.
+
+        Jobs that already timed out are not waited for: once only those are left, the worker processes
+        are terminated so they stop using CPU and free their slots.
+        """
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+            if self._jobs.get(executor) and executor not in self._retired:
+                self._retired[executor] = _worker_processes(executor)
+            stuck = self._stuck_processes(executor)
+        executor.shutdown(wait=False)
+        for process in stuck:
+            process.terminate()
+
+    def _release_slot(self, executor: Executor, future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._timed_out.discard(future)
+            jobs = self._jobs.get(executor, set())
+            jobs.discard(future)
+            if not jobs and executor is not self._executor:
+                self._jobs.pop(executor, None)
+                self._retired.pop(executor, None)
+            stuck = self._stuck_processes(executor)
+        for process in stuck:
+            process.terminate()
+        if not future.cancelled() and future.exception() is None:
+            METRICS.record(future.result()[1])
+
+    def _reset_broken_executor(self, executor: Executor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable, *args, **kwargs):
+        with self._lock:
+            if self._in_flight >= self.queue_limit:
+                raise WorkerPoolSaturatedError("Validation worker queue is full.")
+            self._in_flight += 1
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(_observed_call, func, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        with self._lock:
+            self._jobs.setdefault(executor, set()).add(future)
+        # The slot is released when the job really finishes, so timed-out jobs count against the queue
+        # until their worker is terminated.
+        future.add_done_callback(partial(self._release_slot, executor))
+
+        try:
+            result, _ = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.job_timeout_seconds)
+            return result
+        except asyncio.TimeoutError as exc:
+            if not future.cancel() and self.mode == "process":
+                # A running job cannot be cancelled. Later jobs go to fresh workers, and the stuck worker
+                # is terminated once the other jobs on its pool are done.
+                with self._lock:
+                    if not future.done():
+                        self._timed_out.add(future)
+                logger.warning("Validation job timed out. Recycling the worker processes.")
+                self._retire_executor(executor)
+            raise WorkerJobTimeoutError(
+                f"Validation job exceeded {self.job_timeout_seconds:g} seconds."
+            ) from exc
+        except BrokenProcessPool:
+            logger.error("Validation worker process terminated unexpectedly. Restarting pool.")
+            self._reset_broken_executor(executor)
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
\ No newline at end of file
@@ -1,5 +1,11 @@
+import codecs
+import hashlib
 import io
-from collections import defaultdict
+import re
+import struct
+import sys
+from array import array
+from typing import BinaryIO
 from xml.etree import ElementTree as ET
 
 
@@ -9,7 +15,57 @@ def local_name(tag: str) -> str:
     return tag
 
 
-def parse_xml_once(xml_bytes: bytes) -> tuple[ET.Element | None, list[dict], str | None]:
+class ParsedXmlDocument:
+    """One parse of an XML payload, shared by every validation stage of a request."""
+
+    __slots__ = ("xml_bytes", "root", "namespaces", "parse_error")
+
+    def __init__(
+        self,
+        xml_bytes: bytes,
+        root: ET.Element | None,
+        namespaces: list[dict],
+        parse_error: str | None,
+    ):
+        self.xml_bytes = xml_bytes
+        self.root = root
+        self.namespaces = namespaces
+        self.parse_error = parse_error
+
+    @property
+    def namespace_map(self) -> dict[str, str]:
+        return {item["prefix"]: item["uri"] for item in self.namespaces}
+
+
+_XML_DECLARATION_ENCODING = re.compile(rb"""^<\?xml[^>]*?\bencoding\s*=\s*["']([A-Za-z][A-Za-z0-9._-]*)["']""")
+_BYTE_ORDER_MARKS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+
+def decode_xml_text(xml_bytes: bytes) -> str:
+    """Decode a payload the way an XML parser would: byte order mark, then declaration, then UTF-8."""
+    for bom, encoding in _BYTE_ORDER_MARKS:
+        if xml_bytes.startswith(bom):
+            return xml_bytes[len(bom):].decode(encoding)
+
+    match = _XML_DECLARATION_ENCODING.match(xml_bytes)
+    encoding = match.group(1).decode("ascii") if match else "utf-8"
+    return xml_bytes.decode(encoding)
+
+
+def _ordered_namespaces(namespaces: dict[str, str]) -> list[dict]:
+    return [
+        {"prefix": prefix, "uri": uri}
+        for prefix, uri in sorted(namespaces.items(), key=lambda item: (item[0], item[1]))
+    ]
+
+
+def parse_xml_document(xml_bytes: bytes) -> ParsedXmlDocument:
     namespaces: dict[str, str] = {}
 
     try:
@@ -22,35 +78,415 @@ def parse_xml_once(xml_bytes: bytes) -> tuple[ET.Element | None, list[dict], str
                 if key not in namespaces:
                     namespaces[key] = uri
 
-        root = parser.root
-        ordered_namespaces = [
-            {"prefix": prefix, "uri": uri}
-            for prefix, uri in sorted(namespaces.items(), key=lambda item: (item[0], item[1]))
-        ]
-        return root, ordered_namespaces, None
+        return ParsedXmlDocument(xml_bytes, parser.root, _ordered_namespaces(namespaces), None)
+    except ET.ParseError as exc:
+        return ParsedXmlDocument(
+            xml_bytes, None, _ordered_namespaces(namespaces), f"XML parse error: {exc}"
+        )
+
+
+def scan_xml_stream(
+    source: BinaryIO,
+    *,
+    attribute: str = "taxProcedure",
+) -> tuple[list[dict], set[str], str | None]:
+    """Collect namespace declarations and values of ``attribute`` without keeping the tree.
+
+    Every element is dropped from its parent once it has been read, so memory stays
+    proportional to the nesting depth rather than the document size.
+    """
+    namespaces: dict[str, str] = {}
+    attribute_values: set[str] = set()
+    open_elements: list[ET.Element] = []
+
+    try:
+        for event, data in ET.iterparse(source, events=("start", "end", "start-ns")):
+            if event == "start-ns":
+                prefix, uri = data
+                key = prefix or ""
+                if key not in namespaces:
+                    namespaces[key] = uri
+            elif event == "start":
+                value = data.attrib.get(attribute)
+                if value:
+                    attribute_values.add(value)
+                open_elements.append(data)
+            else:
+                open_elements.pop()
+                data.clear()
+                if open_elements:
+                    # The finished element is always the last child appended to its parent.
+                    del open_elements[-1][-1]
+        return _ordered_namespaces(namespaces), attribute_values, None
     except ET.ParseError as exc:
-        ordered_namespaces = [
-            {"prefix": prefix, "uri": uri}
-            for prefix, uri in sorted(namespaces.items(), key=lambda item: (item[0], item[1]))
+        return _ordered_namespaces(namespaces), attribute_values, f"XML parse error: {exc}"
+
+
+def parse_xml_once(xml_bytes: bytes) -> tuple[ET.Element | None, list[dict], str | None]:
+    document = parse_xml_document(xml_bytes)
+    return document.root, document.namespaces, document.parse_error
+
+
+def identity_segment(node: ET.Element, name: str, identity_keys: dict[str, str]) -> str:
+    """Path segment of an element, qualified by its identity key when one is configured and present.
+
+    A key is either an attribute (``@positionId``) or the text of a direct child element (``vn``).
+    """
+    key = identity_keys.get(name)
+    if key is None:
+        return name
+
+    if key.startswith("@"):
+        value = node.get(key[1:])
+    else:
+        value = None
+        for child in node:
+            if local_name(child.tag) == key:
+                value = (child.text or "").strip()
+                break
+    if not value:
+        return name
+    return f"{name}[{key}='{value}']"
+
+
+def _child_segment(
+    child: ET.Element,
+    identity_keys: dict[str, str] | None,
+    keyed_segments: dict[str, int],
+) -> str:
+    child_name = local_name(child.tag)
+    if not identity_keys or child_name not in identity_keys:
+        return child_name
+
+    segment = identity_segment(child, child_name, identity_keys)
+    if segment == child_name:
+        return child_name
+    # Duplicate keys within one parent are told apart by occurrence.
+    occurrence = keyed_segments.get(segment, 0) + 1
+    keyed_segments[segment] = occurrence
+    return segment if occurrence == 1 else f"{segment}[{occurrence}]"
+
+
+def collect_leaf_values(
+    root: ET.Element,
+    identity_keys: dict[str, str] | None = None,
+) -> dict[str, list[str]]:
+    """Map every leaf path to its values in document order.
+
+    Repeated elements share a path and are told apart by position, unless ``identity_keys`` names
+    a key for them; keyed elements get their own path segment, so they line up by identity.
+    """
+    return build_document_index(root, identity_keys).leaf_values()
+
+
+DIGEST_SIZE = 16
+# Bumped whenever the layout of DocumentIndex changes, so persisted indexes are rebuilt.
+DOCUMENT_INDEX_FORMAT = 3
+# Typecodes of the DocumentIndex arrays, in the order ``to_bytes`` writes them.
+_INDEX_ARRAYS = (
+    ("parents", "i"),
+    ("child_offsets", "I"),
+    ("child_ids", "I"),
+    ("value_offsets", "I"),
+    ("value_slots", "I"),
+    ("value_bounds", "I"),
+)
+
+
+class DocumentIndex:
+    """Compact leaf index of a document with a Merkle fingerprint for every path.
+
+    Paths are interned as ids into a table of parent ids and segments, path id 0 being the root.
+    Each element is hashed bottom-up from its name, attributes, leaf text and the hashes of its
+    children; the fingerprint of a path covers all elements at that path in document order, so two
+    documents with the same fingerprint for a path have identical leaf values beneath it.
+
+    Children, leaf values and fingerprints live in flat arrays indexed by path id, and all leaf
+    values share one string, which keeps the index small and cheap to pickle or encode with ``to_bytes``.
+    """
+
+    __slots__ = (
+        "segments",
+        "parents",
+        "child_offsets",
+        "child_ids",
+        "value_offsets",
+        "value_slots",
+        "value_bounds",
+        "text",
+        "digests",
+    )
+
+    def __init__(
+        self,
+        segments: list[str],
+        parents: array,
+        child_offsets: array,
+        child_ids: array,
+        value_offsets: array,
+        value_slots: array,
+        value_bounds: array,
+        text: str,
+        digests: bytes,
+    ):
+        self.segments = segments
+        self.parents = parents
+        self.child_offsets = child_offsets
+        self.child_ids = child_ids
+        self.value_offsets = value_offsets
+        self.value_slots = value_slots
+        self.value_bounds = value_bounds
+        self.text = text
+        self.digests = digests
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    @property
+    def fingerprint(self) -> str:
+        return self.digest(0).hex()
+
+    def digest(self, path_id: int) -> bytes:
+        return self.digests[path_id * DIGEST_SIZE:(path_id + 1) * DIGEST_SIZE]
+
+    def path(self, path_id: int) -> str:
+        segments = []
+        while path_id >= 0:
+            segments.append(self.segments[path_id])
+            path_id = self.parents[path_id]
+        return "/".join(reversed(segments))
+
+    def children(self, path_id: int) -> array:
+        """Child path ids in the order they first occur in the document."""
+        return self.child_ids[self.child_offsets[path_id]:self.child_offsets[path_id + 1]]
+
+    def values(self, path_id: int) -> list[str]:
+        bounds, text = self.value_bounds, self.text
+        return [
+            text[bounds[slot]:bounds[slot + 1]]
+            for slot in self.value_slots[self.value_offsets[path_id]:self.value_offsets[path_id + 1]]
         ]
-        return None, ordered_namespaces, f"XML parse error: {exc}"
+
+    def leaf_values(self) -> dict[str, list[str]]:
+        return {
+            self.path(path_id): self.values(path_id)
+            for path_id in range(len(self.segments))
+            if self.value_offsets[path_id] != self.value_offsets[path_id + 1]
+        }
+
+    def to_bytes(self) -> bytes:
+        """Data-only encoding: part lengths, then the arrays (little-endian), segments, text and digests."""
+        parts = []
+        for name, _ in _INDEX_ARRAYS:
+            values = getattr(self, name)
+            if sys.byteorder == "big":
+                values = array(values.typecode, values)
+                values.byteswap()
+            parts.append(values.tobytes())
+        # Segments are element names and identity values, which cannot contain NUL in XML.
+        parts.append("\0".join(self.segments).encode("utf-8"))
+        parts.append(self.text.encode("utf-8"))
+        parts.append(self.digests)
+        return struct.pack(f"<{len(parts)}Q", *(len(part) for part in parts)) + b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "DocumentIndex":
+        """Decode ``to_bytes`` output. Raises ``ValueError`` for malformed data."""
+        header = struct.Struct(f"<{len(_INDEX_ARRAYS) + 3}Q")
+        try:
+            lengths = header.unpack_from(data)
+        except struct.error as exc:
+            raise ValueError(f"Malformed document index: {exc}") from exc
+        parts = []
+        offset = header.size
+        for length in lengths:
+            parts.append(data[offset:offset + length])
+            offset += length
+        if offset != len(data):
+            raise ValueError("Malformed document index: length mismatch.")
+
+        arrays = []
+        for (_, typecode), part in zip(_INDEX_ARRAYS, parts):
+            values = array(typecode)
+            values.frombytes(part)
+            if sys.byteorder == "big":
+                values.byteswap()
+            arrays.append(values)
+        segments, text, digests = parts[len(_INDEX_ARRAYS):]
+        return cls(segments.decode("utf-8").split("\0"), *arrays, text.decode("utf-8"), digests)
 
 
-def collect_leaf_values(root: ET.Element) -> dict[str, list[str]]:
-    leaf_values: dict[str, list[str]] = defaultdict(list)
+def _fingerprint(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
 
-    def visit(node: ET.Element, path: str) -> None:
-        children = list(node)
-        if not children:
+
+def _group_by(keys: array, key_count: int) -> tuple[array, array]:
+    """Counting sort of positions by key: returns per-key offsets and the positions in key order."""
+    offsets = array("I", bytes(4 * (key_count + 1)))
+    for key in keys:
+        offsets[key + 1] += 1
+    for key in range(key_count):
+        offsets[key + 1] += offsets[key]
+    positions = array("I", bytes(4 * len(keys)))
+    cursor = offsets[:-1]
+    for position, key in enumerate(keys):
+        positions[cursor[key]] = position
+        cursor[key] += 1
+    return offsets, positions
+
+
+class _DocumentIndexBuilder:
+    """Interns paths and collects digests and leaf values while a document is walked."""
+
+    def __init__(self, identity_keys: dict[str, str] | None):
+        self.identity_keys = identity_keys
+        self.segments: list[str] = []
+        self.parents = array("i")
+        self.path_ids: dict[tuple[int, str], int] = {}
+        self.interned: dict[str, str] = {}
+        self.digests = bytearray()
+        self.digest_seen = bytearray()
+        # Element digests of paths that occur more than once, combined when the index is built.
+        self.repeated_digests: dict[int, list[bytes]] = {}
+        self.leaf_paths = array("I")
+        self.value_bounds = array("I", [0])
+        self.text = io.StringIO()
+
+    def path_id(self, parent_id: int, segment: str) -> int:
+        key = (parent_id, segment)
+        path_id = self.path_ids.get(key)
+        if path_id is None:
+            path_id = self.path_ids[key] = len(self.segments)
+            self.segments.append(self.interned.setdefault(segment, segment))
+            self.parents.append(parent_id)
+            self.digests.extend(bytes(DIGEST_SIZE))
+            self.digest_seen.append(0)
+        return path_id
+
+    def add_element(self, node: ET.Element, path_id: int, child_digests: list[bytes]) -> bytes:
+        header = node.tag
+        # items() rather than attrib, which would allocate an empty dict on every element without attributes.
+        attributes = node.items()
+        if attributes:
+            header += "".join(f"\x1f{name}={value}" for name, value in sorted(attributes))
+        if child_digests:
+            digest = _fingerprint(f"{header}\x1e".encode("utf-8") + b"".join(child_digests))
+        else:
             value = (node.text or "").strip()
-            leaf_values[path].append(value)
-            return
+            self.leaf_paths.append(path_id)
+            self.value_bounds.append(self.value_bounds[-1] + self.text.write(value))
+            digest = _fingerprint(f"{header}\x1e{value}".encode("utf-8"))
+
+        if not self.digest_seen[path_id]:
+            self.digest_seen[path_id] = 1
+            self.digests[path_id * DIGEST_SIZE:(path_id + 1) * DIGEST_SIZE] = digest
+        elif path_id in self.repeated_digests:
+            self.repeated_digests[path_id].append(digest)
+        else:
+            first = bytes(self.digests[path_id * DIGEST_SIZE:(path_id + 1) * DIGEST_SIZE])
+            self.repeated_digests[path_id] = [first, digest]
+        return digest
+
+    def index_subtree(self, root: ET.Element, path_id: int) -> bytes:
+        """Walk an element that is fully in memory without recursion and return its digest."""
+        identity_keys = self.identity_keys
+        add_element = self.add_element
+        path_id_for = self.path_id
+        # Each frame: element, path id, remaining children, child digests, keyed segments seen below it.
+        stack = [(root, path_id, iter(root), [], {})]
+        while True:
+            node, path_id, remaining, child_digests, keyed_segments = stack[-1]
+            child = next(remaining, None)
+            if child is not None:
+                segment = _child_segment(child, identity_keys, keyed_segments)
+                stack.append((child, path_id_for(path_id, segment), iter(child), [], {}))
+                continue
+
+            stack.pop()
+            digest = add_element(node, path_id, child_digests)
+            if not stack:
+                return digest
+            stack[-1][3].append(digest)
+
+    def build(self) -> DocumentIndex:
+        path_count = len(self.segments)
+        # Path ids grow in document order, so grouping keeps children and values in document order.
+        child_offsets, child_positions = _group_by(self.parents[1:], path_count)
+        child_ids = array("I", (position + 1 for position in child_positions))
+        value_offsets, value_slots = _group_by(self.leaf_paths, path_count)
+        for path_id, digests in self.repeated_digests.items():
+            self.digests[path_id * DIGEST_SIZE:(path_id + 1) * DIGEST_SIZE] = _fingerprint(b"".join(digests))
 
-        for child in children:
-            child_name = local_name(child.tag)
-            child_path = f"{path}/{child_name}"
-            visit(child, child_path)
+        return DocumentIndex(
+            self.segments,
+            self.parents,
+            child_offsets,
+            child_ids,
+            value_offsets,
+            value_slots,
+            self.value_bounds,
+            self.text.getvalue(),
+            bytes(self.digests),
+        )
+
+
+def build_document_index(root: ET.Element, identity_keys: dict[str, str] | None = None) -> DocumentIndex:
+    """Index the leaf values of a parsed document and fingerprint every path in one pass."""
+    builder = _DocumentIndexBuilder(identity_keys)
+    builder.index_subtree(root, builder.path_id(-1, local_name(root.tag)))
+    return builder.build()
+
+
+def build_document_index_from_stream(
+    source: BinaryIO,
+    identity_keys: dict[str, str] | None = None,
+) -> tuple[DocumentIndex | None, str | None]:
+    """Build the same index as ``build_document_index`` without keeping the tree.
+
+    Elements are dropped from their parent once indexed. Only elements whose identity key is a child
+    element are kept until they end, since their path segment depends on that child's value.
+    """
+    builder = _DocumentIndexBuilder(identity_keys)
+    # Each frame: element, path id, child digests, keyed segments seen below it.
+    frames: list[tuple[ET.Element, int, list[bytes], dict[str, int]]] = []
+    deferred_depth = 0
+
+    try:
+        for event, node in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if deferred_depth:
+                    deferred_depth += 1
+                    continue
+                if not frames:
+                    frames.append((node, builder.path_id(-1, local_name(node.tag)), [], {}))
+                    continue
+                key = identity_keys.get(local_name(node.tag)) if identity_keys else None
+                if key is not None and not key.startswith("@"):
+                    deferred_depth = 1
+                    continue
+                parent = frames[-1]
+                segment = _child_segment(node, identity_keys, parent[3])
+                frames.append((node, builder.path_id(parent[1], segment), [], {}))
+                continue
+
+            if deferred_depth:
+                deferred_depth -= 1
+                if deferred_depth:
+                    continue
+                parent = frames[-1]
+                segment = _child_segment(node, identity_keys, parent[3])
+                digest = builder.index_subtree(node, builder.path_id(parent[1], segment))
+            else:
+                _, path_id, child_digests, _ = frames.pop()
+                digest = builder.add_element(node, path_id, child_digests)
+                if not frames:
+                    continue
+                parent = frames[-1]
+            node.clear()
+            parent[2].append(digest)
+            # Every earlier child of the parent has been indexed already.
+            del parent[0][:]
+    except ET.ParseError as exc:
+        return None, f"XML parse error: {exc}"
 
-    root_name = local_name(root.tag)
-    visit(root, root_name)
-    return dict(leaf_values)
\ No newline at end of file
+    return builder.build(), None
\ No newline at end of file
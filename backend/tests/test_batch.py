@@ -0,0 +1,144 @@
+import asyncio
+import io
+import json
+import sys
+import unittest
+import zipfile
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from starlette.datastructures import UploadFile
+
+from app.batch import (
+    BatchArchiveError,
+    BatchWorkspace,
+    collect_batch_entries,
+    iter_zip_entries,
+    stream_batch_results,
+)
+from app.result_cache import encode_result
+from app.validation import validate_xml
+
+
+FIXTURES_DIR = BACKEND_DIR / "tests" / "fixtures"
+
+
+class BatchValidationTests(unittest.TestCase):
+    def setUp(self):
+        self.workspace = BatchWorkspace()
+        self.zip_path = self.workspace.path / "batch.zip"
+        with zipfile.ZipFile(self.zip_path, "w") as archive:
+            archive.write(FIXTURES_DIR / "golden_valid.taxation.xml", "a/golden.xml")
+            archive.write(FIXTURES_DIR / "invalid_malformed.xml", "b/malformed.xml")
+            archive.write(FIXTURES_DIR / "mixed_sample.xml", "c/oversized.xml")
+            archive.writestr("notes.txt", "ignored")
+
+    def tearDown(self):
+        self.workspace.cleanup()
+
+    def _run(self, entries, concurrency=2) -> list[dict]:
+        async def validate_entry(entry):
+            result = validate_xml(entry.path.read_bytes())
+            return encode_result(result), result["xsdValid"]
+
+        async def collect():
+            lines = []
+            async for line in stream_batch_results(
+                entries,
+                validate_entry,
+                concurrency=concurrency,
+                workspace=self.workspace,
+            ):
+                lines.append(json.loads(line))
+            return lines
+
+        return asyncio.run(collect())
+
+    def test_streams_one_line_per_member_and_a_summary(self):
+        max_file_bytes = (FIXTURES_DIR / "mixed_sample.xml").stat().st_size - 1
+        entries = iter_zip_entries(self.zip_path, self.workspace, max_file_bytes=max_file_bytes)
+
+        lines = self._run(entries)
+
+        by_file = {line["file"]: line for line in lines if line["type"] != "summary"}
+        self.assertEqual(set(by_file), {"a/golden.xml", "b/malformed.xml", "c/oversized.xml"})
+        self.assertTrue(by_file["a/golden.xml"]["result"]["xsdValid"])
+        self.assertFalse(by_file["b/malformed.xml"]["result"]["xsdValid"])
+        self.assertEqual(by_file["c/oversized.xml"]["type"], "error")
+        self.assertEqual(
+            lines[-1] | {"durationMs": 0},
+            {"type": "summary", "files": 3, "xsdValid": 1, "xsdInvalid": 1, "failed": 1, "durationMs": 0},
+        )
+
+    def test_workspace_is_removed_after_streaming(self):
+        entries = iter_zip_entries(self.zip_path, self.workspace, max_file_bytes=1024 * 1024)
+
+        self._run(entries, concurrency=1)
+
+        self.assertFalse(self.workspace.path.exists())
+
+
+class CollectBatchEntriesTests(unittest.TestCase):
+    def setUp(self):
+        self.workspace = BatchWorkspace()
+
+    def tearDown(self):
+        self.workspace.cleanup()
+
+    def _collect(self, *files: tuple[str, bytes], max_file_bytes: int = 1024 * 1024) -> list:
+        uploads = [UploadFile(io.BytesIO(content), filename=name) for name, content in files]
+        entries = asyncio.run(collect_batch_entries(uploads, self.workspace, max_file_bytes=max_file_bytes))
+        return list(entries)
+
+    def test_zip_is_rejected_unless_it_is_the_only_upload(self):
+        with self.assertRaisesRegex(BatchArchiveError, "only uploaded file"):
+            self._collect(("a.xml", b"<a/>"), ("b.zip", b"x" * 100))
+
+    def test_every_part_of_a_multi_file_batch_is_held_to_the_file_limit(self):
+        uploads = [
+            UploadFile(io.BytesIO(b"<a/>"), filename="a.xml"),
+            UploadFile(io.BytesIO(b"<b>" + b"x" * 100 + b"</b>"), filename="b.xml"),
+        ]
+        entries = asyncio.run(collect_batch_entries(uploads, self.workspace, max_file_bytes=50))
+
+        self.assertIsInstance(entries, list)
+        self.assertIsNone(entries[0].error)
+        self.assertEqual(entries[1].error, "Uploaded file is too large.")
+
+    def test_non_zip_and_corrupt_archives_are_rejected(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as writer:
+            writer.writestr("a.xml", "<a/>")
+        truncated = archive.getvalue()[:-10]
+
+        for content in (b"<a/>", b"", truncated):
+            with self.subTest(size=len(content)):
+                with self.assertRaisesRegex(BatchArchiveError, "not a valid zip file"):
+                    self._collect(("batch.zip", content))
+
+    def test_unreadable_members_are_reported_per_file(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as writer:
+            writer.writestr("a.xml", "<a>" + "x" * 1000 + "</a>")
+            writer.writestr("b.xml", "<b/>")
+        with zipfile.ZipFile(archive) as reader:
+            info = reader.getinfo("a.xml")
+        # Corrupt the compressed data of the first member, leaving the headers and directory intact.
+        start = info.header_offset + 30 + len(info.filename)
+        content = bytearray(archive.getvalue())
+        content[start : start + info.compress_size] = b"\xff" * info.compress_size
+
+        entries = self._collect(("batch.zip", bytes(content)))
+
+        self.assertEqual([entry.name for entry in entries], ["a.xml", "b.xml"])
+        self.assertEqual(entries[0].error, "Archive member could not be read.")
+        self.assertIsNone(entries[1].error)
+        self.assertEqual(entries[1].path.read_bytes(), b"<b/>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import sys
+import unittest
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+if str(BACKEND_DIR / "tools") not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR / "tools"))
+
+from app.validation import validate_xml
+from benchmark import compare_with_baseline
+from generate_documents import DocumentGenerator, parse_procedure_mix, parse_size
+
+
+NS = {"eCH-0278": "http://www.ech.ch/xmlns/eCH-0278/1", "eCH-0196": "http://www.ech.ch/xmlns/eCH-0196/2"}
+
+
+class DocumentGeneratorTests(unittest.TestCase):
+    def test_generated_documents_are_xsd_valid(self):
+        generator = DocumentGenerator()
+        for positions, debts in ((0, 0), (40, generator.max_debts)):
+            with self.subTest(positions=positions, debts=debts):
+                result = validate_xml(generator.generate(positions, debts))
+                self.assertTrue(result["xsdValid"], result["structuralErrors"])
+
+    def test_positions_and_debts_follow_the_procedure_mix(self):
+        generator = DocumentGenerator(procedure_mix=parse_procedure_mix("taxation=1"))
+        root = ET.fromstring(generator.generate(30, 5))
+
+        entries = root.findall(".//eCH-0196:stock", NS) + root.findall(".//eCH-0196:payment", NS)
+        procedures = {node.get("taxProcedure") for node in root.findall(".//eCH-0278:securitiesIncome", NS)}
+        self.assertEqual(len(entries), 30)
+        self.assertEqual(procedures, {"taxation"})
+        self.assertEqual(len(root.findall(".//eCH-0278:liabilityInterest", NS)), 5)
+
+    def test_generate_size_lands_near_the_target(self):
+        document = DocumentGenerator().generate_size(parse_size("200KB"))
+
+        self.assertAlmostEqual(len(document) / (200 * 1024), 1.0, delta=0.05)
+
+    def test_rejects_unknown_procedures_and_too_many_debts(self):
+        with self.assertRaises(ValueError):
+            DocumentGenerator(procedure_mix={"audit": 1.0})
+        generator = DocumentGenerator()
+        with self.assertRaises(ValueError):
+            generator.generate(0, generator.max_debts + 1)
+
+
+class BaselineComparisonTests(unittest.TestCase):
+    def test_reports_time_and_memory_growth_beyond_threshold(self):
+        baseline = {"results": {"validate_xml@1MB": {"minSeconds": 1.0, "peakBytes": 1_000_000}}}
+        within = {"results": {"validate_xml@1MB": {"minSeconds": 1.2, "peakBytes": 1_100_000}}}
+        slower = {
+            "results": {
+                "validate_xml@1MB": {"minSeconds": 1.5, "peakBytes": 1_000_000},
+                "get_tree": {"minSeconds": 9.0, "peakBytes": 1},
+            }
+        }
+
+        self.assertEqual(compare_with_baseline(within, baseline, 0.25), [])
+        regressions = compare_with_baseline(slower, baseline, 0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("validate_xml@1MB: minSeconds"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,7 @@
+import io
 import sys
 import unittest
+from xml.etree import ElementTree as ET
 from pathlib import Path
 
 
@@ -7,7 +9,20 @@ BACKEND_DIR = Path(__file__).resolve().parents[1]
 if str(BACKEND_DIR) not in sys.path:
     sys.path.insert(0, str(BACKEND_DIR))
 
-from app.comparison import compare_xml
+from app.comparison import (
+    PreparedComparisonDocument,
+    compare_payloads,
+    compare_sources,
+    compare_xml,
+    prepare_comparison_document,
+    prepare_comparison_file,
+    prepare_comparison_payload,
+)
+from app.validation import validate_xml
+from app.xml_utils import build_document_index, build_document_index_from_stream, collect_leaf_values
+
+
+FIXTURES_DIR = BACKEND_DIR / "tests" / "fixtures"
 
 
 class CompareXmlTests(unittest.TestCase):
@@ -45,6 +60,171 @@ class CompareXmlTests(unittest.TestCase):
             },
         )
 
+    def test_prepared_document_validity_matches_full_validation(self):
+        for fixture in sorted(FIXTURES_DIR.glob("*.xml")):
+            with self.subTest(fixture=fixture.name):
+                xml_bytes = fixture.read_bytes()
+                prepared = prepare_comparison_document(xml_bytes)
+
+                self.assertEqual(prepared.xsd_valid, validate_xml(xml_bytes)["xsdValid"])
+
+    def test_keyed_elements_match_by_identity(self):
+        def securities(position_ids: list[int], changed_position: int | None = None) -> bytes:
+            items = "".join(
+                f'<security positionId="{position_id}"><taxValue>'
+                f"{position_id * 10 + (1 if position_id == changed_position else 0)}</taxValue></security>"
+                for position_id in position_ids
+            )
+            return f"<root><depot>{items}</depot></root>".encode()
+
+        xml1 = securities([1, 2, 3])
+        xml2 = securities([0, 1, 2, 3], changed_position=3)
+
+        result = compare_xml(xml1, xml2, change_window=(0, 10))
+
+        self.assertEqual(result["diffSummary"], {"changedValues": 1, "addedNodes": 1, "removedNodes": 0})
+        self.assertEqual(
+            result["changes"]["items"],
+            [
+                {
+                    "type": "changed",
+                    "path": "root/depot/security[@positionId='3']/taxValue",
+                    "oldValue": "30",
+                    "newValue": "31",
+                },
+                {
+                    "type": "added",
+                    "path": "root/depot/security[@positionId='0']/taxValue",
+                    "oldValue": None,
+                    "newValue": "0",
+                },
+            ],
+        )
+        self.assertEqual(
+            compare_xml(xml1, xml2, identity_keys={})["diffSummary"],
+            {"changedValues": 3, "addedNodes": 1, "removedNodes": 0},
+        )
+
+    def test_change_window_pages_through_changes(self):
+        xml1 = b"<root><a>1</a><b>2</b><c>3</c></root>"
+        xml2 = b"<root><a>7</a><b>8</b><c>9</c></root>"
+
+        page = compare_xml(xml1, xml2, change_window=(1, 1))["changes"]
+
+        self.assertEqual(page["total"], 3)
+        self.assertEqual([item["path"] for item in page["items"]], ["root/b"])
+        self.assertNotIn("changes", compare_xml(xml1, xml2))
+
+    def test_fingerprint_skipping_matches_a_full_leaf_diff(self):
+        documents = {fixture.name: fixture.read_bytes() for fixture in sorted(FIXTURES_DIR.glob("compare_*.xml"))}
+        leaves = {name: collect_leaf_values(ET.fromstring(data)) for name, data in documents.items()}
+        for name1, xml1 in documents.items():
+            for name2, xml2 in documents.items():
+                with self.subTest(xml1=name1, xml2=name2):
+                    result = compare_xml(xml1, xml2, change_window=(0, 10_000))
+                    expected = _full_leaf_diff(leaves[name1], leaves[name2])
+
+                    self.assertEqual(
+                        [result["diffSummary"][key] for key in ("changedValues", "addedNodes", "removedNodes")],
+                        [sum(item["type"] == kind for item in expected) for kind in ("changed", "added", "removed")],
+                    )
+                    self.assertCountEqual(result["changes"]["items"], expected)
+
+    def test_compare_sources_accepts_bytes_paths_and_prepared_documents(self):
+        base = FIXTURES_DIR / "compare_valid_base.xml"
+        for fixture in sorted(FIXTURES_DIR.glob("compare_*.xml")):
+            with self.subTest(fixture=fixture.name):
+                expected = compare_xml(base.read_bytes(), fixture.read_bytes(), change_window=(0, 100))
+
+                self.assertEqual(compare_sources(str(base), str(fixture), (0, 100)), expected)
+                self.assertEqual(
+                    compare_sources(prepare_comparison_document(base.read_bytes()), fixture.read_bytes(), (0, 100)),
+                    expected,
+                )
+
+    def test_separately_prepared_payloads_diff_like_compare_xml(self):
+        base = FIXTURES_DIR / "compare_valid_base.xml"
+        base_payload = prepare_comparison_payload(base.read_bytes())
+        for fixture in [*sorted(FIXTURES_DIR.glob("compare_*.xml")), FIXTURES_DIR / "invalid_malformed.xml"]:
+            with self.subTest(fixture=fixture.name):
+                expected = compare_xml(base.read_bytes(), fixture.read_bytes(), change_window=(0, 100))
+
+                payload = prepare_comparison_payload(str(fixture))
+
+                self.assertEqual(compare_payloads(base_payload, payload, (0, 100)), expected)
+
+        with self.assertRaises(ValueError):
+            PreparedComparisonDocument.from_bytes(b"")
+
+    def test_fingerprints_identify_identical_documents(self):
+        xml1 = b"<root><a>1</a><b kind='x'>2</b></root>"
+
+        same = compare_xml(xml1, b"<root><a>1</a><b kind='x'>2</b></root>")
+        attribute_changed = compare_xml(xml1, b"<root><a>1</a><b kind='y'>2</b></root>")
+
+        self.assertEqual(same["xml1Fingerprint"], same["xml2Fingerprint"])
+        self.assertNotEqual(attribute_changed["xml1Fingerprint"], attribute_changed["xml2Fingerprint"])
+        self.assertIsNone(compare_xml(xml1, b"<root>")["xml2Fingerprint"])
+
+    def test_streamed_index_matches_in_memory_index(self):
+        documents = [fixture.read_bytes() for fixture in sorted(FIXTURES_DIR.glob("compare_*.xml"))]
+        documents.append(
+            b"<root><personalDetail><name>A</name><vn>1</vn></personalDetail>"
+            b"<personalDetail><vn>2</vn><child><vn>3</vn><name>B</name></child></personalDetail>"
+            b"<security positionId='1'><v>1</v></security><security><v>2</v></security></root>"
+        )
+        identity_keys = {"personalDetail": "vn", "child": "vn", "security": "@positionId"}
+        for xml_bytes in documents:
+            expected = build_document_index(ET.fromstring(xml_bytes), identity_keys)
+            streamed, parse_error = build_document_index_from_stream(io.BytesIO(xml_bytes), identity_keys)
+
+            self.assertIsNone(parse_error)
+            for name in expected.__slots__:
+                self.assertEqual(getattr(streamed, name), getattr(expected, name), name)
+
+    def test_prepared_file_matches_prepared_bytes(self):
+        for fixture in sorted(FIXTURES_DIR.glob("*.xml")):
+            with self.subTest(fixture=fixture.name):
+                from_file = prepare_comparison_file(fixture)
+                from_bytes = prepare_comparison_document(fixture.read_bytes())
+
+                self.assertEqual(from_file.xsd_valid, from_bytes.xsd_valid)
+                self.assertEqual(
+                    None if from_file.index is None else from_file.index.fingerprint,
+                    None if from_bytes.index is None else from_bytes.index.fingerprint,
+                )
+
+    def test_deeply_nested_documents_are_indexed_without_recursion(self):
+        depth = sys.getrecursionlimit() * 2
+        xml_bytes = ("<n>" * depth + "leaf" + "</n>" * depth).encode()
+
+        leaf_values = collect_leaf_values(ET.fromstring(xml_bytes))
+
+        self.assertEqual(leaf_values, {"/".join(["n"] * depth): ["leaf"]})
+
+
+def _full_leaf_diff(leaves1: dict[str, list[str]], leaves2: dict[str, list[str]]) -> list[dict]:
+    """Positional diff of every leaf path of both documents, without fingerprints."""
+    changes = []
+    for path in [*leaves1, *(path for path in leaves2 if path not in leaves1)]:
+        values1, values2 = leaves1.get(path, []), leaves2.get(path, [])
+        multiple = max(len(values1), len(values2)) > 1
+        for index in range(max(len(values1), len(values2))):
+            old = values1[index] if index < len(values1) else None
+            new = values2[index] if index < len(values2) else None
+            if old == new:
+                continue
+            change_type = "added" if old is None else "removed" if new is None else "changed"
+            changes.append(
+                {
+                    "type": change_type,
+                    "path": f"{path}[{index + 1}]" if multiple else path,
+                    "oldValue": old,
+                    "newValue": new,
+                }
+            )
+    return changes
+
 
 if __name__ == "__main__":
     unittest.main()
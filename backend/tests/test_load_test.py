@@ -0,0 +1,70 @@
+import sys
+import unittest
+from email.parser import BytesParser
+from email.policy import HTTP
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+if str(BACKEND_DIR / "tools") not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR / "tools"))
+
+from load_test import (
+    is_saturated,
+    multipart_body,
+    parse_mix,
+    percentile,
+    read_backend_limits,
+    summarize_stage,
+)
+
+
+class LoadTestDefaultsTests(unittest.TestCase):
+    def test_reads_limits_and_env_from_backend_manifest(self):
+        limits = read_backend_limits()
+
+        self.assertEqual(limits["cpuLimit"], 0.5)
+        self.assertEqual(limits["cpuRequest"], 0.1)
+        self.assertEqual(limits["memoryLimit"], 512 * 1024 * 1024)
+        self.assertEqual(limits["env"]["VALIDATION_WORKER_MODE"], "process")
+        self.assertEqual(limits["env"]["VALIDATION_WORKERS"], "1")
+
+    def test_parse_mix_rejects_unknown_request_kinds(self):
+        self.assertEqual(parse_mix("validate=3,tree=1"), {"validate": 3.0, "tree": 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix("validate=1,upload=1")
+
+
+class LoadTestReportTests(unittest.TestCase):
+    def test_multipart_body_carries_each_file(self):
+        body, content_type = multipart_body([("xml1", "a.xml", b"<a/>"), ("xml2", "b.xml", b"<b/>")])
+        message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+
+        parts = [
+            (part.get_param("name", header="content-disposition"), part.get_content())
+            for part in message.iter_parts()
+        ]
+        self.assertEqual([name for name, _ in parts], ["xml1", "xml2"])
+        self.assertEqual([content.strip() for _, content in parts], [b"<a/>", b"<b/>"])
+
+    def test_stage_summary_separates_errors_rate_limits_and_latency(self):
+        results = [("validate", 200, latency / 100, None) for latency in range(1, 101)]
+        results += [("validate", 503, 0.001, None), ("compare", None, 60.0, "timeout"), ("tree", 429, 0.001, None)]
+        stage = summarize_stage(10.0, 10.0, results)
+
+        self.assertEqual(percentile([0.3, 0.1, 0.2], 0.5), 0.2)
+        self.assertEqual(stage["succeeded"], 100)
+        self.assertEqual(stage["p95"], 0.95)
+        self.assertAlmostEqual(stage["errorRate"], 2 / 103)
+        self.assertAlmostEqual(stage["rateLimitedRate"], 1 / 103)
+        self.assertAlmostEqual(stage["achievedRate"], 10.1)
+        self.assertEqual(stage["byKind"]["compare"]["errorRate"], 1.0)
+        self.assertFalse(is_saturated(stage, slo_p95=2.0, max_error_rate=0.05))
+        self.assertTrue(is_saturated(stage, slo_p95=0.5, max_error_rate=0.05))
+        self.assertTrue(is_saturated({**stage, "cpuCores": 0.8}, 2.0, 0.05, cpu_limit=0.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
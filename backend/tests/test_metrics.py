@@ -0,0 +1,73 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.metrics import METRICS, MetricsRegistry
+from app.validation import validate_xml
+from app.workers import ValidationWorkerPool
+
+
+def _sample(rendered: bytes, series: str) -> float:
+    for line in rendered.decode("utf-8").splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+class MetricsRenderingTests(unittest.TestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, "parse")
+
+        rendered = registry.render()
+
+        self.assertIn(b"# TYPE demo_seconds histogram", rendered)
+        self.assertEqual(_sample(rendered, 'demo_seconds_bucket{stage="parse",le="0.1"}'), 1)
+        self.assertEqual(_sample(rendered, 'demo_seconds_bucket{stage="parse",le="1"}'), 3)
+        self.assertEqual(_sample(rendered, 'demo_seconds_bucket{stage="parse",le="+Inf"}'), 4)
+        self.assertEqual(_sample(rendered, 'demo_seconds_sum{stage="parse"}'), 6.05)
+        self.assertEqual(_sample(rendered, 'demo_seconds_count{stage="parse"}'), 4)
+
+    def test_label_values_are_escaped_and_callbacks_read_at_scrape_time(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("demo_total", "Demo.", ("route",))
+        depth = [3]
+        registry.callback("demo_depth", "Demo.", lambda: depth[0])
+        counter.inc('/a"b')
+        depth[0] = 7
+
+        rendered = registry.render()
+
+        self.assertEqual(_sample(rendered, 'demo_total{route="/a\\"b"}'), 1)
+        self.assertEqual(_sample(rendered, "demo_depth"), 7)
+
+
+class WorkerObservationTests(unittest.TestCase):
+    def test_process_worker_observations_reach_the_parent_registry(self):
+        pool = ValidationWorkerPool(mode="process", workers=1, queue_limit=1, job_timeout_seconds=60)
+        series = 'ech0278_stage_duration_seconds_count{stage="parse"}'
+        before = _sample(METRICS.render(), series)
+
+        async def scenario():
+            await pool.start()
+            await pool.run(validate_xml, b"<root/>")
+            await pool.run(validate_xml, b"<root/>")
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            pool.shutdown()
+
+        self.assertEqual(_sample(METRICS.render(), series), before + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
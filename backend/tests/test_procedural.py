@@ -0,0 +1,305 @@
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+if str(BACKEND_DIR / "tools") not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR / "tools"))
+
+import app.validation as validation
+from compile_schematron import compile_schematron
+
+
+FIXTURES_DIR = BACKEND_DIR / "tests" / "fixtures"
+COMPILER_XSL = BACKEND_DIR / "schematron" / "schxslt2-1.9" / "transpile.xsl"
+SECOND_RULE_SET = """<sch:schema xmlns:sch="http://purl.oclc.org/dsdl/schematron" queryBinding="xslt3">
+  <sch:ns prefix="eCH-0278" uri="http://www.ech.ch/xmlns/eCH-0278/1" />
+  <sch:pattern id="procedural-smoke-pattern">
+    <sch:rule context="eCH-0278:naturalPersonTaxData">
+      <sch:assert id="transfer_marker_missing" role="warning" test="false()">Transfer marker missing.</sch:assert>
+    </sch:rule>
+  </sch:pattern>
+  <sch:pattern>
+    <sch:rule context="/*">
+      <sch:report id="root_element_seen" test="true()">Root element seen.</sch:report>
+    </sch:rule>
+  </sch:pattern>
+</sch:schema>
+"""
+
+
+class ProceduralExecutionTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(cls.temp_dir.name)
+        source_dir = root / "source"
+        (source_dir / "rules").mkdir(parents=True)
+        (source_dir / "rules" / "procedural_smoke.sch").write_bytes(
+            (BACKEND_DIR / "tests" / "rules" / "procedural_smoke.sch").read_bytes()
+        )
+        (source_dir / "rules" / "second.sch").write_text(SECOND_RULE_SET, encoding="utf-8")
+
+        cls.output_dir = root / "schematron"
+        cls.merged_dir = root / "schematron-merged"
+        compile_schematron(source_dir, cls.output_dir, COMPILER_XSL, [], [], cls.merged_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        validation.close_procedural_validators()
+        cls.temp_dir.cleanup()
+
+    def _procedural_findings(self, mode: str, merged_dir: Path | None = None) -> list[list[dict]]:
+        with mock.patch.multiple(
+            validation,
+            GENERATED_SCHEMATRON_DIR=self.output_dir,
+            GENERATED_SCHEMATRON_MERGED_DIR=merged_dir or self.merged_dir,
+            PROCEDURAL_EXECUTION=mode,
+        ):
+            validation.close_procedural_validators()
+            try:
+                return [
+                    validation.validate_xml(fixture.read_bytes(), procedural=True)["proceduralFindings"]
+                    for fixture in sorted(FIXTURES_DIR.glob("golden_valid.*.xml"))
+                ]
+            finally:
+                validation.close_procedural_validators()
+
+    def test_parallel_and_merged_execution_match_sequential_ordering(self):
+        sequential = self._procedural_findings("sequential")
+
+        self.assertTrue(any(findings for findings in sequential))
+        self.assertEqual(self._procedural_findings("parallel"), sequential)
+        self.assertEqual(self._procedural_findings("merged"), sequential)
+
+    def test_max_findings_truncates_and_counts_the_rest(self):
+        fixture = (FIXTURES_DIR / "golden_valid.taxation.xml").read_bytes()
+        with mock.patch.object(validation, "GENERATED_SCHEMATRON_DIR", self.output_dir):
+            validation.close_procedural_validators()
+            try:
+                full = validation.validate_xml(fixture, procedural=True)
+                capped = validation.validate_xml(fixture, procedural=True, max_findings=2)
+            finally:
+                validation.close_procedural_validators()
+
+        self.assertEqual(full["proceduralFindingsTruncated"], 0)
+        self.assertEqual(capped["proceduralFindings"], full["proceduralFindings"][:2])
+        self.assertEqual(capped["proceduralFindingsTruncated"], len(full["proceduralFindings"]) - 2)
+
+    def test_merged_execution_falls_back_for_findings_it_cannot_attribute(self):
+        load_merged_executable = validation._load_merged_executable
+
+        def without_pattern_mapping(*args):
+            merged = load_merged_executable(*args)
+            return merged | {"patterns": {}}
+
+        with mock.patch.object(validation, "_load_merged_executable", without_pattern_mapping):
+            merged = self._procedural_findings("merged")
+
+        self.assertEqual(merged, self._procedural_findings("sequential"))
+
+    def test_merged_report_rejects_findings_without_a_known_pattern(self):
+        sources = [{"stylesheet": Path(name), "ruleVersion": None} for name in ("a.xsl", "b.xsl")]
+        svrl = (
+            '<svrl:schematron-output xmlns:svrl="http://purl.oclc.org/dsdl/svrl">'
+            '<svrl:failed-assert patternId="b-1" location="/a"><svrl:text>B</svrl:text></svrl:failed-assert>'
+            "{extra}</svrl:schematron-output>"
+        )
+
+        findings, truncated = validation._collect_svrl_findings(
+            svrl.format(extra=""), sources, pattern_sources={"b-1": 1}
+        )
+        self.assertEqual([(finding["code"], finding["message"]) for finding in findings], [("b_failed-assert", "B")])
+        self.assertEqual(truncated, 0)
+
+        for extra in (
+            '<svrl:failed-assert patternId="c-1"><svrl:text>C</svrl:text></svrl:failed-assert>',
+            "<svrl:error><svrl:text>Dynamic error.</svrl:text></svrl:error>",
+        ):
+            with self.subTest(extra=extra), self.assertRaises(validation.UnattributedSvrlFinding):
+                validation._collect_svrl_findings(svrl.format(extra=extra), sources, pattern_sources={"b-1": 1})
+
+    def test_merged_execution_falls_back_when_manifest_is_missing(self):
+        with tempfile.TemporaryDirectory() as empty_dir:
+            self.assertEqual(
+                self._procedural_findings("merged", merged_dir=Path(empty_dir)),
+                self._procedural_findings("sequential"),
+            )
+
+
+class IncrementalCompilationTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.temp_dir.name)
+        self.rules_dir = root / "source" / "rules"
+        self.rules_dir.mkdir(parents=True)
+        (self.rules_dir / "procedural_smoke.sch").write_bytes(
+            (BACKEND_DIR / "tests" / "rules" / "procedural_smoke.sch").read_bytes()
+        )
+        (self.rules_dir / "second.sch").write_text(
+            SECOND_RULE_SET.replace('queryBinding="xslt3"', 'queryBinding="xslt3" schemaVersion="2.1"'),
+            encoding="utf-8",
+        )
+        (self.rules_dir / "VERSION").write_text("1.4.0\n", encoding="utf-8")
+        self.output_dir = root / "schematron"
+
+    def tearDown(self):
+        validation.close_procedural_validators()
+        self.temp_dir.cleanup()
+
+    def _compile(self) -> int:
+        return compile_schematron(self.rules_dir.parent, self.output_dir, COMPILER_XSL, [], [], jobs=2)
+
+    def _manifest_entries(self) -> dict[str, dict]:
+        manifest = json.loads((self.output_dir / "manifest.json").read_text(encoding="utf-8"))
+        return {entry["source"]: entry for entry in manifest["stylesheets"]}
+
+    def test_only_changed_sources_are_recompiled_and_removed_ones_are_deleted(self):
+        self.assertEqual(self._compile(), 2)
+        self.assertEqual(self._compile(), 0)
+
+        (self.rules_dir / "second.sch").write_text(
+            SECOND_RULE_SET.replace("Root element seen.", "Root element found."), encoding="utf-8"
+        )
+        self.assertEqual(self._compile(), 1)
+
+        (self.rules_dir / "second.sch").unlink()
+        self.assertEqual(self._compile(), 0)
+        self.assertEqual(list(self._manifest_entries()), ["rules/procedural_smoke.sch"])
+        self.assertEqual([path.name for path in self.output_dir.rglob("*.xsl")], ["procedural_smoke.xsl"])
+
+    def test_rule_versions_come_from_the_manifest(self):
+        self._compile()
+        entries = self._manifest_entries()
+        self.assertEqual(entries["rules/procedural_smoke.sch"]["ruleVersion"], "1.4.0")
+        self.assertEqual(entries["rules/second.sch"]["ruleVersion"], "2.1")
+
+        fixture = (FIXTURES_DIR / "golden_valid.taxation.xml").read_bytes()
+        with mock.patch.object(validation, "GENERATED_SCHEMATRON_DIR", self.output_dir):
+            validation.close_procedural_validators()
+            findings = validation.validate_xml(fixture, procedural=True)["proceduralFindings"]
+
+        versions = {finding["code"]: finding["ruleVersion"] for finding in findings}
+        self.assertEqual(versions["root_element_seen"], "2.1")
+        self.assertEqual(set(versions.values()), {"1.4.0", "2.1"})
+
+    def test_rule_sets_that_cannot_be_merged_skip_only_the_merged_stylesheet(self):
+        for name in ("procedural_smoke.sch", "second.sch"):
+            path = self.rules_dir / name
+            source = path.read_text(encoding="utf-8")
+            path.write_text(source.replace("<sch:pattern", '<sch:let name="x" value="1"/><sch:pattern', 1), "utf-8")
+        merged_dir = self.output_dir.parent / "schematron-merged"
+
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            compiled = compile_schematron(self.rules_dir.parent, self.output_dir, COMPILER_XSL, [], [], merged_dir)
+
+        self.assertEqual(compiled, 2)
+        self.assertIn("redeclares global variable 'x'", stderr.getvalue())
+        self.assertFalse((merged_dir / "manifest.json").exists())
+        self.assertEqual(len(self._manifest_entries()), 2)
+
+
+class ProceduralReloadTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.temp_dir.name)
+        self.source_dir = root / "source"
+        (self.source_dir / "rules").mkdir(parents=True)
+        (self.source_dir / "rules" / "second.sch").write_text(SECOND_RULE_SET, encoding="utf-8")
+        self.output_dir = root / "schematron"
+        compile_schematron(self.source_dir, self.output_dir, COMPILER_XSL, [], [])
+
+        patcher = mock.patch.object(validation, "GENERATED_SCHEMATRON_DIR", self.output_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        validation.close_procedural_validators()
+        self.fixture = (FIXTURES_DIR / "golden_valid.taxation.xml").read_bytes()
+
+    def tearDown(self):
+        validation.close_procedural_validators()
+        self.temp_dir.cleanup()
+
+    def _messages(self, registry=None) -> list[str]:
+        if registry is None:
+            findings = validation.validate_xml(self.fixture, procedural=True)["proceduralFindings"]
+        else:
+            document = validation.parse_xml_document(self.fixture)
+            findings, _ = validation._run_procedural_validation(registry, document)
+        return [finding["message"] for finding in findings]
+
+    def test_reload_swaps_rules_while_earlier_documents_keep_their_registry(self):
+        previous = validation.current_procedural_registry()
+        previous_fingerprint = validation.procedural_rules_fingerprint()
+        self.assertIn("Root element seen.", self._messages())
+        self.assertEqual(validation.pending_procedural_rules_version(), previous_fingerprint)
+
+        (self.source_dir / "rules" / "second.sch").write_text(
+            SECOND_RULE_SET.replace("Root element seen.", "Root element found."), encoding="utf-8"
+        )
+        compile_schematron(self.source_dir, self.output_dir, COMPILER_XSL, [], [])
+        self.assertNotEqual(validation.pending_procedural_rules_version(), previous_fingerprint)
+
+        registry = validation.reload_procedural_validators()
+
+        self.assertEqual(validation.procedural_rules_fingerprint(), registry.version)
+        self.assertNotEqual(registry.version, previous_fingerprint)
+        self.assertIn("Root element found.", self._messages())
+        self.assertIn("Root element seen.", self._messages(previous))
+
+    def test_failed_reload_keeps_the_current_rules(self):
+        fingerprint = validation.procedural_rules_fingerprint()
+        (self.output_dir / "rules" / "second.xsl").write_text("<not-a-stylesheet/>", encoding="utf-8")
+
+        with self.assertRaises(validation.ProceduralReloadError):
+            validation.reload_procedural_validators()
+
+        self.assertEqual(validation.procedural_rules_fingerprint(), fingerprint)
+        self.assertIn("Root element seen.", self._messages())
+
+
+class SvrlConversionTests(unittest.TestCase):
+    SOURCE = {"stylesheet": Path("rules.xsl"), "ruleVersion": "1.0"}
+
+    def _svrl(self, entries: int) -> str:
+        body = "".join(
+            f'<svrl:successful-report id="report_{index}" location="/a[{index}]"><svrl:text>r{index}</svrl:text>'
+            f'</svrl:successful-report><svrl:failed-assert id="assert_{index}" role="warning">'
+            f"<svrl:text>a{index}</svrl:text></svrl:failed-assert>"
+            for index in range(entries)
+        )
+        return f'<svrl:schematron-output xmlns:svrl="http://purl.oclc.org/dsdl/svrl">{body}</svrl:schematron-output>'
+
+    def test_failed_asserts_come_before_reports(self):
+        findings, truncated = validation._collect_svrl_findings(self._svrl(2), [self.SOURCE])
+
+        self.assertEqual(truncated, 0)
+        self.assertEqual(
+            [finding["code"] for finding in findings],
+            ["assert_0", "assert_1", "report_0", "report_1"],
+        )
+        self.assertEqual(findings[0]["severity"], "warning")
+        self.assertEqual(findings[2]["paths"], ["/a[0]"])
+        self.assertEqual(findings[2]["message"], "r0")
+
+    def test_limit_keeps_leading_findings_and_counts_the_rest(self):
+        findings, truncated = validation._collect_svrl_findings(
+            self._svrl(5000),
+            [self.SOURCE],
+            max_findings=3,
+        )
+
+        self.assertEqual([finding["code"] for finding in findings], ["assert_0", "assert_1", "assert_2"])
+        self.assertEqual(truncated, 9997)
+
+
+if __name__ == "__main__":
+    unittest.main()
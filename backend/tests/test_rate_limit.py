@@ -0,0 +1,192 @@
+import math
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.rate_limit import (
+    REDIS_KEY_PREFIX,
+    MemoryRateLimitStore,
+    RateLimiter,
+    RedisRateLimitStore,
+    SharedMemoryRateLimitStore,
+    create_rate_limiter,
+)
+
+
+class RateLimitPolicyTests(unittest.TestCase):
+    def test_burst_then_one_request_per_emission_interval(self):
+        limiter = RateLimiter(MemoryRateLimitStore(), max_requests=20, window_seconds=60)
+
+        admitted = [limiter.check("client", now=1000.0) for _ in range(20)]
+        rejected = limiter.check("client", now=1000.0)
+
+        self.assertEqual(admitted, [0.0] * 20)
+        self.assertAlmostEqual(rejected, 3.0)
+        self.assertEqual(limiter.check("other", now=1000.0), 0.0)
+        self.assertEqual(limiter.check("client", now=1003.0), 0.0)
+        self.assertGreater(limiter.check("client", now=1003.0), 0.0)
+        self.assertEqual([limiter.check("client", now=1063.0) for _ in range(20)], [0.0] * 20)
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            create_rate_limiter("carrier-pigeon")
+
+
+class MemoryRateLimitStoreTests(unittest.TestCase):
+    def test_idle_keys_are_evicted(self):
+        store = MemoryRateLimitStore()
+        limiter = RateLimiter(store, max_requests=2, window_seconds=10)
+        for index in range(100):
+            limiter.check(f"10.0.0.{index}", now=1000.0)
+
+        self.assertEqual(len(store), 100)
+        limiter.check("10.0.1.1", now=1006.0)
+        self.assertEqual(len(store), 1)
+
+    def test_tracked_keys_are_capped(self):
+        store = MemoryRateLimitStore(max_keys=10)
+        limiter = RateLimiter(store, max_requests=1, window_seconds=60)
+        for index in range(1000):
+            limiter.check(f"forged-{index}", now=1000.0)
+
+        self.assertEqual(len(store), 10)
+        self.assertGreater(limiter.check("forged-999", now=1000.0), 0.0)
+
+
+class SharedMemoryRateLimitStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.temp_dir.name) / "rate-limit")
+        self.stores = []
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        self.temp_dir.cleanup()
+
+    def _limiter(self, **store_kwargs) -> RateLimiter:
+        store = SharedMemoryRateLimitStore(self.path, **store_kwargs)
+        self.stores.append(store)
+        return RateLimiter(store, max_requests=5, window_seconds=60)
+
+    def test_workers_share_one_budget(self):
+        limiters = [self._limiter(max_keys=1024) for _ in range(4)]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda index: limiters[index % 4].check("client", now=1000.0), range(40)))
+
+        self.assertEqual(results.count(0.0), 5)
+        self.assertEqual(limiters[0].check("client", now=1012.0), 0.0)
+
+    def test_table_size_is_fixed_and_idle_slots_are_reused(self):
+        limiter = self._limiter(max_keys=16)
+        for index in range(1000):
+            limiter.check(f"forged-{index}", now=1000.0)
+
+        self.assertEqual(Path(self.path).stat().st_size, 16 + 16 * 16)
+        self.assertEqual(limiter.check("forged-0", now=1100.0), 0.0)
+
+    def test_later_workers_use_the_slot_count_of_the_table(self):
+        first = self._limiter(max_keys=16)
+        larger = self._limiter(max_keys=1024)
+
+        self.assertEqual(larger.store.slots, 16)
+        self.assertEqual(Path(self.path).stat().st_size, 16 + 16 * 16)
+        for _ in range(5):
+            self.assertEqual(first.check("client", now=1000.0), 0.0)
+        self.assertGreater(larger.check("client", now=1000.0), 0.0)
+
+    def test_files_that_do_not_match_their_header_are_refused(self):
+        self._limiter(max_keys=16)
+        with open(self.path, "ab") as table:
+            table.write(bytes(16))
+
+        with self.assertRaisesRegex(ValueError, "does not match"):
+            SharedMemoryRateLimitStore(self.path, max_keys=16)
+        Path(self.path).write_bytes(b"x" * 64)
+        with self.assertRaisesRegex(ValueError, "not a rate limit table"):
+            SharedMemoryRateLimitStore(self.path, max_keys=16)
+
+
+class FakeRedis:
+    """The calls ``RedisRateLimitStore`` makes, with the GCRA script ported to Python.
+
+    ``now`` stands in for the server clock (``TIME``); keys expire like ``SET ... PX`` would expire them.
+    """
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.values: dict[str, tuple[bytes, float]] = {}
+        self.scripts: list[str] = []
+        self.closed = False
+
+    def register_script(self, script: str):
+        self.scripts.append(script)
+        return self._run_gcra
+
+    def _run_gcra(self, keys: list[str], args: list) -> bytes:
+        now = self.now
+        interval, tolerance = float(args[0]), float(args[1])
+        stored = self.values.get(keys[0])
+        tat = float(stored[0]) if stored is not None and stored[1] > now else now
+        if tat < now:
+            tat = now
+        if now < tat - tolerance:
+            return str(tat - tolerance - now).encode()
+        tat = tat + interval
+        self.values[keys[0]] = (str(tat).encode(), now + math.ceil((tat - now) * 1000) / 1000)
+        return b"0"
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class RedisRateLimitStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeRedis()
+        self.limiter = RateLimiter(RedisRateLimitStore(self.client), max_requests=20, window_seconds=60)
+
+    def test_registers_the_gcra_script_once(self):
+        self.limiter.check("client")
+        self.limiter.check("client")
+
+        self.assertEqual(len(self.client.scripts), 1)
+        self.assertIn("redis.call('TIME')", self.client.scripts[0])
+
+    def test_burst_then_retry_after_from_the_server_clock(self):
+        # The caller's clock is ignored; only the server's counts.
+        admitted = [self.limiter.check("client", now=0.0) for _ in range(20)]
+        rejected = self.limiter.check("client", now=5000.0)
+
+        self.assertEqual(admitted, [0.0] * 20)
+        self.assertAlmostEqual(rejected, 3.0)
+        self.assertEqual(self.limiter.check("other"), 0.0)
+        self.client.now += 3.0
+        self.assertEqual(self.limiter.check("client"), 0.0)
+        self.assertGreater(self.limiter.check("client"), 0.0)
+
+    def test_keys_are_prefixed_and_expire_once_idle(self):
+        self.limiter.check("client")
+
+        key = REDIS_KEY_PREFIX + "client"
+        self.assertEqual(list(self.client.values), [key])
+        self.client.now += 3.0
+        self.assertEqual(self.limiter.check("client"), 0.0)
+        self.client.now += 60.0
+        self.assertEqual([self.limiter.check("client") for _ in range(20)], [0.0] * 20)
+
+    def test_close_closes_the_client(self):
+        self.limiter.close()
+
+        self.assertTrue(self.client.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
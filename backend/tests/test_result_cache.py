@@ -0,0 +1,127 @@
+import asyncio
+import sys
+import tempfile
+import unittest
+from hashlib import sha256
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.result_cache import (
+    ValidationResultCache,
+    accepts_encoding,
+    build_cache_key,
+    etag_for_key,
+    if_none_match_matches,
+)
+
+
+class ValidationResultCacheTests(unittest.TestCase):
+    def test_key_depends_on_payload_and_versions(self):
+        base = build_cache_key(sha256(b"<root/>").digest(), "schema-a", "rules-a")
+
+        self.assertEqual(base, build_cache_key(sha256(b"<root/>").digest(), "schema-a", "rules-a"))
+        self.assertNotEqual(base, build_cache_key(sha256(b"<root />").digest(), "schema-a", "rules-a"))
+        self.assertNotEqual(base, build_cache_key(sha256(b"<root/>").digest(), "schema-b", "rules-a"))
+        self.assertNotEqual(base, build_cache_key(sha256(b"<root/>").digest(), "schema-a", "rules-b"))
+
+    def test_evicts_least_recently_used_entries_over_budget(self):
+        cache = ValidationResultCache(max_bytes=10, persist_dir=None)
+        cache.put("a", b"aaaa")
+        cache.put("b", b"bbbb")
+        cache.get("a")
+        cache.put("c", b"cccc")
+
+        self.assertEqual(cache.get("a"), b"aaaa")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), b"cccc")
+        self.assertLessEqual(cache.size_bytes, 10)
+
+    def test_concurrent_requests_share_one_computation(self):
+        cache = ValidationResultCache(max_bytes=1024, persist_dir=None)
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"xsdValid": True}
+
+        async def scenario():
+            return await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(5)))
+
+        results = asyncio.run(scenario())
+
+        self.assertEqual(calls, 1)
+        self.assertEqual({body for body, _, _ in results}, {b'{"xsdValid":true}'})
+        self.assertEqual(sum(1 for _, hit, _ in results if not hit), 1)
+        self.assertTrue(all(cacheable for _, _, cacheable in results))
+        self.assertIn("key", cache)
+
+    def test_uncacheable_results_are_not_stored(self):
+        cache = ValidationResultCache(max_bytes=1024, persist_dir=None)
+
+        async def compute():
+            return {"xsdValid": False}
+
+        _, _, cacheable = asyncio.run(cache.get_or_compute("key", compute, cacheable=lambda result: False))
+
+        self.assertFalse(cacheable)
+        self.assertIsNone(cache.get("key"))
+        self.assertNotIn("key", cache)
+
+    def test_followers_compute_again_when_the_leader_is_cancelled(self):
+        cache = ValidationResultCache(max_bytes=1024, persist_dir=None)
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"call": calls}
+
+        async def scenario():
+            leader = asyncio.create_task(cache.get_or_compute("key", compute))
+            await asyncio.sleep(0)
+            followers = [asyncio.create_task(cache.get_or_compute("key", compute)) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return await asyncio.gather(*followers)
+
+        results = asyncio.run(scenario())
+
+        self.assertEqual(calls, 2)
+        self.assertEqual({body for body, _, _ in results}, {b'{"call":2}'})
+        self.assertEqual(sum(1 for _, hit, _ in results if not hit), 1)
+
+    def test_persists_entries_to_disk(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ValidationResultCache(max_bytes=1024, persist_dir=Path(temp_dir)).put("abcd", b"{}")
+            restored = ValidationResultCache(max_bytes=1024, persist_dir=Path(temp_dir))
+
+            self.assertEqual(restored.get("abcd"), b"{}")
+
+    def test_if_none_match(self):
+        etag = etag_for_key("abc")
+
+        self.assertTrue(if_none_match_matches('"xyz", "abc"', etag))
+        self.assertTrue(if_none_match_matches('W/"abc"', etag))
+        self.assertTrue(if_none_match_matches("*", etag))
+        self.assertFalse(if_none_match_matches('"xyz"', etag))
+        self.assertFalse(if_none_match_matches(None, etag))
+
+    def test_accepts_encoding(self):
+        self.assertTrue(accepts_encoding("gzip, deflate, br", "gzip"))
+        self.assertTrue(accepts_encoding("br;q=1.0, *;q=0.5", "gzip"))
+        self.assertFalse(accepts_encoding("gzip;q=0, *", "gzip"))
+        self.assertFalse(accepts_encoding("identity", "gzip"))
+        self.assertFalse(accepts_encoding(None, "gzip"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.schema_artifact import (
+    load_schema_artifact,
+    load_schema_catalog,
+    namespace_locations_from_catalog,
+    write_schema_artifact,
+)
+from app.validation import SCHEMA_DIR, _get_schema, schema_fingerprint, vendored_schema_locations
+
+
+class SchemaArtifactTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.artifact_dir = Path(cls.temp_dir.name)
+        cls.locations = vendored_schema_locations()
+        write_schema_artifact(
+            _get_schema(),
+            output_dir=cls.artifact_dir,
+            schema_fingerprint=schema_fingerprint(),
+            namespace_locations=cls.locations,
+            base_dir=SCHEMA_DIR,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    def test_fresh_artifact_loads_a_working_schema(self):
+        catalog = load_schema_catalog(self.artifact_dir, schema_fingerprint=schema_fingerprint())
+        self.assertIsNotNone(catalog)
+
+        schema = load_schema_artifact(catalog, self.artifact_dir)
+        fixture = (BACKEND_DIR / "tests" / "fixtures" / "golden_valid.declaration.xml").read_bytes()
+
+        self.assertTrue(schema.is_valid(fixture))
+
+    def test_catalog_restores_namespace_locations(self):
+        catalog = load_schema_catalog(self.artifact_dir, schema_fingerprint=schema_fingerprint())
+
+        self.assertEqual(
+            sorted(namespace_locations_from_catalog(catalog, base_dir=SCHEMA_DIR)),
+            sorted((namespace, str(Path(location))) for namespace, location in self.locations),
+        )
+
+    def test_stale_artifact_is_ignored(self):
+        self.assertIsNone(load_schema_catalog(self.artifact_dir, schema_fingerprint="outdated"))
+
+    def test_missing_artifact_is_ignored(self):
+        with tempfile.TemporaryDirectory() as empty_dir:
+            self.assertIsNone(load_schema_catalog(Path(empty_dir), schema_fingerprint=schema_fingerprint()))
+
+
+if __name__ == "__main__":
+    unittest.main()
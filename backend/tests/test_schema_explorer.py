@@ -0,0 +1,192 @@
+import gzip
+import json
+import sys
+import unittest
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.schema_explorer import (
+    EXPLORER,
+    SCHEMA_SEARCH_INDEX,
+    SCHEMA_SEARCH_RESPONSES,
+    SCHEMA_TREE_RESPONSE,
+    EncodedJson,
+    EncodedJsonCache,
+    SchemaSearchIndex,
+    cached_schema_node_response,
+    cached_schema_search_response,
+    get_schema_node_response,
+    get_schema_search_response,
+    get_schema_tree,
+)
+
+
+class EncodedSchemaResponseTests(unittest.TestCase):
+    def test_precomputed_tree_matches_live_tree(self):
+        self.assertEqual(json.loads(SCHEMA_TREE_RESPONSE.body), get_schema_tree())
+        self.assertEqual(gzip.decompress(SCHEMA_TREE_RESPONSE.gzip_body), SCHEMA_TREE_RESPONSE.body)
+
+    def test_etags_are_stable_and_differ_per_encoding(self):
+        first = EncodedJson({"a": [1, 2]})
+        second = EncodedJson({"a": [1, 2]})
+
+        self.assertEqual(first.etag, second.etag)
+        self.assertEqual(first.gzip_body, second.gzip_body)
+        self.assertNotEqual(first.etag, first.gzip_etag)
+        self.assertNotEqual(first.etag, EncodedJson({"a": [2, 1]}).etag)
+
+
+def _without_node_fields(node: dict) -> dict:
+    node = {key: value for key, value in node.items() if key not in {"path", "childCount"}}
+    node["children"] = [_without_node_fields(child) for child in node["children"]]
+    return node
+
+
+class SchemaTreeAttributeTests(unittest.TestCase):
+    def _attributes(self, path: str) -> dict[str, dict]:
+        node = EXPLORER.get_node(path, depth=0)
+        return {attribute["name"]: attribute for attribute in node["attributes"]}
+
+    def test_attributes_carry_use_and_fixed_value(self):
+        person = self._attributes("naturalPersonTaxData/personalEmploymentAndFamilyStatus/personalDetail")["person"]
+        tax_factor = self._attributes(
+            "naturalPersonTaxData/domesticAndForeignIncome/capitalIncome/bankAccountIncome"
+        )["taxFactor"]
+
+        self.assertTrue(person["required"])
+        self.assertIsNone(person["fixed"])
+        self.assertEqual(tax_factor["fixed"], "taxable")
+
+    def test_extensions_in_child_types_do_not_add_attributes(self):
+        self.assertEqual(self._attributes("naturalPersonTaxData/domesticAndForeignIncome"), {})
+
+        pending = [(get_schema_tree()["root"], "naturalPersonTaxData")]
+        while pending:
+            node, path = pending.pop()
+            names = [attribute["name"] for attribute in node["attributes"]]
+            self.assertEqual(len(names), len(set(names)), path)
+            pending.extend((child, f"{path}/{child['name']}") for child in node["children"])
+
+
+class SchemaNodeTests(unittest.TestCase):
+    def test_expanded_nodes_match_the_full_tree(self):
+        pending = [(get_schema_tree()["root"], "naturalPersonTaxData")]
+        while pending:
+            expected, path = pending.pop()
+            with self.subTest(path=path):
+                node = EXPLORER.get_node(path, depth=100)
+                self.assertEqual(_without_node_fields(node), expected)
+            pending.extend((child, f"{path}/{child['name']}") for child in expected["children"][:3])
+
+    def test_depth_limits_expansion_and_keeps_child_counts(self):
+        full = get_schema_tree()["root"]
+
+        node = EXPLORER.get_node("", depth=1, offset=1, limit=2)
+
+        self.assertEqual(node["path"], "naturalPersonTaxData")
+        self.assertEqual(node["childCount"], len(full["children"]))
+        expected_children = full["children"][1:3]
+        self.assertEqual([child["name"] for child in node["children"]], [child["name"] for child in expected_children])
+        for child, expected in zip(node["children"], expected_children):
+            self.assertEqual(child["path"], f"naturalPersonTaxData/{expected['name']}")
+            self.assertEqual(child["childCount"], len(expected["children"]))
+            self.assertEqual(child["children"], [])
+
+    def test_unknown_path_returns_none(self):
+        self.assertIsNone(EXPLORER.get_node("naturalPersonTaxData/doesNotExist"))
+        self.assertIsNone(EXPLORER.get_node("unknownRoot"))
+
+    def test_node_index_covers_every_path_of_the_tree(self):
+        index = EXPLORER.node_index()
+        pending = [(get_schema_tree()["root"], "naturalPersonTaxData")]
+        while pending:
+            node, path = pending.pop()
+            self.assertIn(path, index)
+            pending.extend((child, f"{path}/{child['name']}") for child in node["children"])
+
+
+class SchemaNodeResponseCacheTests(unittest.TestCase):
+    def test_node_responses_are_cached_after_the_first_build(self):
+        key = ("naturalPersonTaxData", 2, 0, 5)
+
+        encoded = get_schema_node_response(*key)
+
+        self.assertIs(cached_schema_node_response(*key), encoded)
+        self.assertIs(get_schema_node_response(*key), encoded)
+        self.assertIsNone(get_schema_node_response("unknownRoot", 1, 0, 100))
+
+    def test_search_responses_share_the_byte_bounded_cache(self):
+        key = ("taxFactor", frozenset({"attribute"}), 5)
+
+        encoded = get_schema_search_response(*key)
+
+        self.assertIsInstance(SCHEMA_SEARCH_RESPONSES, EncodedJsonCache)
+        self.assertIs(cached_schema_search_response(*key), encoded)
+        expected = SCHEMA_SEARCH_INDEX.search("taxFactor", kinds={"attribute"}, limit=5)
+        self.assertEqual(json.loads(encoded.body), expected)
+        self.assertLessEqual(SCHEMA_SEARCH_RESPONSES.size_bytes, SCHEMA_SEARCH_RESPONSES.max_bytes)
+
+    def test_cache_evicts_least_recently_used_responses_beyond_its_byte_budget(self):
+        responses = [EncodedJson({"value": "x" * 200, "index": index}) for index in range(4)]
+        cache = EncodedJsonCache(max_bytes=responses[0].size_bytes * 2 + 10)
+
+        cache.put(("a",), responses[0])
+        cache.put(("b",), responses[1])
+        cache.get(("a",))
+        cache.put(("c",), responses[2])
+
+        self.assertIs(cache.get(("a",)), responses[0])
+        self.assertIsNone(cache.get(("b",)))
+        self.assertIs(cache.get(("c",)), responses[2])
+        self.assertLessEqual(cache.size_bytes, cache.max_bytes)
+
+    def test_responses_larger_than_the_budget_are_not_cached(self):
+        response = EncodedJson({"value": "x" * 200})
+        cache = EncodedJsonCache(max_bytes=response.size_bytes - 1)
+
+        cache.put(("a",), response)
+
+        self.assertIsNone(cache.get(("a",)))
+        self.assertEqual(cache.size_bytes, 0)
+
+
+class SchemaSearchTests(unittest.TestCase):
+    def test_exact_then_prefix_then_fuzzy_matches(self):
+        index = SchemaSearchIndex(
+            [
+                {"kind": "element", "name": name, "paths": [f"root/{name}"]}
+                for name in ("taxFactor", "taxFactorGroup", "taxValue", "factor")
+            ]
+        )
+
+        exact = index.search("TaxFactor")
+        fuzzy = index.search("taxFatcor")
+
+        self.assertEqual(
+            [(hit["name"], hit["match"]) for hit in exact["results"]],
+            [("taxFactor", "exact"), ("taxFactorGroup", "prefix")],
+        )
+        self.assertEqual([(hit["name"], hit["match"]) for hit in fuzzy["results"]], [("taxFactor", "fuzzy")])
+        self.assertEqual(index.search("fac")["total"], 1)
+        self.assertEqual(index.search("tax", limit=1)["total"], 3)
+
+    def test_schema_index_covers_groups_enumerations_and_types(self):
+        group = SCHEMA_SEARCH_INDEX.search("taxFactorGroup", kinds={"attributeGroup"})["results"]
+        attribute = SCHEMA_SEARCH_INDEX.search("taxProcedure", kinds={"attribute"})["results"]
+        enumeration = SCHEMA_SEARCH_INDEX.search("taxation", kinds={"enumeration"})["results"]
+        complex_type = SCHEMA_SEARCH_INDEX.search("headerType", kinds={"complexType"})["results"]
+
+        self.assertTrue(group[0]["paths"])
+        self.assertTrue(all(path.endswith("/@taxProcedure") for path in attribute[0]["paths"]))
+        self.assertTrue(enumeration[0]["paths"])
+        self.assertEqual(complex_type[0]["paths"], ["naturalPersonTaxData/header"])
+        for path in group[0]["paths"]:
+            self.assertIsNotNone(EXPLORER.get_node(path, depth=0))
+
+
+if __name__ == "__main__":
+    unittest.main()
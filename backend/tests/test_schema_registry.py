@@ -0,0 +1,82 @@
+import sys
+import unittest
+import urllib.request
+from pathlib import Path
+from unittest import mock
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.schema_explorer import EXPLORER, SCHEMA_SEARCH_INDEX
+from app.schema_registry import SCHEMA_PATH, VENDORED_SCHEMA_DIR, SchemaRegistry
+from app.validation import build_schema
+
+
+ADDRESS_PATH = "naturalPersonTaxData/personalEmploymentAndFamilyStatus/personalDetail/address"
+
+
+class SchemaRegistryTests(unittest.TestCase):
+    def test_fingerprint_does_not_parse_and_matches_the_loaded_one(self):
+        registry = SchemaRegistry()
+
+        fingerprint = registry.fingerprint()
+
+        self.assertIsNone(registry._documents)
+        loaded = SchemaRegistry()
+        loaded.documents
+        self.assertEqual(loaded.fingerprint(), fingerprint)
+
+    def test_prefixes_resolve_per_document(self):
+        registry = SchemaRegistry()
+        by_name = {document.path.name: document for document in registry.documents}
+
+        self.assertEqual(
+            by_name["eCH-0196-2-2.xsd"].qualified_name("eCH-0010:addressInformationType"),
+            "{http://www.ech.ch/xmlns/eCH-0010/7}addressInformationType",
+        )
+        self.assertEqual(
+            by_name["eCH-0275-1-0.xsd"].qualified_name("eCH-0010:addressInformationType"),
+            "{http://www.ech.ch/xmlns/eCH-0010-f/8}addressInformationType",
+        )
+        document, _ = registry.lookup("complexType", "{http://www.ech.ch/xmlns/eCH-0010/7}addressInformationType")
+        self.assertEqual(document.path.name, "eCH-0010-7-0.xsd")
+
+    def test_namespace_locations_cover_every_import_of_the_main_schema(self):
+        registry = SchemaRegistry()
+        locations = dict(registry.namespace_locations())
+        imports = registry.main.root.findall("{http://www.w3.org/2001/XMLSchema}import")
+
+        self.assertEqual(registry.main.path, SCHEMA_PATH)
+        for element in imports:
+            with self.subTest(namespace=element.get("namespace")):
+                self.assertTrue(Path(locations[element.get("namespace")]).is_relative_to(VENDORED_SCHEMA_DIR))
+
+    def test_xmlschema_build_reads_the_files_through_the_registry(self):
+        registry = SchemaRegistry()
+
+        with mock.patch.object(urllib.request.FileHandler, "file_open", side_effect=AssertionError("read from disk")):
+            schema = build_schema(registry.namespace_locations(), opener=registry.opener())
+
+        self.assertTrue(schema.is_valid((BACKEND_DIR / "tests" / "fixtures" / "golden_valid.taxation.xml").read_bytes()))
+
+
+class VendorTypeExpansionTests(unittest.TestCase):
+    def test_vendor_types_are_expanded_in_their_namespace(self):
+        node = EXPLORER.get_node(ADDRESS_PATH, depth=1)
+
+        self.assertEqual(node["type"], "addressInformationType")
+        self.assertGreater(node["childCount"], 0)
+        self.assertEqual(node["children"][0]["name"], "addressLine1")
+        self.assertEqual(node["children"][0]["namespace"], "http://www.ech.ch/xmlns/eCH-0010-f/8")
+        self.assertEqual(node["namespace"], "http://www.ech.ch/xmlns/eCH-0278/1")
+
+    def test_vendor_types_are_searchable(self):
+        results = SCHEMA_SEARCH_INDEX.search("addressInformationType", kinds={"complexType"})["results"]
+
+        self.assertIn(ADDRESS_PATH, results[0]["paths"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.comparison import compare_prepared, prepare_comparison_document
+from app.snapshots import PreparedSnapshot, SnapshotStore, SnapshotTooLargeError, prepare_snapshot
+from app.xml_utils import DocumentIndex
+
+
+FIXTURES_DIR = BACKEND_DIR / "tests" / "fixtures"
+
+
+class SnapshotStoreTests(unittest.TestCase):
+    def test_stored_snapshot_compares_like_a_fresh_upload(self):
+        baseline = (FIXTURES_DIR / "compare_valid_base.xml").read_bytes()
+        store = SnapshotStore(path=":memory:", max_bytes=64 * 1024 * 1024)
+        self.addCleanup(store.close)
+        store.put("base", baseline, prepare_snapshot(baseline), "v1")
+
+        record = store.get("base")
+
+        self.assertEqual(record.xml_bytes, baseline)
+        self.assertEqual(record.version, "v1")
+        self.assertIn("analysis", record.validation)
+        for fixture in sorted(FIXTURES_DIR.glob("compare_*.xml")):
+            with self.subTest(fixture=fixture.name):
+                other = prepare_comparison_document(fixture.read_bytes())
+                self.assertEqual(
+                    compare_prepared(record.comparison_document(), other, (0, 1000)),
+                    compare_prepared(prepare_comparison_document(baseline), other, (0, 1000)),
+                )
+
+    def test_evicts_least_recently_used_snapshots_over_budget(self):
+        store = SnapshotStore(path=":memory:", max_bytes=64 * 1024)
+        self.addCleanup(store.close)
+        snapshot = PreparedSnapshot({"xsdValid": False}, None)
+        entry_bytes = store.put("a", random.Random(1).randbytes(1000), snapshot, "v1").stored_bytes
+        store.max_bytes = 2 * entry_bytes + entry_bytes // 2
+        store.put("b", random.Random(2).randbytes(1000), snapshot, "v1")
+        store.get("a")
+        store.put("c", random.Random(3).randbytes(1000), snapshot, "v1")
+
+        self.assertIsNotNone(store.get("a"))
+        self.assertIsNone(store.get("b"))
+        self.assertIsNotNone(store.get("c"))
+        self.assertLessEqual(store.size_bytes, store.max_bytes)
+
+    def test_rejects_snapshot_larger_than_budget(self):
+        store = SnapshotStore(path=":memory:", max_bytes=16)
+        self.addCleanup(store.close)
+
+        with self.assertRaises(SnapshotTooLargeError):
+            store.put("big", bytes(range(256)), PreparedSnapshot({"xsdValid": False}, None), "v1")
+
+    def test_snapshots_persist_across_store_instances(self):
+        baseline = (FIXTURES_DIR / "compare_valid_base.xml").read_bytes()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = str(Path(temp_dir) / "snapshots.sqlite3")
+            first = SnapshotStore(path=path)
+            record = first.put("base", baseline, prepare_snapshot(baseline), "v1")
+            first.close()
+
+            second = SnapshotStore(path=path)
+            try:
+                restored = second.get("base")
+            finally:
+                second.close()
+
+        self.assertEqual(restored.metadata(), record.metadata())
+
+    def test_index_round_trips_through_its_data_only_encoding(self):
+        index = prepare_snapshot((FIXTURES_DIR / "compare_valid_base.xml").read_bytes()).index
+        data = index.to_bytes()
+
+        restored = DocumentIndex.from_bytes(data)
+
+        for name in DocumentIndex.__slots__:
+            with self.subTest(field=name):
+                self.assertEqual(getattr(restored, name), getattr(index, name))
+        with self.assertRaises(ValueError):
+            DocumentIndex.from_bytes(data[:-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import asyncio
+import io
+import sys
+import unittest
+from hashlib import sha256
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from fastapi import UploadFile
+
+from app.uploads import UploadTooLargeError, receive_upload
+
+
+def _upload(payload: bytes, *, size: int | None = None) -> UploadFile:
+    return UploadFile(file=io.BytesIO(payload), filename="upload.xml", size=size)
+
+
+class ReceiveUploadTests(unittest.TestCase):
+    def test_small_upload_stays_in_memory(self):
+        upload = asyncio.run(receive_upload(_upload(b"<root/>"), max_bytes=100, memory_limit=50))
+
+        self.assertFalse(upload.streamed)
+        self.assertEqual(upload.content, b"<root/>")
+        self.assertEqual(upload.digest, sha256(b"<root/>").digest())
+
+    def test_large_upload_is_spooled_to_disk(self):
+        payload = b"<root>" + b"x" * 200 + b"</root>"
+        upload = asyncio.run(receive_upload(_upload(payload), max_bytes=1000, memory_limit=50))
+        try:
+            self.assertTrue(upload.streamed)
+            self.assertIsNone(upload.content)
+            self.assertEqual(upload.path.read_bytes(), payload)
+            self.assertEqual(upload.size, len(payload))
+        finally:
+            upload.cleanup()
+
+        self.assertFalse(upload.path.exists())
+
+    def test_rejects_uploads_over_the_route_limit(self):
+        with self.assertRaises(UploadTooLargeError):
+            asyncio.run(receive_upload(_upload(b"x" * 20), max_bytes=10, memory_limit=5))
+
+    def test_rejects_declared_size_before_reading(self):
+        with self.assertRaises(UploadTooLargeError):
+            asyncio.run(receive_upload(_upload(b"", size=20), max_bytes=10, memory_limit=5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import json
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import app.validation as validation
+from app.result_cache import encode_result
+from app.validation import encoded_result_xsd_valid, validate_document, validate_xml, validate_xml_file
+from app.xml_utils import decode_xml_text, parse_xml_document
+
+
+FIXTURES_DIR = BACKEND_DIR / "tests" / "fixtures"
+EXPECTED_DIR = BACKEND_DIR / "tests" / "expected"
+
+
+def _load_expected(name: str) -> dict:
+    return json.loads((EXPECTED_DIR / f"{name}.expected.json").read_text(encoding="utf-8-sig"))
+
+
+class ValidateXmlTests(unittest.TestCase):
+    def test_fixtures_match_expected_snapshots(self):
+        for expected_file in sorted(EXPECTED_DIR.glob("*.expected.json")):
+            name = expected_file.name.removesuffix(".expected.json")
+            fixture = FIXTURES_DIR / f"{name}.xml"
+            if not fixture.exists():
+                continue
+            with self.subTest(fixture=fixture.name):
+                self.assertEqual(validate_xml(fixture.read_bytes()), _load_expected(name))
+
+    def test_validate_document_reuses_parsed_tree(self):
+        xml_bytes = (FIXTURES_DIR / "incomplete_with_attributes.xml").read_bytes()
+        document = parse_xml_document(xml_bytes)
+
+        self.assertIsNotNone(document.root)
+        self.assertEqual(validate_document(document), validate_xml(xml_bytes))
+
+    def test_file_validation_matches_in_memory_validation(self):
+        for fixture in sorted(FIXTURES_DIR.glob("*.xml")):
+            with self.subTest(fixture=fixture.name):
+                streamed = validate_xml_file(fixture)
+                in_memory = validate_xml(fixture.read_bytes())
+
+                self.assertEqual(streamed["xsdValid"], in_memory["xsdValid"])
+                self.assertEqual(len(streamed["structuralErrors"]), len(in_memory["structuralErrors"]))
+                self.assertEqual(streamed["namespaces"], in_memory["namespaces"])
+                self.assertEqual(streamed["analysis"], in_memory["analysis"])
+
+    def test_empty_payload(self):
+        result = validate_xml(b"")
+
+        self.assertFalse(result["xsdValid"])
+        self.assertEqual(result["structuralErrors"], ["XML parse error: empty payload."])
+
+    def test_error_modes_stop_at_the_limit(self):
+        for fixture in (FIXTURES_DIR / "incomplete_minimal.xml", FIXTURES_DIR / "golden_valid.taxation.xml"):
+            xml_bytes = fixture.read_bytes()
+            full = validate_xml(xml_bytes)
+            error_count = len(full["structuralErrors"])
+            modes = [("first", 1), ("max:2", 2)]
+            if error_count:
+                # Exactly as many errors as the limit: the walk still completes.
+                modes.append((f"max:{error_count}", error_count))
+            for mode, limit in modes:
+                with self.subTest(fixture=fixture.name, mode=mode):
+                    limited = validate_xml(xml_bytes, mode=mode)
+                    streamed = validate_xml_file(fixture, mode=mode)
+
+                    self.assertEqual(limited["xsdValid"], full["xsdValid"])
+                    self.assertEqual(limited["structuralErrors"], full["structuralErrors"][:limit])
+                    self.assertEqual(
+                        limited["structuralErrorsLimitReached"],
+                        error_count > limit,
+                    )
+                    self.assertEqual(len(streamed["structuralErrors"]), len(limited["structuralErrors"]))
+                    self.assertEqual(
+                        streamed["structuralErrorsLimitReached"],
+                        limited["structuralErrorsLimitReached"],
+                    )
+                    # The streamed scan has seen every element, so its analysis is always kept.
+                    self.assertEqual(streamed["analysis"], full["analysis"])
+                    if limited["structuralErrorsLimitReached"]:
+                        self.assertNotIn("analysis", limited)
+                    else:
+                        self.assertEqual(limited["analysis"], full["analysis"])
+
+        self.assertNotIn("structuralErrorsLimitReached", validate_xml(b"<a/>"))
+        with self.assertRaises(ValueError):
+            validate_xml(b"<a/>", mode="max:0")
+
+    def test_limited_modes_skip_the_analysis_walk_once_stopped(self):
+        xml_bytes = (FIXTURES_DIR / "incomplete_minimal.xml").read_bytes()
+
+        detect_tax_procedures = validation._detect_tax_procedures
+        with mock.patch.object(validation, "_detect_tax_procedures", wraps=detect_tax_procedures) as detect:
+            self.assertTrue(validate_xml(xml_bytes, mode="first")["structuralErrorsLimitReached"])
+            detect.assert_not_called()
+            self.assertIn("analysis", validate_xml(xml_bytes))
+            detect.assert_called_once()
+
+    def test_encoded_result_xsd_valid_matches_the_result(self):
+        for fixture in (FIXTURES_DIR / "incomplete_minimal.xml", FIXTURES_DIR / "golden_valid.taxation.xml"):
+            with self.subTest(fixture=fixture.name):
+                result = validate_xml(fixture.read_bytes())
+                self.assertEqual(encoded_result_xsd_valid(encode_result(result)), result["xsdValid"])
+
+    def test_decode_xml_text_follows_bom_and_declaration(self):
+        declared = '<?xml version="1.0" encoding="ISO-8859-1"?><a>\u00e9</a>'
+
+        self.assertEqual(decode_xml_text(declared.encode("iso-8859-1")), declared)
+        self.assertEqual(decode_xml_text("<a>\u00e9</a>".encode("utf-16")), "<a>\u00e9</a>")
+        self.assertEqual(decode_xml_text(b"\xef\xbb\xbf<a/>"), "<a/>")
+        self.assertEqual(decode_xml_text("<a>\u00e9</a>".encode("utf-8")), "<a>\u00e9</a>")
+
+
+if __name__ == "__main__":
+    unittest.main()
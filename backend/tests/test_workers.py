@@ -0,0 +1,110 @@
+import asyncio
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.validation import validate_xml
+from app.workers import ValidationWorkerPool, WorkerJobTimeoutError, WorkerPoolSaturatedError
+
+
+class ValidationWorkerPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.pool = ValidationWorkerPool(mode="thread", workers=1, queue_limit=1, job_timeout_seconds=5)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_runs_validation_off_the_event_loop(self):
+        async def scenario():
+            await self.pool.start()
+            return await self.pool.run(validate_xml, b"<root/>")
+
+        result = asyncio.run(scenario())
+
+        self.assertFalse(result["xsdValid"])
+        self.assertEqual(self.pool.queue_depth, 0)
+
+    def test_rejects_jobs_when_queue_is_full(self):
+        release = threading.Event()
+
+        async def scenario():
+            blocking = asyncio.ensure_future(self.pool.run(release.wait))
+            await asyncio.sleep(0.05)
+            try:
+                with self.assertRaises(WorkerPoolSaturatedError):
+                    await self.pool.run(validate_xml, b"<root/>")
+            finally:
+                release.set()
+            await blocking
+
+        asyncio.run(scenario())
+
+    def test_restart_lets_running_jobs_finish_on_the_previous_workers(self):
+        self.pool.queue_limit = 2
+        release = threading.Event()
+
+        async def scenario():
+            await self.pool.start()
+            previous = self.pool._executor
+            blocking = asyncio.ensure_future(self.pool.run(release.wait))
+            await asyncio.sleep(0.05)
+
+            await self.pool.restart()
+            self.assertIsNot(self.pool._executor, previous)
+            result = await self.pool.run(validate_xml, b"<root/>")
+            self.assertFalse(blocking.done())
+
+            release.set()
+            self.assertTrue(await blocking)
+            return result
+
+        self.assertFalse(asyncio.run(scenario())["xsdValid"])
+
+    def test_times_out_slow_jobs(self):
+        self.pool.job_timeout_seconds = 0.05
+        release = threading.Event()
+
+        async def scenario():
+            try:
+                with self.assertRaises(WorkerJobTimeoutError):
+                    await self.pool.run(release.wait)
+            finally:
+                release.set()
+
+        asyncio.run(scenario())
+
+
+class ProcessWorkerTimeoutTests(unittest.TestCase):
+    def setUp(self):
+        self.pool = ValidationWorkerPool(mode="process", workers=1, queue_limit=1, job_timeout_seconds=60)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_timed_out_job_is_terminated_and_the_pool_keeps_working(self):
+        async def scenario():
+            await self.pool.start()
+            self.pool.job_timeout_seconds = 0.5
+            with self.assertRaises(WorkerJobTimeoutError):
+                await self.pool.run(time.sleep, 300)
+
+            deadline = time.monotonic() + 10
+            while self.pool.queue_depth and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            self.assertEqual(self.pool.queue_depth, 0)
+
+            self.pool.job_timeout_seconds = 60
+            return await self.pool.run(validate_xml, b"<root/>")
+
+        self.assertFalse(asyncio.run(scenario())["xsdValid"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.comparison import compare_xml
+from app.schema_explorer import EXPLORER
+from app.validation import validate_xml, warm_validation_resources
+from app.xml_utils import collect_leaf_values, parse_xml_once
+from generate_documents import DocumentGenerator, parse_procedure_mix, parse_size
+
+
+DEFAULT_SIZES = ("10KB", "100KB", "1MB")
+DEFAULT_REPEAT = 5
+DEFAULT_MAX_REGRESSION = 0.25
+BASELINE_VERSION = 1
+
+
+class BenchmarkInput:
+    """A generated document, a variant with other values for comparisons, and its parsed root."""
+
+    __slots__ = ("label", "data", "changed", "root")
+
+    def __init__(self, label: str, data: bytes, changed: bytes):
+        self.label = label
+        self.data = data
+        self.changed = changed
+        self.root = parse_xml_once(data)[0]
+
+
+# Benchmarks per input document; ``get_tree`` does not depend on one and runs once.
+CASES: dict[str, Callable[[BenchmarkInput], object]] = {
+    "parse_xml_once": lambda document: parse_xml_once(document.data),
+    "validate_xml": lambda document: validate_xml(document.data),
+    "validate_xml_procedural": lambda document: validate_xml(document.data, procedural=True),
+    "compare_xml": lambda document: compare_xml(document.data, document.changed),
+    "collect_leaf_values": lambda document: collect_leaf_values(document.root),
+}
+SCHEMA_CASES: dict[str, Callable[[], object]] = {
+    "get_tree": EXPLORER.get_tree,
+}
+
+
+def measure(func: Callable[[], object], repeat: int, size: int | None) -> dict:
+    """Wall time over ``repeat`` runs after one warm-up, and peak traced memory of one more run.
+
+    Peak memory covers Python allocations only; memory held by Saxon's native heap is not seen.
+    """
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(timings)
+    return {
+        "bytes": size,
+        "minSeconds": min(timings),
+        "medianSeconds": median,
+        "peakBytes": peak,
+        "throughputMBps": size / median / 1_000_000 if size and median else None,
+    }
+
+
+def run_benchmarks(
+    sizes: list[str],
+    *,
+    cases: set[str] | None = None,
+    repeat: int = DEFAULT_REPEAT,
+    procedure_mix: dict[str, float] | None = None,
+    seed: int = 0,
+) -> dict:
+    warm_validation_resources()
+    generator = DocumentGenerator(procedure_mix=procedure_mix, seed=seed)
+    changed_generator = DocumentGenerator(procedure_mix=procedure_mix, seed=seed + 1)
+
+    results: dict[str, dict] = {}
+    for name, func in SCHEMA_CASES.items():
+        if cases is None or name in cases:
+            results[name] = measure(func, repeat, None)
+            _report(name, results[name])
+
+    for label in sizes:
+        target = parse_size(label)
+        document = BenchmarkInput(label, generator.generate_size(target), changed_generator.generate_size(target))
+        for name, func in CASES.items():
+            if cases is not None and name not in cases:
+                continue
+            key = f"{name}@{label}"
+            results[key] = measure(lambda: func(document), repeat, len(document.data))
+            _report(key, results[key])
+
+    return {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def _report(key: str, result: dict) -> None:
+    throughput = result["throughputMBps"]
+    print(
+        f"{key:<40} median {result['medianSeconds'] * 1000:10.2f} ms"
+        f"  min {result['minSeconds'] * 1000:10.2f} ms"
+        f"  peak {result['peakBytes'] / 1_000_000:9.2f} MB"
+        + (f"  {throughput:8.2f} MB/s" if throughput is not None else ""),
+        flush=True,
+    )
+
+
+def compare_with_baseline(current: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Benchmarks whose fastest run or peak memory grew by more than ``max_regression`` over the baseline.
+
+    The fastest run is compared rather than the median, as it is the least affected by a noisy host.
+    """
+    regressions = []
+    for key, result in current["results"].items():
+        previous = baseline.get("results", {}).get(key)
+        if previous is None:
+            continue
+        for field, unit, scale in (("minSeconds", "ms", 1000), ("peakBytes", "MB", 1 / 1_000_000)):
+            before, after = previous[field], result[field]
+            if before and after > before * (1 + max_regression):
+                regressions.append(
+                    f"{key}: {field} {before * scale:.2f} {unit} -> {after * scale:.2f} {unit}"
+                    f" (+{(after / before - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark parsing, validation, comparison and schema tree building on generated documents."
+    )
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES), help="Comma-separated sizes such as 10KB,1MB")
+    parser.add_argument(
+        "--cases",
+        default="",
+        help=f"Comma-separated benchmarks to run (default: all of {', '.join([*SCHEMA_CASES, *CASES])})",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per benchmark")
+    parser.add_argument(
+        "--procedure-mix",
+        default="declaration=1,taxation=1",
+        help="Relative taxProcedure weights of the generated documents",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generated values")
+    parser.add_argument("--output", type=Path, default=None, help="Write results as a JSON baseline to this file")
+    parser.add_argument("--baseline", type=Path, default=None, help="Compare against a baseline from --output")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=DEFAULT_MAX_REGRESSION,
+        help="Allowed relative growth of time or peak memory before failing (default: 0.25)",
+    )
+    args = parser.parse_args()
+
+    cases = {case.strip() for case in args.cases.split(",") if case.strip()} or None
+    unknown = sorted((cases or set()) - set(CASES) - set(SCHEMA_CASES))
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    current = run_benchmarks(
+        [size.strip() for size in args.sizes.split(",") if size.strip()],
+        cases=cases,
+        repeat=max(1, args.repeat),
+        procedure_mix=parse_procedure_mix(args.procedure_mix),
+        seed=args.seed,
+    )
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote benchmark results {args.output}.")
+
+    if args.baseline is not None:
+        regressions = compare_with_baseline(
+            current,
+            json.loads(args.baseline.read_text(encoding="utf-8")),
+            args.max_regression,
+        )
+        if regressions:
+            print("Regressions against the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.schema_artifact import write_schema_artifact
+from app.validation import (
+    GENERATED_SCHEMA_DIR,
+    SCHEMA_DIR,
+    build_schema,
+    schema_fingerprint,
+    vendored_schema_locations,
+)
+
+
+def build_schema_artifact(output_dir: Path) -> Path:
+    namespace_locations = vendored_schema_locations()
+    schema = build_schema(namespace_locations)
+    return write_schema_artifact(
+        schema,
+        output_dir=output_dir,
+        schema_fingerprint=schema_fingerprint(),
+        namespace_locations=namespace_locations,
+        base_dir=SCHEMA_DIR,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Prebuild the eCH-0278 XSD model and namespace catalog for fast backend startup."
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=GENERATED_SCHEMA_DIR,
+        help="Directory to write the schema artifact and catalog to",
+    )
+    args = parser.parse_args()
+
+    catalog_path = build_schema_artifact(args.output_dir)
+    print(f"Wrote schema artifact catalog {catalog_path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,101 +1,425 @@
-from __future__ import annotations
-
-import argparse
-from pathlib import Path
-
-from saxonche import PySaxonProcessor
-
-
-def _matches_any_glob(path: Path, patterns: list[str]) -> bool:
-    return any(path.match(pattern) for pattern in patterns)
-
-
-def compile_schematron(
-    source_dir: Path,
-    output_dir: Path,
-    compiler_xsl: Path,
-    include_globs: list[str],
-    exclude_globs: list[str],
-) -> int:
-    if not compiler_xsl.exists():
-        raise FileNotFoundError(
-            f"SchXslt compiler stylesheet not found: {compiler_xsl}. "
-            "Expected transpile.xsl at this path."
-        )
-
-    schematron_files = sorted(source_dir.rglob("*.sch"))
-    filtered_schematron_files: list[Path] = []
-    for schematron_file in schematron_files:
-        relative_path = schematron_file.relative_to(source_dir)
-        if include_globs and not _matches_any_glob(relative_path, include_globs):
-            continue
-        if exclude_globs and _matches_any_glob(relative_path, exclude_globs):
-            continue
-        filtered_schematron_files.append(schematron_file)
-
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    if not filtered_schematron_files:
-        return 0
-
-    compiled_count = 0
-    with PySaxonProcessor(license=False) as processor:
-        xslt_processor = processor.new_xslt30_processor()
-
-        for schematron_file in filtered_schematron_files:
-            relative_path = schematron_file.relative_to(source_dir)
-            output_file = (output_dir / relative_path).with_suffix(".xsl")
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-
-            xslt_processor.transform_to_file(
-                stylesheet_file=str(compiler_xsl),
-                source_file=str(schematron_file),
-                output_file=str(output_file),
-            )
-            compiled_count += 1
-
-    return compiled_count
-
-
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Compile Schematron rules to XSLT using SchXslt.")
-    parser.add_argument("--source-dir", required=True, type=Path, help="Directory containing .sch files")
-    parser.add_argument("--output-dir", required=True, type=Path, help="Directory to write compiled .xsl files")
-    parser.add_argument(
-        "--compiler-xsl",
-        required=True,
-        type=Path,
-        help="Path to SchXslt transpile.xsl stylesheet",
-    )
-    parser.add_argument(
-        "--include-glob",
-        action="append",
-        default=[],
-        help=(
-            "Optional glob pattern relative to --source-dir to include .sch files. "
-            "Can be provided multiple times."
-        ),
-    )
-    parser.add_argument(
-        "--exclude-glob",
-        action="append",
-        default=[],
-        help=(
-            "Optional glob pattern relative to --source-dir to exclude .sch files. "
-            "Can be provided multiple times."
-        ),
-    )
-    args = parser.parse_args()
-
-    compiled = compile_schematron(
-        args.source_dir,
-        args.output_dir,
-        args.compiler_xsl,
-        args.include_glob,
-        args.exclude_glob,
-    )
-    print(f"Compiled {compiled} Schematron file(s).")
-
-
-if __name__ == "__main__":
-    main()
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+from saxonche import PySaxonProcessor
+
+
+SCH_NS = "http://purl.oclc.org/dsdl/schematron"
+XML_BASE = "{http://www.w3.org/XML/1998/namespace}base"
+MERGED_SCHEMATRON_FILE = "merged.sch"
+MERGED_STYLESHEET_FILE = "merged.xsl"
+MERGED_MANIFEST_FILE = "manifest.json"
+COMPILED_MANIFEST_FILE = "manifest.json"
+COMPILED_MANIFEST_VERSION = 1
+RULE_VERSION_FILE = "VERSION"
+_DROPPED_MERGE_ELEMENTS = {"title", "p", "phase"}
+_INCLUDE_ELEMENTS = ("include", "extends")
+
+_worker_processor: PySaxonProcessor | None = None
+
+
+class SchematronMergeError(ValueError):
+    """Rule sets that compile on their own but cannot be combined into one merged schema."""
+
+
+def _matches_any_glob(path: Path, patterns: list[str]) -> bool:
+    return any(path.match(pattern) for pattern in patterns)
+
+
+def _sch(name: str) -> str:
+    return f"{{{SCH_NS}}}{name}"
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def source_digest(schematron_file: Path) -> str:
+    """Hash of a Schematron file and every file it pulls in with ``sch:include`` or ``sch:extends``."""
+    digest = hashlib.sha256()
+    pending = [schematron_file.resolve()]
+    seen: set[Path] = set()
+    while pending:
+        path = pending.pop(0)
+        if path in seen:
+            continue
+        seen.add(path)
+        if not path.exists():
+            digest.update(f"missing:{path.name}".encode("utf-8"))
+            continue
+        data = path.read_bytes()
+        digest.update(data)
+        try:
+            root = ET.fromstring(data)
+        except ET.ParseError:
+            continue
+        for name in _INCLUDE_ELEMENTS:
+            for element in root.iter(_sch(name)):
+                href = element.get("href")
+                if href:
+                    pending.append((path.parent / href.split("#", 1)[0]).resolve())
+    return digest.hexdigest()
+
+
+def rule_version(schematron_file: Path) -> str | None:
+    """The schema's ``schemaVersion``, else a ``VERSION`` file next to it or one directory up."""
+    try:
+        value = (ET.parse(schematron_file).getroot().get("schemaVersion") or "").strip()
+    except ET.ParseError:
+        value = ""
+    if value:
+        return value
+    for candidate in (schematron_file.parent / RULE_VERSION_FILE, schematron_file.parent.parent / RULE_VERSION_FILE):
+        if candidate.exists():
+            value = candidate.read_text(encoding="utf-8").strip()
+            if value:
+                return value
+    return None
+
+
+def compiler_version(processor: PySaxonProcessor, compiler_xsl: Path) -> dict:
+    """Saxon release and SchXslt stylesheet digest; a change to either recompiles every rule set."""
+    return {"saxon": processor.version, "compilerDigest": _sha256(compiler_xsl)}
+
+
+def _read_manifest(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _init_compile_worker() -> None:
+    global _worker_processor
+    _worker_processor = PySaxonProcessor(license=False)
+
+
+def _compile_in_worker(compiler_xsl: str, source_file: str, output_file: str) -> None:
+    _worker_processor.new_xslt30_processor().transform_to_file(
+        stylesheet_file=compiler_xsl,
+        source_file=source_file,
+        output_file=output_file,
+    )
+
+
+def merge_schematron(schematron_files: list[Path], source_dir: Path) -> tuple[ET.Element, list[dict]]:
+    """Combine several Schematron schemas into one whose patterns keep track of their source file.
+
+    Pattern ids are prefixed per source so they stay unique; the returned entries map every
+    prefixed pattern id back to the stylesheet the source compiles to on its own. Raises
+    ``SchematronMergeError`` for rule sets that cannot share one schema.
+    """
+    merged = ET.Element(_sch("schema"))
+    namespaces: dict[str, str] = {}
+    global_names: set[tuple[str, str]] = set()
+    query_binding: str | None = None
+    sources: list[dict] = []
+
+    for source_index, schematron_file in enumerate(schematron_files):
+        root = ET.parse(schematron_file).getroot()
+        if root.tag != _sch("schema"):
+            raise ValueError(f"{schematron_file} is not an ISO Schematron schema.")
+
+        binding = root.get("queryBinding", "xslt")
+        if query_binding is None:
+            query_binding = binding
+            merged.set("queryBinding", binding)
+        elif binding != query_binding:
+            raise SchematronMergeError(
+                f"{schematron_file} uses queryBinding '{binding}', expected '{query_binding}'."
+            )
+        if root.get("defaultPhase", "#ALL") != "#ALL":
+            raise SchematronMergeError(f"{schematron_file} declares a default phase and cannot be merged.")
+
+        prefix = f"s{source_index}-"
+        renamed_patterns = {
+            pattern.get("id"): f"{prefix}{pattern.get('id')}"
+            for pattern in root.findall(_sch("pattern"))
+            if pattern.get("id")
+        }
+        pattern_ids: list[str] = []
+        base_uri = schematron_file.resolve().as_uri()
+
+        for child in root:
+            if not isinstance(child.tag, str) or not child.tag.startswith(f"{{{SCH_NS}}}"):
+                merged.append(child)
+                continue
+
+            name = child.tag.split("}", 1)[1]
+            if name in _DROPPED_MERGE_ELEMENTS:
+                continue
+            if name == "include":
+                raise SchematronMergeError(f"{schematron_file} uses a top-level sch:include and cannot be merged.")
+
+            if name == "ns":
+                ns_prefix, uri = child.get("prefix", ""), child.get("uri", "")
+                if namespaces.setdefault(ns_prefix, uri) != uri:
+                    raise SchematronMergeError(
+                        f"{schematron_file} binds prefix '{ns_prefix}' to a different namespace."
+                    )
+                if any(item.get("prefix") == ns_prefix for item in merged.findall(_sch("ns"))):
+                    continue
+            elif name == "let":
+                key = ("let", child.get("name", ""))
+                if key in global_names:
+                    raise SchematronMergeError(f"{schematron_file} redeclares global variable '{key[1]}'.")
+                global_names.add(key)
+            elif name == "pattern":
+                pattern_id = renamed_patterns.get(child.get("id")) or f"{prefix}pattern-{len(pattern_ids)}"
+                child.set("id", pattern_id)
+                if child.get("is-a") in renamed_patterns:
+                    child.set("is-a", renamed_patterns[child.get("is-a")])
+                pattern_ids.append(pattern_id)
+            elif name == "diagnostics":
+                for diagnostic in child:
+                    key = ("diagnostic", diagnostic.get("id", ""))
+                    if key in global_names:
+                        raise SchematronMergeError(f"{schematron_file} redeclares diagnostic '{key[1]}'.")
+                    global_names.add(key)
+
+            child.set(XML_BASE, base_uri)
+            merged.append(child)
+
+        sources.append(
+            {
+                "source": schematron_file.relative_to(source_dir).as_posix(),
+                "stylesheet": schematron_file.relative_to(source_dir).with_suffix(".xsl").as_posix(),
+                "patterns": pattern_ids,
+            }
+        )
+
+    # Namespace declarations must precede every other top-level element.
+    merged[:] = sorted(merged, key=lambda element: element.tag != _sch("ns"))
+    return merged, sources
+
+
+def compile_merged_schematron(
+    processor: PySaxonProcessor,
+    schematron_files: list[Path],
+    source_dir: Path,
+    output_dir: Path,
+    merged_output_dir: Path,
+    compiler_xsl: Path,
+    compiler: dict | None = None,
+) -> Path | None:
+    """Compile the merged stylesheet, unless its manifest shows the same sources and compiler.
+
+    Rule sets that cannot be merged only cost the merged stylesheet: a warning is printed, any earlier
+    merged output is removed and ``None`` is returned. The backend then runs the rule sets one by one.
+    """
+    try:
+        merged, sources = merge_schematron(schematron_files, source_dir)
+    except SchematronMergeError as exc:
+        print(f"Warning: skipping the merged stylesheet: {exc}", file=sys.stderr)
+        for name in (MERGED_MANIFEST_FILE, MERGED_SCHEMATRON_FILE, MERGED_STYLESHEET_FILE):
+            (merged_output_dir / name).unlink(missing_ok=True)
+        return None
+    merged_output_dir.mkdir(parents=True, exist_ok=True)
+    for source in sources:
+        source["digest"] = _sha256(output_dir / source["stylesheet"])
+    manifest = {"stylesheet": MERGED_STYLESHEET_FILE, "compiler": compiler, "sources": sources}
+
+    manifest_path = merged_output_dir / MERGED_MANIFEST_FILE
+    if compiler is not None and (merged_output_dir / MERGED_STYLESHEET_FILE).exists():
+        if _read_manifest(manifest_path) == manifest:
+            return manifest_path
+
+    merged_source = merged_output_dir / MERGED_SCHEMATRON_FILE
+    ET.register_namespace("sch", SCH_NS)
+    ET.ElementTree(merged).write(merged_source, encoding="utf-8", xml_declaration=True)
+
+    processor.new_xslt30_processor().transform_to_file(
+        stylesheet_file=str(compiler_xsl),
+        source_file=str(merged_source),
+        output_file=str(merged_output_dir / MERGED_STYLESHEET_FILE),
+    )
+    manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest_path
+
+
+def compile_schematron(
+    source_dir: Path,
+    output_dir: Path,
+    compiler_xsl: Path,
+    include_globs: list[str],
+    exclude_globs: list[str],
+    merged_output_dir: Path | None = None,
+    jobs: int | None = None,
+) -> int:
+    """Compile the selected ``.sch`` files whose sources or compiler changed, and return how many were.
+
+    ``manifest.json`` in ``output_dir`` records per stylesheet its source, source digest, output
+    digest and rule version, plus the compiler version. Stylesheets of sources that are no longer
+    selected are removed. Up to ``jobs`` processes compile in parallel, one Saxon processor each.
+    """
+    if not compiler_xsl.exists():
+        raise FileNotFoundError(
+            f"SchXslt compiler stylesheet not found: {compiler_xsl}. "
+            "Expected transpile.xsl at this path."
+        )
+
+    schematron_files = sorted(source_dir.rglob("*.sch"))
+    filtered_schematron_files: list[Path] = []
+    for schematron_file in schematron_files:
+        relative_path = schematron_file.relative_to(source_dir)
+        if include_globs and not _matches_any_glob(relative_path, include_globs):
+            continue
+        if exclude_globs and _matches_any_glob(relative_path, exclude_globs):
+            continue
+        filtered_schematron_files.append(schematron_file)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / COMPILED_MANIFEST_FILE
+    previous = _read_manifest(manifest_path)
+
+    with PySaxonProcessor(license=False) as processor:
+        compiler = compiler_version(processor, compiler_xsl)
+        reusable = {}
+        if previous.get("version") == COMPILED_MANIFEST_VERSION and previous.get("compiler") == compiler:
+            reusable = {entry["stylesheet"]: entry for entry in previous.get("stylesheets", [])}
+
+        entries: list[dict] = []
+        pending: list[tuple[Path, Path]] = []
+        for schematron_file in filtered_schematron_files:
+            stylesheet = schematron_file.relative_to(source_dir).with_suffix(".xsl").as_posix()
+            output_file = output_dir / stylesheet
+            entry = {
+                "source": schematron_file.relative_to(source_dir).as_posix(),
+                "sourceDigest": source_digest(schematron_file),
+                "stylesheet": stylesheet,
+                "ruleVersion": rule_version(schematron_file),
+            }
+            known = reusable.get(stylesheet)
+            if (
+                known is not None
+                and known["sourceDigest"] == entry["sourceDigest"]
+                and output_file.exists()
+                and _sha256(output_file) == known["digest"]
+            ):
+                entry["digest"] = known["digest"]
+            else:
+                output_file.parent.mkdir(parents=True, exist_ok=True)
+                pending.append((schematron_file, output_file))
+            entries.append(entry)
+
+        workers = min(len(pending), jobs or os.cpu_count() or 1)
+        if workers > 1:
+            # Spawned, not forked: a forked child would inherit this process's Saxon runtime.
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_compile_worker,
+            ) as pool:
+                list(
+                    pool.map(
+                        _compile_in_worker,
+                        [str(compiler_xsl)] * len(pending),
+                        [str(source) for source, _ in pending],
+                        [str(output) for _, output in pending],
+                    )
+                )
+        elif pending:
+            xslt_processor = processor.new_xslt30_processor()
+            for schematron_file, output_file in pending:
+                xslt_processor.transform_to_file(
+                    stylesheet_file=str(compiler_xsl),
+                    source_file=str(schematron_file),
+                    output_file=str(output_file),
+                )
+
+        for entry in entries:
+            entry.setdefault("digest", _sha256(output_dir / entry["stylesheet"]))
+        selected = {entry["stylesheet"] for entry in entries}
+        for stale in previous.get("stylesheets", []):
+            if stale["stylesheet"] not in selected:
+                (output_dir / stale["stylesheet"]).unlink(missing_ok=True)
+        manifest_path.write_text(
+            json.dumps(
+                {"version": COMPILED_MANIFEST_VERSION, "compiler": compiler, "stylesheets": entries},
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+
+        if merged_output_dir is not None and filtered_schematron_files:
+            compile_merged_schematron(
+                processor,
+                filtered_schematron_files,
+                source_dir,
+                output_dir,
+                merged_output_dir,
+                compiler_xsl,
+                compiler,
+            )
+
+    return len(pending)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compile Schematron rules to XSLT using SchXslt.")
+    parser.add_argument("--source-dir", required=True, type=Path, help="Directory containing .sch files")
+    parser.add_argument("--output-dir", required=True, type=Path, help="Directory to write compiled .xsl files")
+    parser.add_argument(
+        "--compiler-xsl",
+        required=True,
+        type=Path,
+        help="Path to SchXslt transpile.xsl stylesheet",
+    )
+    parser.add_argument(
+        "--include-glob",
+        action="append",
+        default=[],
+        help=(
+            "Optional glob pattern relative to --source-dir to include .sch files. "
+            "Can be provided multiple times."
+        ),
+    )
+    parser.add_argument(
+        "--exclude-glob",
+        action="append",
+        default=[],
+        help=(
+            "Optional glob pattern relative to --source-dir to exclude .sch files. "
+            "Can be provided multiple times."
+        ),
+    )
+    parser.add_argument(
+        "--merged-output-dir",
+        type=Path,
+        default=None,
+        help=(
+            "Optional directory for a single stylesheet that evaluates every selected rule set "
+            "in one pass, together with a manifest mapping its patterns to the per-file stylesheets."
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Processes compiling in parallel (default: number of CPUs)",
+    )
+    args = parser.parse_args()
+
+    compiled = compile_schematron(
+        args.source_dir,
+        args.output_dir,
+        args.compiler_xsl,
+        args.include_glob,
+        args.exclude_glob,
+        args.merged_output_dir,
+        args.jobs,
+    )
+    print(f"Compiled {compiled} Schematron file(s); unchanged ones were kept.")
+
+
+if __name__ == "__main__":
+    main()
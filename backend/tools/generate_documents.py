@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.schema_explorer import EXPLORER, SchemaExplorer
+from app.schema_registry import XS_NS
+
+
+SECURITIES_PATH = ("domesticAndForeignIncome", "capitalIncome", "securitiesIncome")
+DEBTS_PATH = ("deductions", "debtInterests")
+DEFAULT_PROCEDURE_MIX = {"declaration": 1.0, "taxation": 1.0}
+DEFAULT_SIZES = ("10KB", "100KB", "1MB", "10MB", "50MB")
+SIZE_UNITS = (("KB", 1024), ("MB", 1024 * 1024), ("B", 1))
+CALIBRATION_POSITIONS = 256
+
+# Values for required attributes and leaves by simple type name. Leaves without a named type are
+# simple-content extensions, which in eCH-0278 are amounts.
+SAMPLE_VALUES = {
+    None: "0.00",
+    "boolean": "false",
+    "date": "2024-12-31",
+    "decimal": "1.00",
+    "integer": "1",
+    "positiveInteger": "1",
+    "string": "synthetic",
+    "moneyType": "0.00",
+    "percentageType": "1.00",
+    "baseNameType": "Muster",
+    "currencyIdISO3Type": "CHF",
+    "countryIdISO2Type": "CH",
+    "securityNameType": "Synthetic Security",
+}
+
+
+def parse_size(value: str) -> int:
+    """Byte count for ``10KB``, ``1MB`` or a plain number of bytes."""
+    text = value.strip().upper()
+    for unit, factor in SIZE_UNITS:
+        if text.endswith(unit):
+            return int(float(text[: -len(unit)]) * factor)
+    return int(text)
+
+
+def parse_procedure_mix(spec: str) -> dict[str, float]:
+    """``declaration=3,taxation=1`` to relative weights per ``taxProcedure`` value."""
+    mix: dict[str, float] = {}
+    for part in spec.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name.strip():
+            mix[name.strip()] = float(weight) if weight.strip() else 1.0
+    return mix
+
+
+class DocumentGenerator:
+    """Builds XSD-valid eCH-0278 documents from the schema tree of a ``SchemaExplorer``.
+
+    Required elements and attributes come from the tree. Size is driven by securities positions: stock
+    and payment entries under one ``securitiesIncome`` per person, competence and procedure. Debts add
+    one ``liabilityInterest`` per person, competence and procedure, which the schema keeps unique.
+    ``taxProcedure`` values of both are drawn from ``procedure_mix`` by weight.
+    """
+
+    def __init__(
+        self,
+        explorer: SchemaExplorer = EXPLORER,
+        *,
+        procedure_mix: dict[str, float] | None = None,
+        seed: int = 0,
+    ):
+        self.root = explorer.get_tree()["root"]
+        self.prefixes = {
+            namespace: prefix
+            for prefix, namespace in explorer.document.prefixes.items()
+            if prefix and namespace != XS_NS
+        }
+        self.procedure_mix = dict(DEFAULT_PROCEDURE_MIX if procedure_mix is None else procedure_mix)
+        self.seed = seed
+
+        securities = self._node(SECURITIES_PATH)
+        procedures = self._attribute(securities, "taxProcedure")["enum"]
+        if (
+            not self.procedure_mix
+            or not set(self.procedure_mix) <= set(procedures)
+            or min(self.procedure_mix.values()) <= 0
+        ):
+            raise ValueError(
+                f"Unsupported taxProcedure mix {self.procedure_mix}. Expected positive weights for {procedures}."
+            )
+        self.procedures = sorted(self.procedure_mix)
+        self.persons = self._attribute(securities, "person")["enum"]
+        self.competences = self._attribute(securities, "taxCompetence")["enum"]
+
+    @property
+    def slots_per_procedure(self) -> int:
+        return len(self.persons) * len(self.competences)
+
+    @property
+    def max_debts(self) -> int:
+        return self.slots_per_procedure * len(self.procedures)
+
+    def _node(self, path: tuple[str, ...]) -> dict:
+        node = self.root
+        for name in path:
+            node = self._child(node, name)
+        return node
+
+    @staticmethod
+    def _child(node: dict, name: str) -> dict:
+        return next(child for child in node["children"] if child["name"] == name)
+
+    @staticmethod
+    def _attribute(node: dict, name: str) -> dict:
+        return next(attribute for attribute in node["attributes"] if attribute["name"] == name)
+
+    def _keys(self, procedure: str, slot: int) -> dict[str, str]:
+        """Person and competence for the ``slot``-th element of one procedure, unique per slot."""
+        return {
+            "person": self.persons[slot % len(self.persons)],
+            "taxCompetence": self.competences[slot // len(self.persons)],
+            "taxProcedure": procedure,
+        }
+
+    def _primary_procedure(self) -> str:
+        return max(self.procedures, key=self.procedure_mix.get)
+
+    def _element(
+        self,
+        node: dict,
+        values: dict[str, str] | None = None,
+        *,
+        text: str | None = None,
+        required_children: bool = True,
+    ) -> ET.Element:
+        """Element for a tree node with its required attributes and, recursively, required children.
+
+        ``values`` override attribute values; ``taxProcedure`` is passed on to required children.
+        """
+        values = values or {}
+        element = ET.Element(f"{{{node['namespace']}}}{node['name']}" if node["namespace"] else node["name"])
+        for attribute in node["attributes"]:
+            name = attribute["name"]
+            if name in element.attrib or not (attribute["required"] or name in values):
+                continue
+            if name in values:
+                element.set(name, values[name])
+            elif attribute["fixed"] is not None:
+                element.set(name, attribute["fixed"])
+            elif attribute["enum"]:
+                element.set(name, attribute["enum"][0])
+            else:
+                element.set(name, SAMPLE_VALUES.get(attribute["type"], "1"))
+
+        if not node["children"]:
+            if text is None:
+                text = node["enumeration"][0] if node["enumeration"] else SAMPLE_VALUES.get(node["type"], "synthetic")
+            element.text = text
+        elif required_children:
+            inherited = {"taxProcedure": values["taxProcedure"]} if "taxProcedure" in values else {}
+            for child in node["children"]:
+                for _ in range(child["cardinality"]["min"]):
+                    element.append(self._element(child, inherited))
+        return element
+
+    def _assemble(self, node: dict, path: tuple[str, ...], extras: dict[tuple[str, ...], list[ET.Element]]):
+        """Required content of ``node`` with ``extras`` placed at their paths, in schema order.
+
+        Required elements that may repeat and carry ``taxProcedure`` appear once per procedure.
+        """
+        element = self._element(node, {"taxProcedure": self._primary_procedure()}, required_children=False)
+        for child in node["children"]:
+            child_path = path + (child["name"],)
+            if child_path in extras:
+                element.extend(extras[child_path])
+            elif any(extra[: len(child_path)] == child_path for extra in extras):
+                element.append(self._assemble(child, child_path, extras))
+            elif child["cardinality"]["min"] > 0:
+                procedures = [self._primary_procedure()]
+                if child["cardinality"]["max"] != 1 and any(a["name"] == "taxProcedure" for a in child["attributes"]):
+                    procedures = self.procedures
+                for procedure in procedures:
+                    for _ in range(child["cardinality"]["min"]):
+                        element.append(self._element(child, {"taxProcedure": procedure}))
+        return element
+
+    def _securities(self, positions: int, rng: random.Random) -> list[ET.Element]:
+        income_node = self._node(SECURITIES_PATH)
+        security_node = self._child(income_node, "securitySecurity")
+        stock_node = self._child(security_node, "stock")
+        payment_node = self._child(security_node, "payment")
+        weights = [self.procedure_mix[procedure] for procedure in self.procedures]
+
+        incomes: dict[tuple[str, int], tuple[ET.Element, list[ET.Element], list[ET.Element]]] = {}
+        counts = dict.fromkeys(self.procedures, 0)
+        for position in range(positions):
+            procedure = rng.choices(self.procedures, weights)[0]
+            slot = counts[procedure] % self.slots_per_procedure
+            counts[procedure] += 1
+            if (procedure, slot) not in incomes:
+                income = self._element(income_node, self._keys(procedure, slot))
+                income.append(self._element(security_node, {"positionId": str(len(incomes) + 1)}))
+                incomes[(procedure, slot)] = (income, [], [])
+            _, payments, stocks = incomes[(procedure, slot)]
+
+            day = f"2024-{position % 12 + 1:02d}-{position % 28 + 1:02d}"
+            quantity = str(rng.randint(1, 5000))
+            if position % 2:
+                payments.append(
+                    self._element(
+                        payment_node,
+                        {"paymentDate": day, "quantity": quantity, "amount": f"{rng.uniform(1, 10000):.2f}"},
+                    )
+                )
+            else:
+                stocks.append(
+                    self._element(
+                        stock_node,
+                        text="",
+                        values={
+                            "referenceDate": day,
+                            "mutation": "true" if position % 4 else "false",
+                            "quantity": quantity,
+                            "value": f"{rng.uniform(1, 100000):.2f}",
+                        },
+                    )
+                )
+
+        for income, payments, stocks in incomes.values():
+            # securitySecurity lists payments before stock entries.
+            income[-1].extend(payments + stocks)
+        return [income for income, _, _ in incomes.values()]
+
+    def _debts(self, count: int, rng: random.Random) -> tuple[list[ET.Element], list[ET.Element]]:
+        if count > self.max_debts:
+            raise ValueError(f"At most {self.max_debts} debts fit the procedure mix {self.procedure_mix}.")
+        interest_node = self._node(DEBTS_PATH + ("liabilityInterest",))
+        total_node = self._node(DEBTS_PATH + ("totalAmountLiabilitiesInterests",))
+        counts = dict.fromkeys(self.procedures, 0)
+        interests: list[ET.Element] = []
+        totals: list[ET.Element] = []
+        for index in range(count):
+            open_procedures = [p for p in self.procedures if counts[p] < self.slots_per_procedure]
+            procedure = rng.choices(open_procedures, [self.procedure_mix[p] for p in open_procedures])[0]
+            keys = self._keys(procedure, counts[procedure])
+            counts[procedure] += 1
+
+            amount = f"{rng.uniform(100, 20000):.2f}"
+            interest = self._element(interest_node, keys)
+            for name, text in (
+                ("isMortgage", "true" if index % 2 else "false"),
+                ("interest", amount),
+                ("interestRate", f"{rng.uniform(0.5, 4):.2f}"),
+                ("creditor", f"Bank {index + 1}"),
+            ):
+                interest.append(self._element(self._child(interest_node, name), text=text))
+            interests.append(interest)
+            totals.append(self._element(total_node, keys, text=amount))
+        return interests, totals
+
+    def generate(self, positions: int, debts: int = 0) -> bytes:
+        """Document with ``positions`` securities positions and ``debts`` debts."""
+        rng = random.Random(self.seed)
+        extras: dict[tuple[str, ...], list[ET.Element]] = {}
+        if positions:
+            extras[SECURITIES_PATH] = self._securities(positions, rng)
+        if debts:
+            interests, totals = self._debts(debts, rng)
+            extras[DEBTS_PATH + ("liabilityInterest",)] = interests
+            extras[DEBTS_PATH + ("totalAmountLiabilitiesInterests",)] = totals
+
+        for namespace, prefix in self.prefixes.items():
+            ET.register_namespace(prefix, namespace)
+        root = self._assemble(self.root, (), extras)
+        return ET.tostring(root, encoding="utf-8", xml_declaration=True)
+
+    def generate_size(self, target_bytes: int, debts: int | None = None) -> bytes:
+        """Document of about ``target_bytes``, filled up with securities positions.
+
+        All debt slots are used unless ``debts`` says otherwise; documents never get smaller than the
+        required content plus debts.
+        """
+        debts = self.max_debts if debts is None else debts
+        # Two calibration runs, both past the point where every securitiesIncome wrapper exists.
+        small = len(self.generate(CALIBRATION_POSITIONS, debts))
+        large = len(self.generate(2 * CALIBRATION_POSITIONS, debts))
+        per_position = (large - small) / CALIBRATION_POSITIONS
+        positions = CALIBRATION_POSITIONS + (target_bytes - small) / per_position
+        return self.generate(max(0, round(positions)), debts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic, XSD-valid eCH-0278 documents of given sizes for benchmarks."
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(DEFAULT_SIZES),
+        help="Comma-separated target sizes such as 10KB,1MB,50MB",
+    )
+    parser.add_argument("--output-dir", type=Path, required=True, help="Directory to write the documents to")
+    parser.add_argument(
+        "--procedure-mix",
+        default="declaration=1,taxation=1",
+        help="Relative taxProcedure weights, for example declaration=3,taxation=1",
+    )
+    parser.add_argument("--debts", type=int, default=None, help="Number of debts (default: all unique slots)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generated values")
+    args = parser.parse_args()
+
+    generator = DocumentGenerator(procedure_mix=parse_procedure_mix(args.procedure_mix), seed=args.seed)
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    for size in args.sizes.split(","):
+        document = generator.generate_size(parse_size(size), args.debts)
+        path = args.output_dir / f"synthetic-{size.strip()}.xml"
+        path.write_bytes(document)
+        print(f"Wrote {path} ({len(document)} bytes).")
+
+
+if __name__ == "__main__":
+    main()
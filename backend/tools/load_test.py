@@ -0,0 +1,531 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from generate_documents import DocumentGenerator, parse_procedure_mix, parse_size
+
+
+K8S_BACKEND_MANIFEST = BACKEND_DIR.parent / "infra" / "k8s" / "backend.yaml"
+REQUEST_KINDS = ("validate", "compare", "tree")
+DEFAULT_MIX = "validate=6,compare=2,tree=2"
+DEFAULT_RATES = "1,2,4,8"
+READY_PATH = "/api/schema/summary"
+READY_TIMEOUT_SECONDS = 120
+SAMPLE_INTERVAL_SECONDS = 0.5
+MIN_ACHIEVED_RATIO = 0.9
+MEMORY_UNITS = {"Ki": 1024, "Mi": 1024**2, "Gi": 1024**3, "K": 1000, "M": 1000**2, "G": 1000**3}
+
+
+def parse_cpu(value: str) -> float:
+    """Kubernetes CPU quantity such as ``500m`` or ``2`` in cores."""
+    value = value.strip().strip('"')
+    return int(value[:-1]) / 1000 if value.endswith("m") else float(value)
+
+
+def parse_memory(value: str) -> int:
+    """Kubernetes memory quantity such as ``512Mi`` in bytes."""
+    value = value.strip().strip('"')
+    for suffix, factor in MEMORY_UNITS.items():
+        if value.endswith(suffix):
+            return int(float(value[: -len(suffix)]) * factor)
+    return int(value)
+
+
+def read_backend_limits(path: Path = K8S_BACKEND_MANIFEST) -> dict:
+    """Container env, CPU and memory requests and limits of the backend deployment manifest.
+
+    Only the flat layout of ``infra/k8s/backend.yaml`` is understood, so no YAML parser is needed.
+    """
+    env: dict[str, str] = {}
+    resources: dict[str, dict[str, str]] = {"requests": {}, "limits": {}}
+    section = None
+    pending_name = None
+    for raw_line in path.read_text(encoding="utf-8").splitlines():
+        line = raw_line.strip()
+        if line == "---":
+            break
+        if match := re.fullmatch(r"- name: (\S+)", line):
+            pending_name = match.group(1)
+            continue
+        if pending_name and (match := re.fullmatch(r"value: (.+)", line)):
+            env[pending_name] = match.group(1).strip().strip('"')
+            pending_name = None
+            continue
+        if line in ("requests:", "limits:"):
+            section = line[:-1]
+        elif section and (match := re.fullmatch(r"(cpu|memory): (\S+)", line)):
+            resources[section][match.group(1)] = match.group(2)
+    return {
+        "env": env,
+        "cpuRequest": parse_cpu(resources["requests"].get("cpu", "0")),
+        "cpuLimit": parse_cpu(resources["limits"].get("cpu", "0")),
+        "memoryRequest": parse_memory(resources["requests"].get("memory", "0")),
+        "memoryLimit": parse_memory(resources["limits"].get("memory", "0")),
+    }
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    mix = parse_procedure_mix(spec)
+    unknown = sorted(set(mix) - set(REQUEST_KINDS))
+    if unknown or not mix or min(mix.values()) <= 0:
+        raise ValueError(f"Unsupported request mix '{spec}'. Expected positive weights for {list(REQUEST_KINDS)}.")
+    return mix
+
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    """Nearest-rank percentile of ``values``, ``None`` for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def multipart_body(files: list[tuple[str, str, bytes]]) -> tuple[bytes, str]:
+    boundary = f"ech0278load{random.getrandbits(64):016x}"
+    parts = []
+    for field, filename, content in files:
+        header = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            "Content-Type: application/xml\r\n\r\n"
+        )
+        parts.append(header.encode("ascii") + content + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode("ascii"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def http_request(method: str, host: str, target: str, body: bytes = b"", headers: dict[str, str] | None = None):
+    lines = [f"{method} {target} HTTP/1.1", f"Host: {host}", "Connection: close", f"Content-Length: {len(body)}"]
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+class RequestPlan:
+    """Prebuilt requests per kind, so the harness spends no time encoding uploads while under load."""
+
+    def __init__(self, documents: list[bytes], host: str, procedural: bool):
+        self.host = host
+        self.requests: dict[str, list[tuple[str, bytes, str | None]]] = {kind: [] for kind in REQUEST_KINDS}
+        validate_target = "/api/validate?procedural=true" if procedural else "/api/validate"
+        for index, document in enumerate(documents):
+            body, content_type = multipart_body([("file", f"synthetic-{index}.xml", document)])
+            self.requests["validate"].append((validate_target, body, content_type))
+            other = documents[(index + 1) % len(documents)]
+            body, content_type = multipart_body(
+                [("xml1", f"synthetic-{index}.xml", document), ("xml2", f"synthetic-{index + 1}.xml", other)]
+            )
+            self.requests["compare"].append(("/api/compare", body, content_type))
+        self.requests["tree"].append(("/api/schema/tree", b"", None))
+
+    def build(self, kind: str, sequence: int, client: str) -> bytes:
+        target, body, content_type = self.requests[kind][sequence % len(self.requests[kind])]
+        # Each request comes from one of many synthetic clients, as behind the ingress.
+        headers = {"X-Forwarded-For": client, "Accept-Encoding": "gzip"}
+        if content_type is None:
+            return http_request("GET", self.host, target, headers=headers)
+        headers["Content-Type"] = content_type
+        return http_request("POST", self.host, target, body, headers)
+
+
+async def send(host: str, port: int, request: bytes, timeout: float) -> tuple[int | None, float, str | None]:
+    """Status, latency and error of one request over its own connection."""
+    async def exchange() -> int:
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()
+            return int(status_line.split()[1])
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    try:
+        return await asyncio.wait_for(exchange(), timeout), time.perf_counter() - started, None
+    except asyncio.TimeoutError:
+        return None, time.perf_counter() - started, "timeout"
+    except (OSError, IndexError, ValueError) as exc:
+        return None, time.perf_counter() - started, type(exc).__name__
+
+
+class ProcessTreeSampler:
+    """Resident memory and CPU time of a process and its descendants, read from ``/proc``."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.clock_ticks = os.sysconf("SC_CLK_TCK")
+        self.page_size = os.sysconf("SC_PAGE_SIZE")
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _tree(self) -> list[int]:
+        pids, index = [self.pid], 0
+        while index < len(pids):
+            for task in Path(f"/proc/{pids[index]}/task").glob("*/children"):
+                try:
+                    pids.extend(int(child) for child in task.read_text().split())
+                except OSError:
+                    pass
+            index += 1
+        return pids
+
+    def sample(self) -> tuple[float, int]:
+        """CPU seconds and resident bytes summed over the process tree."""
+        cpu_seconds, rss = 0.0, 0
+        for pid in self._tree():
+            try:
+                fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+                cpu_seconds += (int(fields[11]) + int(fields[12])) / self.clock_ticks
+                rss += int(Path(f"/proc/{pid}/statm").read_text().split()[1]) * self.page_size
+            except (OSError, IndexError, ValueError):
+                continue
+        return cpu_seconds, rss
+
+    def _run(self) -> None:
+        while not self._stop.wait(SAMPLE_INTERVAL_SECONDS):
+            self.peak_rss = max(self.peak_rss, self.sample()[1])
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def take_peak(self) -> int:
+        peak, self.peak_rss = max(self.peak_rss, self.sample()[1]), 0
+        return peak
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class LocalServer:
+    """The FastAPI app under uvicorn on a free local port, optionally inside CPU and memory limits."""
+
+    def __init__(self, workers: int, env: dict[str, str], limits: dict | None):
+        self.workers = workers
+        self.env = env
+        self.limits = limits
+        self.port = _free_port()
+        self.process: subprocess.Popen | None = None
+
+    def command(self) -> list[str]:
+        command = [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(self.port), "--workers", str(self.workers),
+        ]
+        if self.limits is None:
+            return command
+        if shutil.which("systemd-run") is None:
+            raise RuntimeError("--enforce-limits requires systemd-run to place the server in a cgroup.")
+        return [
+            "systemd-run", "--user", "--scope", "--quiet",
+            "-p", f"CPUQuota={round(self.limits['cpuLimit'] * 100)}%",
+            "-p", f"MemoryMax={self.limits['memoryLimit']}",
+            *command,
+        ]
+
+    def start(self) -> float:
+        """Start the server and return the seconds until it answered its readiness probe."""
+        started = time.perf_counter()
+        self.process = subprocess.Popen(
+            self.command(),
+            cwd=BACKEND_DIR,
+            env={**os.environ, **self.env},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        while time.perf_counter() - started < READY_TIMEOUT_SECONDS:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {self.process.returncode} before it was ready.")
+            status, _, _ = asyncio.run(
+                send("127.0.0.1", self.port, http_request("GET", "127.0.0.1", READY_PATH), timeout=2)
+            )
+            if status == 200:
+                return time.perf_counter() - started
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"Server was not ready within {READY_TIMEOUT_SECONDS} seconds.")
+
+    def stop(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def summarize_stage(rate: float, duration: float, results: list[tuple[str, int | None, float, str | None]]) -> dict:
+    """Latency percentiles of successful requests, error and rate-limit rates, per stage and kind.
+
+    Errors are server errors (including ``503`` from a full worker queue), timeouts and connection failures.
+    The achieved rate counts every answer that is not an error, so rate-limited requests count as served.
+    """
+    def stats(rows: list[tuple[str, int | None, float, str | None]]) -> dict:
+        latencies = [latency for _, status, latency, _ in rows if status is not None and status < 400]
+        errors = sum(1 for _, status, _, _ in rows if status is None or status >= 500)
+        rate_limited = sum(1 for _, status, _, _ in rows if status == 429)
+        return {
+            "requests": len(rows),
+            "succeeded": len(latencies),
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "errorRate": errors / len(rows) if rows else 0.0,
+            "rateLimitedRate": rate_limited / len(rows) if rows else 0.0,
+        }
+
+    answered = sum(1 for _, status, _, _ in results if status is not None and status < 500)
+    summary = {"offeredRate": rate, "achievedRate": answered / duration, **stats(results), "byKind": {}}
+    for kind in REQUEST_KINDS:
+        rows = [row for row in results if row[0] == kind]
+        if rows:
+            summary["byKind"][kind] = stats(rows)
+    return summary
+
+
+def is_saturated(stage: dict, slo_p95: float, max_error_rate: float, cpu_limit: float | None = None) -> bool:
+    """A stage saturates the server when it misses the p95 SLO, errors, or falls behind the offered rate.
+
+    With ``cpu_limit`` (limits not enforced locally), using more CPU than a pod may also counts, since the
+    pod would be throttled at that rate.
+    """
+    return (
+        stage["p95"] is None
+        or stage["p95"] > slo_p95
+        or stage["errorRate"] > max_error_rate
+        or stage["achievedRate"] < MIN_ACHIEVED_RATIO * stage["offeredRate"]
+        or (cpu_limit is not None and stage.get("cpuCores", 0.0) > cpu_limit)
+    )
+
+
+async def run_stage(
+    plan: RequestPlan,
+    host: str,
+    port: int,
+    rate: float,
+    duration: float,
+    mix: dict[str, float],
+    *,
+    clients: int,
+    timeout: float,
+    poisson: bool,
+    rng: random.Random,
+) -> list[tuple[str, int | None, float, str | None]]:
+    """Open-loop load: requests start at their arrival time whether or not earlier ones finished."""
+    kinds = sorted(mix)
+    weights = [mix[kind] for kind in kinds]
+    results: list[tuple[str, int | None, float, str | None]] = []
+
+    async def one(kind: str, request: bytes) -> None:
+        status, latency, error = await send(host, port, request, timeout)
+        results.append((kind, status, latency, error))
+
+    tasks = []
+    started = time.perf_counter()
+    arrival, sequence = 0.0, 0
+    while arrival < duration:
+        delay = started + arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        kind = rng.choices(kinds, weights)[0]
+        request = plan.build(kind, sequence, _client_address(sequence % clients if clients else sequence))
+        tasks.append(asyncio.create_task(one(kind, request)))
+        sequence += 1
+        arrival += rng.expovariate(rate) if poisson else 1 / rate
+    await asyncio.gather(*tasks)
+    return results
+
+
+def _client_address(index: int) -> str:
+    return f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"
+
+
+def _format_seconds(value: float | None) -> str:
+    return "      -" if value is None else f"{value * 1000:7.0f}"
+
+
+def main() -> None:
+    limits = read_backend_limits()
+    parser = argparse.ArgumentParser(
+        description="Replay validate, compare and schema-tree requests against a local uvicorn stack at fixed "
+        "arrival rates and report latency percentiles, error rates and the saturation point."
+    )
+    parser.add_argument("--url", default=None, help="Target an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes (default: 1, as deployed)")
+    parser.add_argument(
+        "--validation-workers",
+        type=int,
+        default=int(limits["env"].get("VALIDATION_WORKERS", "2")),
+        help="VALIDATION_WORKERS per uvicorn worker (default: from infra/k8s/backend.yaml)",
+    )
+    parser.add_argument(
+        "--enforce-limits",
+        action="store_true",
+        help="Run the server under the CPU and memory limits of infra/k8s/backend.yaml via systemd-run",
+    )
+    parser.add_argument("--rates", default=DEFAULT_RATES, help="Comma-separated arrival rates in requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per arrival rate")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Relative request weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--poisson", action="store_true", help="Exponential instead of evenly spaced arrivals")
+    parser.add_argument("--procedural", action="store_true", help="Validate with procedural checks")
+    parser.add_argument("--document-size", default="100KB", help="Size of generated documents")
+    parser.add_argument("--documents", type=int, default=16, help="Distinct generated documents to cycle through")
+    parser.add_argument(
+        "--clients",
+        type=int,
+        default=1000,
+        help="Synthetic client addresses sent as X-Forwarded-For; 0 uses a new one per request",
+    )
+    parser.add_argument("--cache", action="store_true", help="Keep the validation result cache enabled")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds before a request counts as failed")
+    parser.add_argument("--slo-p95", type=float, default=2.0, help="p95 latency objective in seconds")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error rate objective")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for documents and arrivals")
+    parser.add_argument("--output", type=Path, default=None, help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as exc:
+        parser.error(str(exc))
+    rates = [float(rate) for rate in args.rates.split(",") if rate.strip()]
+    target_size = parse_size(args.document_size)
+    documents = [
+        DocumentGenerator(seed=args.seed + index).generate_size(target_size) for index in range(args.documents)
+    ]
+
+    server, sampler, startup_seconds = None, None, None
+    if args.url is None:
+        env = {
+            **limits["env"],
+            "VALIDATION_WORKERS": str(args.validation_workers),
+            # Keep the production limit per client; synthetic client addresses stay below it.
+            "RATE_LIMIT_BACKEND": "shared" if args.workers > 1 else "memory",
+            "RATE_LIMIT_SHARED_PATH": str(Path(tempfile.gettempdir()) / f"ech-0278-load-{os.getpid()}"),
+            # The load mix stores no snapshots; keep the manifest's volume path out of the local run.
+            "SNAPSHOT_DB_PATH": ":memory:",
+        }
+        if not args.cache:
+            env["VALIDATION_CACHE_MAX_BYTES"] = "0"
+        server = LocalServer(args.workers, env, limits if args.enforce_limits else None)
+        startup_seconds = server.start()
+        host, port = "127.0.0.1", server.port
+        if Path("/proc").is_dir():
+            sampler = ProcessTreeSampler(server.process.pid)
+            sampler.start()
+        print(f"Server ready on port {port} after {startup_seconds:.1f} s.", flush=True)
+    else:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+
+    plan = RequestPlan(documents, host, args.procedural)
+    rng = random.Random(args.seed)
+    report = {
+        "limits": {key: value for key, value in limits.items() if key != "env"},
+        "workers": args.workers,
+        "validationWorkers": args.validation_workers,
+        "limitsEnforced": args.enforce_limits,
+        "documentBytes": len(documents[0]),
+        "mix": mix,
+        "startupSeconds": startup_seconds,
+        "coldRequests": {},
+        "stages": [],
+    }
+    try:
+        # First request of each kind pays for lazy initialization in the worker that serves it.
+        for kind in sorted(mix):
+            status, latency, _ = asyncio.run(send(host, port, plan.build(kind, 0, _client_address(0)), args.timeout))
+            report["coldRequests"][kind] = {"status": status, "seconds": latency}
+
+        print(f"{'rate':>6} {'ok/s':>6} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'errors':>7} {'429':>6}"
+              f" {'cpu':>6} {'rss MB':>7}")
+        for rate in rates:
+            cpu_before = sampler.sample()[0] if sampler else None
+            started = time.perf_counter()
+            results = asyncio.run(
+                run_stage(
+                    plan, host, port, rate, args.duration, mix,
+                    clients=args.clients, timeout=args.timeout, poisson=args.poisson, rng=rng,
+                )
+            )
+            stage = summarize_stage(rate, args.duration, results)
+            if sampler is not None:
+                stage["cpuCores"] = (sampler.sample()[0] - cpu_before) / (time.perf_counter() - started)
+                stage["peakRssBytes"] = sampler.take_peak()
+            stage["saturated"] = is_saturated(
+                stage,
+                args.slo_p95,
+                args.max_error_rate,
+                None if args.enforce_limits or sampler is None else limits["cpuLimit"],
+            )
+            report["stages"].append(stage)
+            print(
+                f"{rate:6.1f} {stage['achievedRate']:6.1f} {_format_seconds(stage['p50'])}"
+                f" {_format_seconds(stage['p95'])} {_format_seconds(stage['p99'])}"
+                f" {stage['errorRate'] * 100:6.1f}% {stage['rateLimitedRate'] * 100:5.1f}%"
+                + (f" {stage['cpuCores']:6.2f} {stage['peakRssBytes'] / 1024**2:7.0f}" if sampler else "")
+                + ("  saturated" if stage["saturated"] else ""),
+                flush=True,
+            )
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        if server is not None:
+            server.stop()
+            Path(server.env["RATE_LIMIT_SHARED_PATH"]).unlink(missing_ok=True)
+
+    stages = report["stages"]
+    first_saturated = next((index for index, stage in enumerate(stages) if stage["saturated"]), len(stages))
+    report["saturationRate"] = stages[first_saturated]["offeredRate"] if first_saturated < len(stages) else None
+    report["maxSustainedRate"] = stages[first_saturated - 1]["offeredRate"] if first_saturated else None
+
+    if report["saturationRate"] is None:
+        print("No saturation at the tested rates.")
+    else:
+        print(f"Saturation at {report['saturationRate']} req/s, sustained up to {report['maxSustainedRate']} req/s.")
+    if sampler is not None and first_saturated:
+        # CPU at the highest sustained rate, against the figures the HPA target is a percentage of.
+        last = stages[first_saturated - 1]
+        print(
+            f"At {last['offeredRate']} req/s: {last['cpuCores']:.2f} CPU cores "
+            f"({last['cpuCores'] / limits['cpuLimit'] * 100:.0f}% of limit, "
+            f"{last['cpuCores'] / limits['cpuRequest'] * 100:.0f}% of request), "
+            f"peak RSS {last['peakRssBytes'] / limits['memoryLimit'] * 100:.0f}% of memory limit."
+        )
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote load test report {args.output}.")
+
+
+if __name__ == "__main__":
+    main()